@@ -0,0 +1,186 @@
+"""Fațadă asyncio peste manageri: citiri în paralel, scrieri serializate.
+
+Fiecare metodă a managerilor devine o corutină. Citirile rulează pe un
+executor dedicat, cu conexiuni read-only, deci o pagină poate aștepta în
+paralel interogări independente:
+
+    data = facade.load(
+        feed=facade.posts.get_feed_page(20),
+        communities=facade.communities.get_all_communities(),
+        user=facade.users.get_user_by_id(user_id),
+    )
+
+Scrierile trec printr-un singur fir scriitor, care le preia în ordine și le
+grupează: toate scrierile aflate în coadă intră în aceeași tranzacție, fiecare
+în propriul SAVEPOINT, ca o eroare să nu le anuleze pe celelalte. Sesiunile
+nu se mai întrec pentru lock-ul de scriere SQLite.
+
+Scriitorul e un fir, nu un asyncio.Task: Streamlit rulează fiecare script
+într-o buclă de evenimente nouă (asyncio.run), iar fațada e partajată de
+toate sesiunile procesului.
+"""
+import asyncio
+import functools
+import inspect
+import queue
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from database import Comment, Community, Database, Message, Notification, Post, Search, User
+from cache import CachedCommunity, CachedPost, CachedUser, QueryCache
+from ratelimit import USER_ARGUMENTS, RateLimiter
+
+# Metodele care scriu; restul sunt citiri
+WRITE_METHODS = {
+    'create_user', 'bulk_create', 'create_community', 'join_community', 'leave_community',
+    'create_post', 'delete_post',
+    'create_comment', 'send_message', 'mark_conversation_read', 'mark_read',
+}
+# Metode cu KDF lent: hash-ul parolei rulează pe executorul de citire, ca să nu țină
+# lock-ul tranzacției comune, iar scrierea care urmează trece prin firul scriitor
+KDF_METHODS = {'authenticate': '_authenticate', 'create_user': '_create_user'}
+
+
+class AsyncManager:
+    """Proxy asincron pentru un manager: facade.posts.get_feed_page(...) întoarce o corutină"""
+
+    def __init__(self, facade: 'AsyncDataAccess', reader, writer):
+        self._facade = facade
+        self._reader = reader
+        self._writer = writer
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if name in KDF_METHODS:
+            return functools.partial(getattr(self._facade, KDF_METHODS[name]), self._reader, self._writer)
+        if name in WRITE_METHODS:
+            if self._facade.limiter is not None and name in USER_ARGUMENTS:
+                return functools.partial(self._facade.limited_write, name, getattr(self._writer, name))
+            return functools.partial(self._facade.write, getattr(self._writer, name))
+        return functools.partial(self._facade.read, getattr(self._reader, name))
+
+
+class AsyncDataAccess:
+    def __init__(self, db: Database, readers: int = 4, cache: Optional[QueryCache] = None,
+                 hasher=None, max_batch: int = 64, limiter: Optional[RateLimiter] = None):
+        self.db = db
+        self.max_batch = max_batch
+        self.limiter = limiter
+        self.reader_db = Database(db.db_path, pool_size=readers, busy_timeout=db.busy_timeout,
+                                  tracer=db.tracer, read_only=True)
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix='db-read')
+        self._writes: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name='db-write', daemon=True)
+        self._writer.start()
+
+        def managers(database: Database):
+            if cache is not None:
+                users = CachedUser(database, cache, hasher)
+                communities, posts = CachedCommunity(database, cache), CachedPost(database, cache)
+            else:
+                users, communities, posts = User(database, hasher), Community(database), Post(database)
+            return {'users': users, 'communities': communities, 'posts': posts,
+                    'comments': Comment(database), 'messages': Message(database),
+                    'notifications': Notification(database), 'search': Search(database)}
+
+        readers_by_name, writers_by_name = managers(self.reader_db), managers(db)
+        self.users = AsyncManager(self, readers_by_name['users'], writers_by_name['users'])
+        self.communities = AsyncManager(self, readers_by_name['communities'], writers_by_name['communities'])
+        self.posts = AsyncManager(self, readers_by_name['posts'], writers_by_name['posts'])
+        self.comments = AsyncManager(self, readers_by_name['comments'], writers_by_name['comments'])
+        self.messages = AsyncManager(self, readers_by_name['messages'], writers_by_name['messages'])
+        self.notifications = AsyncManager(self, readers_by_name['notifications'], writers_by_name['notifications'])
+        self.search = AsyncManager(self, readers_by_name['search'], writers_by_name['search'])
+
+    async def read(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, functools.partial(fn, *args, **kwargs))
+
+    async def write(self, fn, *args, **kwargs):
+        future: Future = Future()
+        self._writes.put((fn, args, kwargs, future))
+        return await asyncio.wrap_future(future)
+
+    async def limited_write(self, action: str, fn, *args, **kwargs):
+        """Ca write, după limita utilizatorului pentru acțiune: o cerere refuzată nu intră în coada scriitorului"""
+        user_id = inspect.signature(fn).bind(*args, **kwargs).arguments[USER_ARGUMENTS[action]]
+        self.limiter.check(user_id, action)
+        return await self.write(fn, *args, **kwargs)
+
+    async def _create_user(self, reader: User, writer: User, username: str, email: str, password: str) -> bool:
+        password_hash = await self.read(reader.hasher.hash, password)
+        return await self.write(writer.insert_user, str(uuid.uuid4()), username, email, password_hash)
+
+    async def _authenticate(self, reader: User, writer: User, username: str, password: str):
+        user, rehash = await self.read(reader.verify_credentials, username, password)
+        if rehash is not None:
+            await self.write(writer.replace_password_hash, user['id'], *rehash)
+        return user
+
+    async def gather(self, **awaitables) -> Dict[str, Any]:
+        results = await asyncio.gather(*awaitables.values())
+        return dict(zip(awaitables, results))
+
+    def load(self, **awaitables) -> Dict[str, Any]:
+        """Din cod sincron (scripturile Streamlit): rulează corutinele în paralel și întoarce rezultatele după nume"""
+        return asyncio.run(self.gather(**awaitables))
+
+    def run(self, awaitable):
+        """Din cod sincron: o singură operație (ex. o scriere)"""
+        async def wait():
+            return await awaitable
+        return asyncio.run(wait())
+
+    def _write_loop(self):
+        while True:
+            batch = [self._writes.get()]
+            while batch[-1] is not None and len(batch) < self.max_batch:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            stop = batch[-1] is None
+            if stop:
+                batch.pop()
+            if batch:
+                self._apply(batch)
+            if stop:
+                return
+
+    def _apply(self, batch):
+        outcomes = []
+        try:
+            with self.db.transaction() as conn:
+                for fn, args, kwargs, future in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    conn.execute("SAVEPOINT async_write")
+                    try:
+                        outcomes.append((future, fn(*args, **kwargs), None))
+                        conn.execute("RELEASE async_write")
+                    except Exception as error:
+                        conn.execute("ROLLBACK TO async_write")
+                        conn.execute("RELEASE async_write")
+                        outcomes.append((future, None, error))
+        except Exception as error:
+            # Commit-ul a eșuat: nicio scriere din lot n-a ajuns în bază
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        # Rezultatele se publică abia după commit și după invalidările din cache (Database.after_commit);
+        # o scriere anulată la SAVEPOINT își invalidează totuși etichetele, ceea ce e inofensiv
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def close(self):
+        self._writes.put(None)
+        self._writer.join()
+        self._readers.shutdown()
+        self.reader_db.close()
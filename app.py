@@ -1,20 +1,61 @@
+import json
+import os
 import streamlit as st
-from database import Database, User, Community, Post, Comment, Message
+from database import Database, Comment, Message, Notification, Vote, VoteBuffer, build_comment_tree
+from cache import QueryCache, CachedUser, CachedCommunity, CachedPost
+from passwords import PasswordHasher
+from diagnostics import QueryTracer
+from aio import AsyncDataAccess
+from backup import BackupScheduler, BackupService, describe
+from media import LEGACY_PREFIX, MediaStore, is_legacy
+from events import ProjectionWorker, get_user_stats
+from ratelimit import RateLimiter, RateLimitExceeded, WriterGate
+from presenter import PRESENTERS, present_comments, present_posts
+from trending import TrendingEngine
+from utils import get_trending_communities
 from datetime import datetime
+from functools import lru_cache
 
-# Funcție pentru iconițe SVG
+# Conținutul iconițelor SVG; învelișul <svg> e comun
+ICON_PATHS = {
+    "flame": '<path d="M8.5 14.5A2.5 2.5 0 0 0 11 12c0-1.38-.5-2-1-3-1.072-2.143-.224-4.054 2-6 .5 2.5 2 4.9 4 6.5 2 1.6 3 3.5 3 5.5a7 7 0 1 1-14 0c0-1.153.433-2.294 1-3a2.5 2.5 0 0 0 2.5 2.5z"/>',
+    "home": '<path d="m3 9 9-7 9 7v11a2 2 0 0 1-2 2H5a2 2 0 0 1-2-2z"/><polyline points="9,22 9,12 15,12 15,22"/>',
+    "users": '<path d="M16 21v-2a4 4 0 0 0-4-4H6a4 4 0 0 0-4 4v2"/><circle cx="9" cy="7" r="4"/><path d="m22 21-3.5-3.5a7 7 0 1 0-1.414 1.414L21 22"/>',
+    "plus": '<circle cx="12" cy="12" r="10"/><path d="M8 12h8"/><path d="M12 8v8"/>',
+    "user": '<path d="M20 21v-2a4 4 0 0 0-4-4H8a4 4 0 0 0-4 4v2"/><circle cx="12" cy="7" r="4"/>',
+    "message-circle": '<path d="M7.9 20A9 9 0 1 0 4 16.1L2 22Z"/>',
+    "log-out": '<path d="M9 21H5a2 2 0 0 1-2-2V5a2 2 0 0 1 2-2h4"/><polyline points="16,17 21,12 16,7"/><line x1="21" y1="12" x2="9" y2="12"/>',
+    "external-link": '<path d="M15 3h6v6"/><path d="M10 14 21 3"/><path d="M18 13v6a2 2 0 0 1-2 2H5a2 2 0 0 1-2-2V8a2 2 0 0 1 2-2h6"/>',
+    "search": '<circle cx="11" cy="11" r="8"/><path d="m21 21-4.3-4.3"/>',
+    "activity": '<path d="M22 12h-4l-3 9L9 3l-3 9H2"/>',
+    "bell": '<path d="M6 8a6 6 0 0 1 12 0c0 7 3 9 3 9H3s3-2 3-9"/><path d="M10.3 21a1.94 1.94 0 0 0 3.4 0"/>',
+}
+
+# Aceleași iconițe se cer de zeci de ori la fiecare rulare a scriptului
+@lru_cache(maxsize=256)
 def icon(name, size=16, color="currentColor"):
-    icons = {
-        "flame": f'<svg width="{size}" height="{size}" viewBox="0 0 24 24" fill="none" stroke="{color}" stroke-width="2"><path d="M8.5 14.5A2.5 2.5 0 0 0 11 12c0-1.38-.5-2-1-3-1.072-2.143-.224-4.054 2-6 .5 2.5 2 4.9 4 6.5 2 1.6 3 3.5 3 5.5a7 7 0 1 1-14 0c0-1.153.433-2.294 1-3a2.5 2.5 0 0 0 2.5 2.5z"/></svg>',
-        "home": f'<svg width="{size}" height="{size}" viewBox="0 0 24 24" fill="none" stroke="{color}" stroke-width="2"><path d="m3 9 9-7 9 7v11a2 2 0 0 1-2 2H5a2 2 0 0 1-2-2z"/><polyline points="9,22 9,12 15,12 15,22"/></svg>',
-        "users": f'<svg width="{size}" height="{size}" viewBox="0 0 24 24" fill="none" stroke="{color}" stroke-width="2"><path d="M16 21v-2a4 4 0 0 0-4-4H6a4 4 0 0 0-4 4v2"/><circle cx="9" cy="7" r="4"/><path d="m22 21-3.5-3.5a7 7 0 1 0-1.414 1.414L21 22"/></svg>',
-        "plus": f'<svg width="{size}" height="{size}" viewBox="0 0 24 24" fill="none" stroke="{color}" stroke-width="2"><circle cx="12" cy="12" r="10"/><path d="M8 12h8"/><path d="M12 8v8"/></svg>',
-        "user": f'<svg width="{size}" height="{size}" viewBox="0 0 24 24" fill="none" stroke="{color}" stroke-width="2"><path d="M20 21v-2a4 4 0 0 0-4-4H8a4 4 0 0 0-4 4v2"/><circle cx="12" cy="7" r="4"/></svg>',
-        "message-circle": f'<svg width="{size}" height="{size}" viewBox="0 0 24 24" fill="none" stroke="{color}" stroke-width="2"><path d="M7.9 20A9 9 0 1 0 4 16.1L2 22Z"/></svg>',
-        "log-out": f'<svg width="{size}" height="{size}" viewBox="0 0 24 24" fill="none" stroke="{color}" stroke-width="2"><path d="M9 21H5a2 2 0 0 1-2-2V5a2 2 0 0 1 2-2h4"/><polyline points="16,17 21,12 16,7"/><line x1="21" y1="12" x2="9" y2="12"/></svg>',
-        "external-link": f'<svg width="{size}" height="{size}" viewBox="0 0 24 24" fill="none" stroke="{color}" stroke-width="2"><path d="M15 3h6v6"/><path d="M10 14 21 3"/><path d="M18 13v6a2 2 0 0 1-2 2H5a2 2 0 0 1-2-2V8a2 2 0 0 1 2-2h6"/></svg>'
-    }
-    return icons.get(name, '')
+    paths = ICON_PATHS.get(name)
+    if paths is None:
+        return ''
+    return f'<svg width="{size}" height="{size}" viewBox="0 0 24 24" fill="none" stroke="{color}" stroke-width="2">{paths}</svg>'
+
+# st.fragment (1.37+) sau experimental_fragment (1.33–1.36); pe versiuni mai vechi
+# funcțiile rulează ca înainte, odată cu tot scriptul
+_fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None)
+
+def fragment(fn=None, *, run_every=None):
+    def decorate(fn):
+        if _fragment is None:
+            return fn
+        return _fragment(fn, run_every=run_every) if run_every else _fragment(fn)
+    return decorate(fn) if fn is not None else decorate
+
+def rerun_fragment():
+    """Reia doar fragmentul curent; fără scope (sub 1.37) se reia tot scriptul"""
+    try:
+        st.rerun(scope="fragment")
+    except TypeError:
+        st.rerun()
 
 # Configurare pagină
 st.set_page_config(
@@ -23,17 +64,101 @@ st.set_page_config(
     layout="wide"
 )
 
+# Utilizatorii care văd pagina de diagnostic (nume separate prin virgulă)
+ADMIN_USERNAMES = {name.strip() for name in os.environ.get("REDDIT_CLONE_ADMINS", "").split(",") if name.strip()}
+SLOW_QUERY_MS = 100
+
+# Statisticile SQL sunt comune tuturor sesiunilor din proces; cronometrarea pornește doar
+# din pagina Diagnostic (sau cu REDDIT_CLONE_TRACE_SQL=1), altfel interogările nu plătesc nimic pentru ea
+@st.cache_resource
+def init_query_tracer():
+    return QueryTracer(slow_ms=SLOW_QUERY_MS, enabled=os.environ.get("REDDIT_CLONE_TRACE_SQL") == "1")
+
+# Scrierile din proces (sesiuni, buffer de voturi, proiecții) trec pe rând, fără să se bată pe lock-ul SQLite
+@st.cache_resource
+def init_writer_gate():
+    return WriterGate(slots=1)
+
 # Inițializare bază de date
 @st.cache_resource
 def init_database():
-    return Database()
+    return Database(tracer=init_query_tracer(), writer_gate=init_writer_gate())
+
+# Un singur buffer de voturi per proces, partajat de toate sesiunile
+@st.cache_resource
+def init_vote_buffer():
+    return VoteBuffer(init_database())
+
+# Cache-ul de citiri e comun tuturor sesiunilor din proces
+@st.cache_resource
+def init_query_cache():
+    return QueryCache(maxsize=2048, ttl=60)
+
+# Pool de procese pentru KDF-ul parolelor, comun tuturor sesiunilor
+@st.cache_resource
+def init_password_hasher():
+    return PasswordHasher()
+
+# HTML-ul gata construit al cardurilor de postare, comun tuturor sesiunilor
+@st.cache_resource
+def init_render_cache():
+    return QueryCache(maxsize=4096, ttl=3600)
+
+# Imaginile încărcate; variantele lipsă de la rularea anterioară se reprogramează
+@st.cache_resource
+def init_media_store():
+    store = MediaStore(init_database(), root=os.environ.get("REDDIT_CLONE_MEDIA", "media"),
+                       legacy_root=os.environ.get("REDDIT_CLONE_LEGACY_IMAGES", "."))
+    store.resume_pending()
+    return store
+
+# Proiecțiile din jurnalul de evenimente (karma, statistici) ținute la zi în fundal
+@st.cache_resource
+def init_projection_worker():
+    return ProjectionWorker(init_database())
+
+# Limitele per utilizator sunt comune tuturor sesiunilor și supraviețuiesc repornirilor
+@st.cache_resource
+def init_rate_limiter():
+    return RateLimiter(db=init_database())
+
+# Scorurile de trending, actualizate din jurnal la fiecare secundă și salvate periodic
+@st.cache_resource
+def init_trending_engine():
+    return TrendingEngine(init_database())
+
+# Snapshot-uri periodice din procesul aplicației (REDDIT_CLONE_BACKUP_EVERY secunde), ca raportul
+# fiecăruia să includă cât au așteptat scriitorii sesiunilor în timpul copierii
+@st.cache_resource
+def init_backup_scheduler():
+    every = float(os.environ.get("REDDIT_CLONE_BACKUP_EVERY", 0))
+    if not every:
+        return None
+    service = BackupService(init_database(), os.environ.get("REDDIT_CLONE_BACKUPS", "backups"))
+    return BackupScheduler(service, interval_s=every)
+
+# Citiri în paralel și un singur scriitor pentru tot procesul
+@st.cache_resource
+def init_data_access():
+    return AsyncDataAccess(init_database(), cache=init_query_cache(), hasher=init_password_hasher(),
+                           limiter=init_rate_limiter())
 
 db = init_database()
-user_manager = User(db)
-community_manager = Community(db)
-post_manager = Post(db)
+query_cache = init_query_cache()
+render_cache = init_render_cache()
+media_store = init_media_store()
+data_access = init_data_access()
+rate_limiter = init_rate_limiter()
+init_projection_worker()
+trending_engine = init_trending_engine()
+backup_scheduler = init_backup_scheduler()
+user_manager = CachedUser(db, query_cache, init_password_hasher())
+community_manager = CachedCommunity(db, query_cache)
+post_manager = CachedPost(db, query_cache)
 comment_manager = Comment(db)
 message_manager = Message(db)
+notification_manager = Notification(db)
+vote_manager = Vote(db, init_vote_buffer())
 
 # Inițializare session state
 if 'user' not in st.session_state:
@@ -58,7 +183,7 @@ def login_page():
         password = st.text_input("Parolă", type="password", key="login_password")
         
         if st.button("Conectează-te", key="login_btn"):
-            user = user_manager.authenticate(username, password)
+            user = data_access.run(data_access.users.authenticate(username, password))
             if user:
                 st.session_state.user = user
                 st.success("Conectare reușită!")
@@ -79,73 +204,256 @@ def login_page():
             elif len(new_password) < 6:
                 st.error("Parola trebuie să aibă cel puțin 6 caractere!")
             else:
-                if user_manager.create_user(new_username, new_email, new_password):
+                if data_access.run(data_access.users.create_user(new_username, new_email, new_password)):
                     st.success("Cont creat cu succes! Poți să te conectezi acum.")
                 else:
                     st.error("Numele de utilizator sau email-ul există deja!")
 
+# La ce interval își reîmprospătează bara laterală numărul de mesaje necitite
+SIDEBAR_REFRESH_SECONDS = 30
+
 def sidebar():
     with st.sidebar:
-        col1, col2 = st.columns([1, 3])
+        sidebar_content()
+
+# Fragment separat: se actualizează singur, fără să reia pagina; navigarea reia tot scriptul
+@fragment(run_every=SIDEBAR_REFRESH_SECONDS)
+def sidebar_content():
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        st.markdown(icon("flame", 24, "#FF4500"), unsafe_allow_html=True)
+    with col2:
+        st.title("Reddit Clone")
+    
+    if st.session_state.user:
+        st.write(f"Salut, **{st.session_state.user['username']}**!")
+        st.write(f"Karma: {st.session_state.user['karma']}")
+        
+        query = st.text_input("Caută", key="search_box", placeholder="Postări, comentarii, comunități")
+        if query and query != st.session_state.get('search_query'):
+            st.session_state.search_query = query
+            st.session_state.search_offset = 0
+            st.session_state.page = 'search'
+            st.rerun()
+        
+        col1, col2 = st.columns([1, 4])
         with col1:
-            st.markdown(icon("flame", 24, "#FF4500"), unsafe_allow_html=True)
+            st.markdown(icon("home", 16), unsafe_allow_html=True)
         with col2:
-            st.title("Reddit Clone")
+            if st.button("Feed", key="nav_feed"):
+                reset_feed()
+                st.session_state.page = 'feed'
+                st.rerun()
         
-        if st.session_state.user:
-            st.write(f"Salut, **{st.session_state.user['username']}**!")
-            st.write(f"Karma: {st.session_state.user['karma']}")
-            
-            col1, col2 = st.columns([1, 4])
-            with col1:
-                st.markdown(icon("home", 16), unsafe_allow_html=True)
-            with col2:
-                if st.button("Feed", key="nav_feed"):
-                    st.session_state.page = 'feed'
-                    st.rerun()
-            
-            col1, col2 = st.columns([1, 4])
-            with col1:
-                st.markdown(icon("users", 16), unsafe_allow_html=True)
-            with col2:
-                if st.button("Comunități", key="nav_communities"):
-                    st.session_state.page = 'communities'
-                    st.rerun()
-            
+        col1, col2 = st.columns([1, 4])
+        with col1:
+            st.markdown(icon("users", 16), unsafe_allow_html=True)
+        with col2:
+            if st.button("Comunități", key="nav_communities"):
+                st.session_state.page = 'communities'
+                st.rerun()
+        
+        col1, col2 = st.columns([1, 4])
+        with col1:
+            st.markdown(icon("plus", 16), unsafe_allow_html=True)
+        with col2:
+            if st.button("Postare nouă", key="nav_new_post"):
+                st.session_state.page = 'new_post'
+                st.rerun()
+        
+        col1, col2 = st.columns([1, 4])
+        with col1:
+            st.markdown(icon("user", 16), unsafe_allow_html=True)
+        with col2:
+            if st.button("Profil", key="nav_profile"):
+                st.session_state.page = 'profile'
+                st.rerun()
+        
+        col1, col2 = st.columns([1, 4])
+        with col1:
+            st.markdown(icon("message-circle", 16), unsafe_allow_html=True)
+        with col2:
+            unread = message_manager.count_unread(st.session_state.user['id'])
+            if st.button(f"Mesaje ({unread})" if unread else "Mesaje", key="nav_messages"):
+                st.session_state.page = 'messages'
+                st.rerun()
+        
+        col1, col2 = st.columns([1, 4])
+        with col1:
+            st.markdown(icon("bell", 16), unsafe_allow_html=True)
+        with col2:
+            # Contorul din users: o singură căutare după cheia primară
+            unread = notification_manager.count_unread(st.session_state.user['id'])
+            if st.button(f"Notificări ({unread})" if unread else "Notificări", key="nav_notifications"):
+                st.session_state.page = 'notifications'
+                st.rerun()
+        poll_notifications()
+        
+        if is_admin():
             col1, col2 = st.columns([1, 4])
             with col1:
-                st.markdown(icon("plus", 16), unsafe_allow_html=True)
+                st.markdown(icon("activity", 16), unsafe_allow_html=True)
             with col2:
-                if st.button("Postare nouă", key="nav_new_post"):
-                    st.session_state.page = 'new_post'
+                if st.button("Diagnostic", key="nav_diagnostics"):
+                    st.session_state.page = 'diagnostics'
                     st.rerun()
+        
+        trending = get_trending_communities(community_manager, trending_engine)
+        if trending:
+            st.caption("În trending")
+            for community in trending:
+                st.write(f"r/{community['name']}")
+        
+        st.divider()
+        
+        col1, col2 = st.columns([1, 4])
+        with col1:
+            st.markdown(icon("log-out", 16), unsafe_allow_html=True)
+        with col2:
+            if st.button("Deconectează-te", key="nav_logout"):
+                st.session_state.user = None
+                st.session_state.page = 'feed'
+                st.rerun()
+
+def is_admin():
+    user = st.session_state.user
+    return bool(user) and user['username'] in ADMIN_USERNAMES
+
+# Votul curent al utilizatorului, per tip de țintă, pentru pagina afișată
+VOTE_STATE_KEYS = {'post': 'feed_votes', 'comment': 'comment_votes'}
+
+def cast_vote(target_type, target, value, current):
+    try:
+        rate_limiter.check(st.session_state.user['id'], 'vote')
+    except RateLimitExceeded as error:
+        # Toast-ul rămâne vizibil și după reluarea fragmentului
+        st.toast(str(error), icon="⏳")
+        return
+    # Un al doilea click pe același buton retrage votul
+    new_value = 0 if current == value else value
+    up, down = vote_manager.vote(st.session_state.user['id'], target_type, target['id'], new_value)
+    target['upvotes'] += up
+    target['downvotes'] += down
+    # Scorul afișat se recalculează doar pentru ținta votată
+    PRESENTERS[target_type]([target])
+    st.session_state[VOTE_STATE_KEYS[target_type]][target['id']] = new_value
+
+# 'home' e feed-ul personal (comunitățile utilizatorului, cele mai noi primele)
+FEED_SORT_LABELS = {"Comunitățile mele": 'home', "Noi": 'new', "Populare": 'hot', "Top": 'top', "Controversate": 'controversial'}
+TOP_WINDOW_LABELS = {"Azi": 'day', "Săptămâna aceasta": 'week', "Luna aceasta": 'month', "Anul acesta": 'year', "Oricând": 'all'}
+
+def limited_write(awaitable):
+    """O scriere prin data_access; None (cu un toast) dacă utilizatorul a depășit limita pentru acțiune"""
+    try:
+        return data_access.run(awaitable)
+    except RateLimitExceeded as error:
+        st.toast(str(error), icon="⏳")
+        return None
+
+def reset_feed():
+    # Forțează reîncărcarea feed-ului de la prima pagină (după postare/ștergere)
+    st.session_state.pop('feed_posts', None)
+    st.session_state.pop('feed_cursor', None)
+
+def load_feed_page(sort, window, cursor=None):
+    """O pagină de postări, cu câmpurile de afișare completate o singură dată, la încărcare"""
+    if sort == 'home':
+        posts, cursor = post_manager.get_home_page(st.session_state.user['id'], cursor=cursor)
+    else:
+        posts, cursor = post_manager.get_feed_page(cursor=cursor, sort=sort, window=window)
+    return present_posts(posts), cursor
+
+def build_post_card_html(post):
+    html = f"""
+    <div style="margin-bottom: 8px;">
+        <span style="color: #0079d3; font-weight: bold;">r/{post['community']}</span>
+        <span style="color: #666; margin: 0 4px;">•</span>
+        <span style="color: #666;">Postat de u/{post['author']}</span>
+        <span style="color: #666; margin: 0 4px;">•</span>
+        <span style="color: #666; font-size: 12px;">{post['time_ago']}</span>
+    </div>
+    <h3 style='margin: 8px 0; color: #1a1a1b;'>{post['type_icon']} {post['title']}</h3>
+    """
+    if post['post_type'] == 'text':
+        html += f"<div style='margin: 12px 0; line-height: 1.5;'>{post['excerpt']}</div>"
+    elif post['post_type'] == 'link':
+        html += f"""
+        <div style="margin: 12px 0;">
+            {icon('external-link', 16)} 
+            <a href="{post['content']}" target="_blank" style="color: #0079d3; text-decoration: none;">Vezi link</a>
+        </div>
+        """
+    # Linia de deasupra acțiunilor
+    return html + "<div style='margin-top: 12px; border-top: 1px solid #f0f0f0;'></div>"
+
+def post_card_html(post):
+    # Versiunea acoperă tot ce apare în HTML; scorul se afișează separat, în coloana de voturi.
+    # time_ago e inclus: cardul se reconstruiește doar când textul relativ chiar se schimbă
+    version = hash((post['title'], post['content'], post['post_type'], post['community'], post['author'],
+                    post['time_ago']))
+    return render_cache.get_or_load(('post_card', post['id'], version), lambda: build_post_card_html(post),
+                                    tags=(f"post:{post['id']}",))
+
+def post_image(content: str):
+    if is_legacy(content):
+        # Postare de dinaintea MediaStore: fără variante, doar fișierul vechi, dacă a fost păstrat
+        path = media_store.legacy_path(content)
+        if path:
+            st.image(path, width=320)
+        else:
+            st.caption(f"🖼️ {content[len(LEGACY_PREFIX):]}")
+        return
+    # Doar miniatura: feed-ul nu trimite niciodată imaginea la rezoluția originală
+    thumbnail = media_store.read_variant(content, 'thumb')
+    if thumbnail:
+        st.image(thumbnail)
+    elif media_store.status(content) == 'failed':
+        st.caption("Imaginea nu a putut fi procesată.")
+    else:
+        st.caption("Imaginea se procesează...")
+
+@fragment
+def post_card(post):
+    # Un vot reia doar acest card; navigarea și ștergerea reiau toată pagina
+    my_vote = st.session_state.feed_votes.get(post['id'], 0)
+    
+    with st.container(border=True):
+        vote_col, content_col = st.columns([0.5, 9.5])
+        
+        with vote_col:
+            if st.button("⬆️", key=f"up_{post['id']}", help="Upvote", type="primary" if my_vote == 1 else "secondary"):
+                cast_vote('post', post, 1, my_vote)
+                rerun_fragment()
+            st.markdown(f"<div style='text-align: center; font-weight: bold; color: #666; margin: 4px 0;'>{post['score_label']}</div>", unsafe_allow_html=True)
+            if st.button("⬇️", key=f"down_{post['id']}", help="Downvote", type="primary" if my_vote == -1 else "secondary"):
+                cast_vote('post', post, -1, my_vote)
+                rerun_fragment()
+        
+        with content_col:
+            # Antetul, titlul și conținutul într-un singur element, din cache
+            st.markdown(post_card_html(post), unsafe_allow_html=True)
+            if post['post_type'] == 'image':
+                post_image(post['content'])
             
-            col1, col2 = st.columns([1, 4])
-            with col1:
-                st.markdown(icon("user", 16), unsafe_allow_html=True)
-            with col2:
-                if st.button("Profil", key="nav_profile"):
-                    st.session_state.page = 'profile'
-                    st.rerun()
+            action_col1, action_col2, action_col3 = st.columns([1, 2, 7])
             
-            col1, col2 = st.columns([1, 4])
-            with col1:
-                st.markdown(icon("message-circle", 16), unsafe_allow_html=True)
-            with col2:
-                if st.button("Mesaje", key="nav_messages"):
-                    st.session_state.page = 'messages'
+            with action_col1:
+                # Iconița comentarii ca link clickable
+                if st.button(icon('message-circle', 20), key=f"comment_icon_{post['id']}", help="Vezi comentarii"):
+                    st.session_state.selected_post = post['id']
+                    st.session_state.page = 'post_detail'
                     st.rerun()
             
-            st.divider()
-            
-            col1, col2 = st.columns([1, 4])
-            with col1:
-                st.markdown(icon("log-out", 16), unsafe_allow_html=True)
-            with col2:
-                if st.button("Deconectează-te", key="nav_logout"):
-                    st.session_state.user = None
-                    st.session_state.page = 'feed'
-                    st.rerun()
+            with action_col2:
+                if post['author_id'] == st.session_state.user['id']:
+                    if st.button("🗑️ Șterge", key=f"delete_{post['id']}", use_container_width=True):
+                        if data_access.run(data_access.posts.delete_post(post['id'], st.session_state.user['id'])):
+                            render_cache.invalidate_tag(f"post:{post['id']}")
+                            reset_feed()
+                            st.success("Postare ștearsă!")
+                            st.rerun()
+                        else:
+                            st.error("Eroare la ștergere!")
 
 def feed_page():
     col1, col2 = st.columns([1, 10])
@@ -154,91 +462,48 @@ def feed_page():
     with col2:
         st.title("Feed Principal")
     
-    posts = post_manager.get_feed_posts()
+    sort_col, window_col = st.columns([3, 1])
+    with sort_col:
+        sort_label = st.radio("Sortează după", list(FEED_SORT_LABELS), horizontal=True, key="feed_sort_label")
+    sort = FEED_SORT_LABELS[sort_label]
+    window = 'all'
+    if sort == 'top':
+        with window_col:
+            window = TOP_WINDOW_LABELS[st.selectbox("Perioadă", list(TOP_WINDOW_LABELS), key="feed_window_label")]
+    
+    # O altă sortare înseamnă un alt feed: pornim din nou de la prima pagină
+    if st.session_state.get('feed_view') != (sort, window):
+        reset_feed()
+        st.session_state.feed_view = (sort, window)
+    
+    # Paginile deja încărcate rămân în sesiune, gata formatate; la cerere aducem doar pagina următoare.
+    # Timpul relativ ("acum 3 ore") e cel de la încărcarea paginii, ca pe Reddit până la reîmprospătare
+    if 'feed_posts' not in st.session_state:
+        posts, cursor = load_feed_page(sort, window)
+        st.session_state.feed_posts = posts
+        st.session_state.feed_cursor = cursor
+    
+    posts = st.session_state.feed_posts
     
     if not posts:
-        st.info("Nu există postări încă. Fii primul care postează ceva!")
+        if sort == 'home':
+            st.info("Feed-ul tău e gol. Alătură-te unor comunități ca să vezi postările lor aici!")
+        else:
+            st.info("Nu există postări încă. Fii primul care postează ceva!")
         return
     
+    # Voturile stau în sesiune: un fragment reluat nu mai primește argumente noi
+    st.session_state.feed_votes = vote_manager.get_user_votes(st.session_state.user['id'], 'post', [p['id'] for p in posts])
+    
     for post in posts:
-        # Card container cu styling
-        st.markdown("""
-        <div style="
-            background: white;
-            border: 1px solid #e0e0e0;
-            border-radius: 8px;
-            padding: 16px;
-            margin-bottom: 16px;
-            box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-        ">
-        """, unsafe_allow_html=True)
-        
-        with st.container():
-            # Layout principal: votes + content
-            vote_col, content_col = st.columns([0.5, 9.5])
-            
-            # Coloana de voturi
-            with vote_col:
-                st.markdown("<div style='text-align: center; padding: 8px;'>", unsafe_allow_html=True)
-                if st.button("⬆️", key=f"up_{post['id']}", help="Upvote"):
-                    pass
-                st.markdown(f"<div style='text-align: center; font-weight: bold; color: #666; margin: 4px 0;'>{post['upvotes'] - post['downvotes']}</div>", unsafe_allow_html=True)
-                if st.button("⬇️", key=f"down_{post['id']}", help="Downvote"):
-                    pass
-                st.markdown("</div>", unsafe_allow_html=True)
-            
-            # Coloana de conținut
-            with content_col:
-                # Header cu meta info
-                st.markdown(f"""
-                <div style="margin-bottom: 8px;">
-                    <span style="color: #0079d3; font-weight: bold;">r/{post['community']}</span>
-                    <span style="color: #666; margin: 0 4px;">•</span>
-                    <span style="color: #666;">Postat de u/{post['author']}</span>
-                    <span style="color: #666; margin: 0 4px;">•</span>
-                    <span style="color: #666; font-size: 12px;">{post['created_at']}</span>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Titlul postării
-                st.markdown(f"<h3 style='margin: 8px 0; color: #1a1a1b;'>{post['title']}</h3>", unsafe_allow_html=True)
-                
-                # Conținutul postării
-                if post['post_type'] == 'text':
-                    st.markdown(f"<div style='margin: 12px 0; line-height: 1.5;'>{post['content']}</div>", unsafe_allow_html=True)
-                elif post['post_type'] == 'link':
-                    st.markdown(f"""
-                    <div style="margin: 12px 0;">
-                        {icon('external-link', 16)} 
-                        <a href="{post['content']}" target="_blank" style="color: #0079d3; text-decoration: none;">Vezi link</a>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                # Footer cu acțiuni
-                st.markdown("<div style='margin-top: 12px; padding-top: 8px; border-top: 1px solid #f0f0f0;'>", unsafe_allow_html=True)
-                
-                action_col1, action_col2, action_col3 = st.columns([1, 2, 7])
-                
-                with action_col1:
-                    # Iconița comentarii ca link clickable
-                    comment_key = f"comment_icon_{post['id']}"
-                    if st.button(f"{icon('message-circle', 20)}", key=comment_key, help="Vezi comentarii"):
-                        st.session_state.selected_post = post['id']
-                        st.session_state.page = 'post_detail'
-                        st.rerun()
-                
-                with action_col2:
-                    if post['author_id'] == st.session_state.user['id']:
-                        if st.button("🗑️ Șterge", key=f"delete_{post['id']}", use_container_width=True):
-                            if post_manager.delete_post(post['id'], st.session_state.user['id']):
-                                st.success("Postare ștearsă!")
-                                st.rerun()
-                            else:
-                                st.error("Eroare la ștergere!")
-                
-                st.markdown("</div>", unsafe_allow_html=True)
-        
-        st.markdown("</div>", unsafe_allow_html=True)
+        post_card(post)
+    
+    if st.session_state.feed_cursor:
+        if st.button("Încarcă mai multe", key="feed_more", use_container_width=True):
+            next_posts, cursor = load_feed_page(sort, window, st.session_state.feed_cursor)
+            st.session_state.feed_posts = posts + next_posts
+            st.session_state.feed_cursor = cursor
+            st.rerun()
 
 def communities_page():
     col1, col2 = st.columns([1, 10])
@@ -251,6 +516,8 @@ def communities_page():
     
     with tab1:
         communities = community_manager.get_all_communities()
+        user_id = st.session_state.user['id']
+        joined = community_manager.get_member_communities(user_id)
         
         for community in communities:
             with st.container():
@@ -262,7 +529,15 @@ def communities_page():
                     st.write(f"{community['members_count']} membri")
                 
                 with col2:
-                    st.button("Alătură-te", key=f"join_{community['id']}")
+                    if community['id'] in joined:
+                        if st.button("Părăsește", key=f"leave_{community['id']}"):
+                            data_access.run(data_access.communities.leave_community(user_id, community['id']))
+                            reset_feed()
+                            st.rerun()
+                    elif st.button("Alătură-te", key=f"join_{community['id']}"):
+                        data_access.run(data_access.communities.join_community(user_id, community['id']))
+                        reset_feed()
+                        st.rerun()
                 
                 st.divider()
     
@@ -273,10 +548,11 @@ def communities_page():
         
         if st.button("Creează comunitatea"):
             if name and description:
-                if community_manager.create_community(name, description, st.session_state.user['id']):
+                created = limited_write(data_access.communities.create_community(name, description, st.session_state.user['id']))
+                if created:
                     st.success("Comunitate creată cu succes!")
                     st.rerun()
-                else:
+                elif created is False:
                     st.error("Numele comunității există deja!")
             else:
                 st.error("Completează toate câmpurile!")
@@ -301,19 +577,76 @@ def new_post_page():
         content = st.text_input("URL-ul link-ului")
     else:
         content = st.file_uploader("Încarcă imaginea", type=['png', 'jpg', 'jpeg'])
-        if content:
-            content = f"image_{content.name}"
     
     if st.button("Publică postarea"):
         if title and content and selected_community:
             community_id = community_options[selected_community]
-            if post_manager.create_post(title, str(content), post_type, st.session_state.user['id'], community_id):
+            if post_type == "image":
+                # Conținutul postării e hash-ul imaginii; aceeași imagine încărcată din nou nu mai ocupă loc
+                try:
+                    # Fișierul se scrie pe disc în firul sesiunii; doar rândul din media trece prin scriitor
+                    content = data_access.run(data_access.write(media_store.register, *media_store.save_file(content)))
+                except ValueError as error:
+                    st.error(str(error))
+                    return
+            if limited_write(data_access.posts.create_post(title, str(content), post_type, st.session_state.user['id'], community_id)):
+                reset_feed()
                 st.success("Postare publicată cu succes!")
                 st.session_state.page = 'feed'
                 st.rerun()
         else:
             st.error("Completează toate câmpurile!")
 
+# Câte niveluri și câte comentarii încărcăm inițial dintr-un thread
+COMMENT_DEPTH = 3
+COMMENT_PAGE_SIZE = 100
+
+def load_thread(post_id):
+    rows, cursor = comment_manager.get_thread_page(post_id, max_depth=COMMENT_DEPTH, limit=COMMENT_PAGE_SIZE)
+    # Formatate o singură dată, la încărcare, ca paginile din feed
+    st.session_state.thread = {'post_id': post_id, 'rows': present_comments(rows), 'cursor': cursor}
+
+def merge_thread_rows(new_rows):
+    # Rândurile noi (altă pagină sau un subarbore) se adaugă o singură dată, păstrând preordinea
+    thread = st.session_state.thread
+    loaded = {row['id'] for row in thread['rows']}
+    thread['rows'] = sorted(
+        thread['rows'] + present_comments([row for row in new_rows if row['id'] not in loaded]),
+        key=lambda row: row['path']
+    )
+
+@fragment
+def comment_card(comment, post_id, indent):
+    # Votul și deschiderea formularului de răspuns reiau doar acest comentariu
+    st.write(f"{indent}**{comment['author']}** • {comment['score_label']} puncte • {comment['time_ago']}")
+    st.write(f"{indent}{comment['content']}")
+    
+    my_vote = st.session_state.comment_votes.get(comment['id'], 0)
+    col1, col2, col3 = st.columns([1, 1, 8])
+    with col1:
+        if st.button("⬆️", key=f"up_comment_{comment['id']}", type="primary" if my_vote == 1 else "secondary"):
+            cast_vote('comment', comment, 1, my_vote)
+            rerun_fragment()
+    with col2:
+        if st.button("⬇️", key=f"down_comment_{comment['id']}", type="primary" if my_vote == -1 else "secondary"):
+            cast_vote('comment', comment, -1, my_vote)
+            rerun_fragment()
+    with col3:
+        if st.button("Răspunde", key=f"reply_{comment['id']}"):
+            st.session_state.replying_to = comment['id']
+    
+    if st.session_state.get('replying_to') == comment['id']:
+        reply_text = st.text_input(f"Răspuns la {comment['author']}", key=f"reply_text_{comment['id']}")
+        if st.button("Trimite răspuns", key=f"send_reply_{comment['id']}") and reply_text:
+            # None: limită depășită (toast-ul spune cât mai e); False: comentariul sau postarea au fost șterse
+            if limited_write(data_access.comments.create_comment(reply_text, st.session_state.user['id'], post_id, comment['id'])):
+                st.session_state.replying_to = None
+                # Răspunsul nou schimbă arborele: se reia toată pagina
+                merge_thread_rows(comment_manager.get_comment_subtree(comment['id'], max_depth=1))
+                st.rerun()
+            else:
+                st.error("Răspunsul nu a fost salvat!")
+
 def post_detail_page():
     if 'selected_post' not in st.session_state:
         st.session_state.page = 'feed'
@@ -321,7 +654,11 @@ def post_detail_page():
         return
     
     post_id = st.session_state.selected_post
-    comments = comment_manager.get_post_comments(post_id)
+    if st.session_state.get('thread', {}).get('post_id') != post_id:
+        load_thread(post_id)
+    thread = st.session_state.thread
+    comments = build_comment_tree(thread['rows'])
+    st.session_state.comment_votes = vote_manager.get_user_votes(st.session_state.user['id'], 'comment', [c['id'] for c in thread['rows']])
     
     col1, col2 = st.columns([1, 10])
     with col1:
@@ -331,47 +668,118 @@ def post_detail_page():
     
     # Formular pentru comentariu nou
     new_comment = st.text_area("Adaugă un comentariu")
-    if st.button("Postează comentariul"):
-        if new_comment:
-            comment_manager.create_comment(new_comment, st.session_state.user['id'], post_id)
+    if st.button("Postează comentariul") and new_comment:
+        if limited_write(data_access.comments.create_comment(new_comment, st.session_state.user['id'], post_id)):
+            load_thread(post_id)
             st.success("Comentariu adăugat!")
             st.rerun()
+        else:
+            st.error("Comentariul nu a fost salvat!")
     
     st.divider()
     
-    # Afișare comentarii
-    def display_comments(comments, parent_id=None, level=0):
+    # Afișare comentarii: o singură parcurgere a arborelui deja construit
+    def display_comments(comments, level=0):
         for comment in comments:
-            if comment['parent_id'] == parent_id:
-                with st.container():
-                    # Indentare pentru thread-uri
-                    indent = "    " * level
-                    st.write(f"{indent}**{comment['author']}** • {comment['created_at']}")
-                    st.write(f"{indent}{comment['content']}")
-                    
-                    col1, col2, col3 = st.columns([1, 1, 8])
-                    with col1:
-                        st.button("⬆️", key=f"up_comment_{comment['id']}")
-                    with col2:
-                        st.button("⬇️", key=f"down_comment_{comment['id']}")
-                    with col3:
-                        if st.button("Răspunde", key=f"reply_{comment['id']}"):
-                            reply_text = st.text_input(f"Răspuns la {comment['author']}", key=f"reply_text_{comment['id']}")
-                            if st.button("Trimite răspuns", key=f"send_reply_{comment['id']}"):
-                                if reply_text:
-                                    comment_manager.create_comment(reply_text, st.session_state.user['id'], post_id, comment['id'])
-                                    st.rerun()
-                    
-                    # Afișare răspunsuri recursive
-                    display_comments(comments, comment['id'], level + 1)
-                    st.divider()
+            with st.container():
+                # Indentare pentru thread-uri
+                indent = "    " * level
+                comment_card(comment, post_id, indent)
+                
+                # Răspunsurile care nu au fost încă încărcate se aduc la cerere
+                hidden = comment['reply_count'] - len(comment['children'])
+                if hidden > 0:
+                    label = "1 răspuns" if hidden == 1 else f"{hidden} răspunsuri"
+                    if st.button(f"{indent}↳ Vezi încă {label}", key=f"more_replies_{comment['id']}"):
+                        merge_thread_rows(comment_manager.get_comment_subtree(comment['id'], max_depth=COMMENT_DEPTH))
+                        st.rerun()
+                
+                # Afișare răspunsuri recursive
+                display_comments(comment['children'], level + 1)
+                st.divider()
     
     display_comments(comments)
     
+    if thread['cursor']:
+        if st.button("Încarcă mai multe comentarii", key="thread_more"):
+            rows, cursor = comment_manager.get_thread_page(
+                post_id, max_depth=COMMENT_DEPTH, limit=COMMENT_PAGE_SIZE, cursor=thread['cursor']
+            )
+            merge_thread_rows(rows)
+            thread['cursor'] = cursor
+            st.rerun()
+    
     if st.button("← Înapoi la feed"):
         st.session_state.page = 'feed'
         st.rerun()
 
+SEARCH_PAGE_SIZE = 10
+
+def search_page():
+    col1, col2 = st.columns([1, 10])
+    with col1:
+        st.markdown(icon("search", 24), unsafe_allow_html=True)
+    with col2:
+        st.title("Căutare")
+    
+    query = st.session_state.get('search_query', '')
+    offset = st.session_state.get('search_offset', 0)
+    st.write(f"Rezultate pentru **{query}**")
+    
+    # Cerem un rezultat în plus ca să știm dacă există o pagină următoare; cele trei căutări rulează în paralel
+    results = data_access.load(
+        posts=data_access.search.search_posts(query, SEARCH_PAGE_SIZE + 1, offset),
+        comments=data_access.search.search_comments(query, SEARCH_PAGE_SIZE + 1, offset),
+        communities=data_access.search.search_communities(query, SEARCH_PAGE_SIZE + 1, offset),
+    )
+    posts, comments, communities = results['posts'], results['comments'], results['communities']
+    has_more = any(len(results) > SEARCH_PAGE_SIZE for results in (posts, comments, communities))
+    
+    tab1, tab2, tab3 = st.tabs(["Postări", "Comentarii", "Comunități"])
+    
+    with tab1:
+        if not posts:
+            st.info("Nicio postare găsită.")
+        for post in posts[:SEARCH_PAGE_SIZE]:
+            st.markdown(f"**{post['title']}** · r/{post['community']} · u/{post['author']}")
+            st.markdown(post['snippet'])
+            if st.button("Vezi comentarii", key=f"search_post_{post['id']}"):
+                st.session_state.selected_post = post['id']
+                st.session_state.page = 'post_detail'
+                st.rerun()
+            st.divider()
+    
+    with tab2:
+        if not comments:
+            st.info("Niciun comentariu găsit.")
+        for comment in comments[:SEARCH_PAGE_SIZE]:
+            st.markdown(f"**{comment['author']}** în *{comment['post_title']}*")
+            st.markdown(comment['snippet'])
+            if st.button("Vezi discuția", key=f"search_comment_{comment['id']}"):
+                st.session_state.selected_post = comment['post_id']
+                st.session_state.page = 'post_detail'
+                st.rerun()
+            st.divider()
+    
+    with tab3:
+        if not communities:
+            st.info("Nicio comunitate găsită.")
+        for community in communities[:SEARCH_PAGE_SIZE]:
+            st.subheader(f"r/{community['name']}")
+            st.write(community['description'])
+            st.write(f"{community['members_count']} membri")
+            st.divider()
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if offset > 0 and st.button("← Pagina anterioară", key="search_prev"):
+            st.session_state.search_offset = max(0, offset - SEARCH_PAGE_SIZE)
+            st.rerun()
+    with col2:
+        if has_more and st.button("Pagina următoare →", key="search_next"):
+            st.session_state.search_offset = offset + SEARCH_PAGE_SIZE
+            st.rerun()
+
 def profile_page():
     col1, col2 = st.columns([1, 10])
     with col1:
@@ -387,7 +795,9 @@ def profile_page():
         st.subheader("Informații profil")
         st.write(f"**Nume utilizator:** {user['username']}")
         st.write(f"**Email:** {user['email']}")
-        st.write(f"**Karma:** {user['karma']}")
+        stats = get_user_stats(db, user['id']) or {'karma': user['karma'], 'posts': 0, 'comments': 0}
+        st.write(f"**Karma:** {stats['karma']}")
+        st.write(f"**Postări:** {stats['posts']} · **Comentarii:** {stats['comments']}")
     
     with col2:
         st.subheader("Editează profilul")
@@ -397,6 +807,9 @@ def profile_page():
             # Aici ar trebui să actualizezi bio-ul în baza de date
             st.success("Profil actualizat!")
 
+INBOX_PAGE_SIZE = 20
+CONVERSATION_PAGE_SIZE = 30
+
 def messages_page():
     col1, col2 = st.columns([1, 10])
     with col1:
@@ -404,21 +817,34 @@ def messages_page():
     with col2:
         st.title("Mesaje private")
     
-    tab1, tab2 = st.tabs(["Mesajele mele", "Trimite mesaj"])
+    user_id = st.session_state.user['id']
+    tab1, tab2 = st.tabs(["Conversații", "Mesaj nou"])
     
     with tab1:
-        messages = message_manager.get_user_messages(st.session_state.user['id'])
+        # Doar rândurile din conversations: costul nu depinde de câte mesaje are utilizatorul
+        first_page, head = message_manager.get_inbox(user_id, INBOX_PAGE_SIZE)
+        conversations, inbox_cursor = with_older_pages('inbox', first_page, head)
+        if not conversations:
+            st.info("Nu ai încă nicio conversație.")
         
-        for message in messages:
-            with st.container():
-                if message['sender'] == st.session_state.user['username']:
-                    st.write(f"**Tu** → **{message['receiver']}**")
-                else:
-                    st.write(f"**{message['sender']}** → **Tu**")
-                
-                st.write(message['content'])
-                st.write(f"*{message['created_at']}*")
-                st.divider()
+        inbox_col, thread_col = st.columns([1, 2])
+        with inbox_col:
+            for conversation in conversations:
+                unread = f" ({conversation['unread']})" if conversation['unread'] else ""
+                if st.button(f"{conversation['other_username']}{unread}", key=f"conv_{conversation['id']}",
+                             use_container_width=True):
+                    st.session_state.conversation_with = conversation['other_id']
+                    st.session_state.pop('conversation_older', None)
+                    st.rerun()
+                st.caption(f"{conversation['last_message']} · {conversation['last_activity']}")
+            if inbox_cursor and st.button("Mai multe conversații", key="inbox_more"):
+                append_older_page('inbox', head, *message_manager.get_inbox(user_id, INBOX_PAGE_SIZE, inbox_cursor))
+                st.rerun()
+        
+        with thread_col:
+            selected = next((c for c in conversations if c['other_id'] == st.session_state.get('conversation_with')), None)
+            if selected:
+                conversation_view(selected)
     
     with tab2:
         receiver_username = st.text_input("Destinatar (nume utilizator)")
@@ -426,12 +852,189 @@ def messages_page():
         
         if st.button("Trimite mesajul"):
             if receiver_username and message_content:
-                # Aici ar trebui să găsești ID-ul utilizatorului destinatar
-                # Pentru simplitate, presupunem că funcționează
-                st.success("Mesaj trimis!")
+                receiver = user_manager.get_user_by_username(receiver_username)
+                if receiver:
+                    if not limited_write(data_access.messages.send_message(user_id, receiver['id'], message_content)):
+                        st.error("Mesajul nu a fost trimis!")
+                        return
+                    st.session_state.conversation_with = receiver['id']
+                    st.success("Mesaj trimis!")
+                    st.rerun()
+                else:
+                    st.error("Utilizatorul nu există!")
             else:
                 st.error("Completează toate câmpurile!")
 
+def with_older_pages(key, first_page, head):
+    """Prima pagină, recitită la fiecare rulare, urmată de paginile mai vechi încărcate în sesiune, și cursorul următor"""
+    older = st.session_state.get(f'{key}_older')
+    if older is None or older['head'] != head:
+        # Activitatea nouă a mutat limita primei pagini: cursorul păstrat ar sări rânduri
+        st.session_state.pop(f'{key}_older', None)
+        return first_page, head
+    return first_page + older['rows'], older['cursor']
+
+def append_older_page(key, head, rows, cursor):
+    # Doar pagina nouă e citită; cele deja afișate rămân în sesiune
+    older = st.session_state.setdefault(f'{key}_older', {'head': head, 'rows': [], 'cursor': None})
+    older['rows'] = older['rows'] + rows
+    older['cursor'] = cursor
+
+def conversation_view(conversation):
+    user_id = st.session_state.user['id']
+    if conversation['unread']:
+        data_access.run(data_access.messages.mark_conversation_read(conversation['id'], user_id))
+    
+    st.subheader(conversation['other_username'])
+    first_page, head = message_manager.get_conversation_page(conversation['id'], user_id, CONVERSATION_PAGE_SIZE)
+    messages, older = with_older_pages('conversation', first_page, head)
+    if older and st.button("Mesaje mai vechi", key="conversation_older"):
+        append_older_page('conversation', head, *message_manager.get_conversation_page(
+            conversation['id'], user_id, CONVERSATION_PAGE_SIZE, older))
+        st.rerun()
+    
+    # Pagina vine de la cel mai nou mesaj; afișăm cronologic
+    for message in reversed(messages):
+        author = "Tu" if message['sender_id'] == user_id else message['sender']
+        st.write(f"**{author}**: {message['content']}")
+        st.caption(message['created_at'])
+    
+    reply = st.text_input("Răspunde", key=f"reply_to_{conversation['id']}")
+    if st.button("Trimite", key="conversation_send") and reply:
+        if limited_write(data_access.messages.send_message(user_id, conversation['other_id'], reply)):
+            st.rerun()
+        else:
+            st.error("Mesajul nu a fost trimis!")
+
+NOTIFICATION_LABELS = {'reply': "a răspuns", 'message': "ți-a scris", 'vote': "a votat"}
+
+def notification_summary(notification):
+    actor = notification['actor'] or "cineva"
+    others = notification['count'] - 1
+    if others > 0:
+        actor += f" și încă {others}"
+    return f"**{actor}** {NOTIFICATION_LABELS.get(notification['kind'], '')}: {notification['text']}"
+
+def poll_notifications():
+    # Doar ce a apărut după cursor; la prima rulare din sesiune nu repetăm notificările vechi ca toast
+    cursor = st.session_state.get('notification_cursor')
+    new, st.session_state.notification_cursor = notification_manager.since(st.session_state.user['id'], cursor)
+    if cursor:
+        for notification in new:
+            st.toast(notification_summary(notification), icon="🔔")
+
+def open_notification(notification):
+    data_access.run(data_access.notifications.mark_read(st.session_state.user['id'], [notification['id']]))
+    if notification['target_type'] == 'post':
+        st.session_state.selected_post = notification['target_id']
+        st.session_state.page = 'post_detail'
+    elif notification['target_type'] == 'conversation':
+        st.session_state.page = 'messages'
+    st.rerun()
+
+def notifications_page():
+    col1, col2 = st.columns([1, 10])
+    with col1:
+        st.markdown(icon("bell", 24), unsafe_allow_html=True)
+    with col2:
+        st.title("Notificări")
+    
+    user_id = st.session_state.user['id']
+    if notification_manager.count_unread(user_id):
+        if st.button("Marchează toate ca citite", key="notifications_read_all"):
+            data_access.run(data_access.notifications.mark_read(user_id))
+            st.rerun()
+    
+    notifications = notification_manager.get_recent(user_id)
+    if not notifications:
+        st.info("Nu ai notificări.")
+    
+    for notification in notifications:
+        text_col, action_col = st.columns([5, 1])
+        with text_col:
+            marker = "" if notification['read'] else "🔵 "
+            st.markdown(marker + notification_summary(notification))
+            st.caption(notification['created_at'])
+        with action_col:
+            if notification['target_type'] != 'comment':
+                if st.button("Deschide", key=f"notification_{notification['id']}"):
+                    open_notification(notification)
+
+DIAGNOSTICS_TOP = 25
+
+def diagnostics_page():
+    col1, col2 = st.columns([1, 10])
+    with col1:
+        st.markdown(icon("activity", 24), unsafe_allow_html=True)
+    with col2:
+        st.title("Diagnostic SQL")
+    
+    tracer = db.tracer
+    tracer.enabled = st.checkbox("Înregistrează interogările", value=tracer.enabled,
+                                 help=f"Apelanții sunt căutați pentru 1 din {tracer.sample_every} "
+                                      "instrucțiuni și pentru cele lente")
+    if not tracer.enabled:
+        st.info("Înregistrarea e oprită; statisticile de mai jos sunt cele adunate până la oprire.")
+    statements = tracer.stats()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Instrucțiuni distincte", len(statements))
+    col2.metric("Execuții", sum(entry['calls'] for entry in statements))
+    col3.metric("Timp total (ms)", f"{sum(entry['total_ms'] for entry in statements):,.1f}")
+    
+    st.subheader("Top instrucțiuni după timpul total")
+    st.dataframe([
+        {
+            'SQL': entry['sql'],
+            'Apeluri': entry['calls'],
+            'Total (ms)': round(entry['total_ms'], 2),
+            'Medie (ms)': round(entry['mean_ms'], 3),
+            'Maxim (ms)': round(entry['max_ms'], 2),
+            'Rânduri': entry['rows'],
+            'Apelată din (eșantion)': ", ".join(f"{caller} ({count})" for caller, count in entry['callers']),
+        }
+        for entry in statements[:DIAGNOSTICS_TOP]
+    ], use_container_width=True)
+    
+    st.subheader(f"Interogări lente (peste {tracer.slow_ms:g} ms)")
+    slow = tracer.slow_queries()
+    if not slow:
+        st.info("Nicio interogare lentă înregistrată.")
+    for query in slow:
+        with st.expander(f"{query['elapsed_ms']:.1f} ms · {query['caller']} · {query['at']}"):
+            st.code(query['sql'], language="sql")
+            st.write(f"Parametri: `{query['params']}` · {query['rows']} rânduri")
+            if query['plan']:
+                st.code(query['plan'], language="text")
+    
+    st.subheader("Limitarea scrierilor")
+    limits, gate = rate_limiter.metrics(), init_writer_gate().metrics()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Refuzate (limită)", f"{sum(limits['denied'].values()):,}")
+    col2.metric("Găleți urmărite", f"{limits['tracked_keys']:,}")
+    col3.metric("Scrieri puse la coadă", f"{gate['queued']:,}", help=f"maxim {gate['max_waiting']} în așteptare")
+    col4.metric("Așteptare max (ms)", f"{gate['max_wait_ms']:,.1f}", help=f"{gate['timeouts']} expirate")
+    if limits['denied']:
+        st.dataframe([{'Acțiune': action, 'Refuzuri': count} for action, count in limits['denied'].items()],
+                     use_container_width=True)
+    
+    if backup_scheduler is not None:
+        st.subheader("Backup")
+        if backup_scheduler.last_error:
+            st.error(f"Ultimul snapshot a eșuat: {backup_scheduler.last_error}")
+        elif backup_scheduler.last_report:
+            st.write(describe(backup_scheduler.last_report))
+        else:
+            st.info(f"Primul snapshot după {backup_scheduler.interval:g} s.")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("Descarcă JSON", json.dumps(tracer.export(), indent=2, ensure_ascii=False),
+                           file_name="sql_stats.json", mime="application/json")
+    with col2:
+        if st.button("Resetează statisticile"):
+            tracer.reset()
+            st.rerun()
+
 def main():
     if st.session_state.user is None:
         login_page()
@@ -448,8 +1051,14 @@ def main():
             post_detail_page()
         elif st.session_state.page == 'profile':
             profile_page()
+        elif st.session_state.page == 'notifications':
+            notifications_page()
         elif st.session_state.page == 'messages':
             messages_page()
+        elif st.session_state.page == 'search':
+            search_page()
+        elif st.session_state.page == 'diagnostics' and is_admin():
+            diagnostics_page()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,324 @@
+"""Snapshot-uri online ale bazei de date, fără să oprim scriitorii.
+
+Copierea fișierului cât aplicația rulează dă fie o copie ruptă (pagini din
+tranzacții diferite), fie, dacă ținem lock-ul de scriere pe durata copierii,
+scriitori blocați secunde întregi. Aici copia se face cu API-ul de backup
+SQLite (Connection.backup), câte pages_per_step pagini, cu o pauză între
+pași. Conexiunea sursă ține deschisă o tranzacție de citire pe toată durata:
+în modul WAL cititorii nu blochează scriitorii, iar backup-ul vede o singură
+versiune a bazei, deci nu o ia de la capăt când cineva scrie între pași.
+Prețul: checkpoint-ul nu poate trece de acea versiune, WAL-ul crește până la
+finalul copierii.
+
+Fiecare snapshot e verificat (PRAGMA integrity_check) înainte să apară sub
+numele final, care are precizie de microsecunde și nu înlocuiește niciodată
+un snapshot existent. Un fișier .json alăturat păstrează raportul: durata,
+pașii, integritatea și blocarea scriitorilor (stall): cât au așteptat lock-ul
+tranzacțiile de scriere ale procesului (Database.write_waits) cât a durat
+copierea. Măsurarea e pasivă, deci prinde doar scriitorii din același proces:
+BackupScheduler pornit în aplicație (REDDIT_CLONE_BACKUP_EVERY) îi vede pe
+toți, comanda `snapshot` rulată separat nu vede niciunul. Cu
+probe_writers=True (benchmarks/bench_backup.py), un fir care încearcă
+periodic BEGIN IMMEDIATE măsoară și scriitorii din alte procese; sonda e ea
+însăși un scriitor, deci nu rulează la backup-urile obișnuite.
+
+Rulare:
+    python backup.py snapshot [--db reddit_clone.db --dir backups --keep 7]
+    python backup.py list
+    python backup.py verify backups/reddit_clone-20261018T120000123456Z.db
+    python backup.py restore backups/reddit_clone-20261018T120000123456Z.db
+    python backup.py schedule --every 3600
+"""
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+
+from database import Database
+
+PAGES_PER_STEP = 256
+STEP_SLEEP_MS = 5
+PROBE_INTERVAL_MS = 10
+DEFAULT_KEEP = 7
+# Sortabil lexicografic: ordinea numelor e ordinea cronologică; cu microsecunde, ca un restore
+# (care face întâi un snapshot) să nu ajungă pe numele snapshot-ului restaurat
+TIMESTAMP_FORMAT = '%Y%m%dT%H%M%S%fZ'
+
+
+class StallReport(NamedTuple):
+    # Tranzacțiile de scriere (sau sondele) măsurate în timpul copierii
+    writes: int
+    p50_ms: float
+    p99_ms: float
+    max_ms: float
+    # 'transactions' (Database.write_waits) sau 'probe' (WriterProbe)
+    source: str
+
+
+def stall_report(waits: List[float], source: str) -> StallReport:
+    waits = sorted(waits)
+    if not waits:
+        return StallReport(0, 0.0, 0.0, 0.0, source)
+    return StallReport(len(waits), round(waits[len(waits) // 2], 3),
+                       round(waits[min(len(waits) - 1, int(len(waits) * 0.99))], 3), round(waits[-1], 3), source)
+
+
+class WriterProbe:
+    """Cât așteaptă un scriitor lock-ul: BEGIN IMMEDIATE + ROLLBACK la fiecare interval_ms, pe un fir separat"""
+
+    def __init__(self, db_path: str, interval_ms: int = PROBE_INTERVAL_MS, busy_timeout: float = 5.0):
+        self._conn = sqlite3.connect(db_path, timeout=busy_timeout, check_same_thread=False, isolation_level=None)
+        self.interval = interval_ms / 1000
+        self.waits: List[float] = []
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="backup-probe", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            start = time.perf_counter()
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._conn.execute("ROLLBACK")
+            except sqlite3.OperationalError:
+                # busy_timeout depășit: așteptarea măsurată e chiar timeout-ul
+                pass
+            self.waits.append((time.perf_counter() - start) * 1000)
+
+    def stop(self) -> StallReport:
+        self._stopped.set()
+        self._thread.join()
+        self._conn.close()
+        return stall_report(self.waits, 'probe')
+
+
+def integrity_check(path: str, quick: bool = False) -> str:
+    """'ok' sau problemele raportate de SQLite; quick_check sare peste verificarea indexurilor"""
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute("PRAGMA quick_check" if quick else "PRAGMA integrity_check").fetchall()
+    except sqlite3.DatabaseError as error:
+        # Fișierul nu e deloc o bază SQLite
+        return str(error)
+    finally:
+        conn.close()
+    return "; ".join(row[0] for row in rows)
+
+
+def _write_json(path: str, data: Dict):
+    partial = path + '.partial'
+    with open(partial, 'w', encoding='utf-8') as out:
+        json.dump(data, out, indent=2, ensure_ascii=False)
+    os.replace(partial, path)
+
+
+def _publish(partial: str, path: str):
+    """Mută partial la path, fără să înlocuiască un fișier existent (os.replace l-ar suprascrie în tăcere)"""
+    # link eșuează cu FileExistsError dacă path există; pe Windows, os.rename face la fel
+    if os.name == 'nt':
+        os.rename(partial, path)
+    else:
+        os.link(partial, path)
+        os.remove(partial)
+
+
+class BackupService:
+    """Snapshot-uri în `directory`, păstrând cele mai noi `keep`"""
+
+    def __init__(self, db: Database, directory: str = "backups", keep: int = DEFAULT_KEEP,
+                 pages_per_step: int = PAGES_PER_STEP, sleep_ms: int = STEP_SLEEP_MS, probe_writers: bool = False):
+        self.db = db
+        self.probe_writers = probe_writers
+        self.directory = directory
+        self.keep = keep
+        self.pages_per_step = pages_per_step
+        self.sleep = sleep_ms / 1000
+        self.stem = os.path.splitext(os.path.basename(db.db_path))[0]
+
+    def snapshot(self, quick: bool = False, prune: bool = True) -> Dict:
+        """Copiază baza în pași mici, o verifică și o publică; întoarce raportul scris în manifest"""
+        os.makedirs(self.directory, exist_ok=True)
+        created_at = datetime.utcnow()
+        path = os.path.join(self.directory, f"{self.stem}-{created_at.strftime(TIMESTAMP_FORMAT)}.db")
+        if os.path.exists(path):
+            raise FileExistsError(f"snapshot-ul {path} există deja")
+        partial = path + '.partial'
+        if os.path.exists(partial):
+            os.remove(partial)
+
+        source = sqlite3.connect(self.db.db_path, timeout=self.db.busy_timeout, isolation_level=None)
+        target = sqlite3.connect(partial, isolation_level=None)
+        probe = WriterProbe(self.db.db_path, busy_timeout=self.db.busy_timeout) if self.probe_writers else None
+        steps = 0
+
+        def progress(status, remaining, total):
+            nonlocal steps
+            steps += 1
+            if remaining:
+                # Connection.backup doarme doar pe BUSY/LOCKED; pauza dintre pași o facem aici, fără GIL
+                time.sleep(self.sleep)
+
+        start = time.perf_counter()
+        try:
+            # Tranzacția de citire fixează versiunea copiată (vezi docstring-ul modulului)
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            pages = source.execute("PRAGMA page_count").fetchone()[0]
+            source.backup(target, pages=self.pages_per_step, progress=progress)
+            source.execute("COMMIT")
+            # Un singur fișier, fără -wal/-shm: snapshot-ul se poate copia oriunde ca atare
+            target.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            probed = probe.stop() if probe is not None else None
+            source.close()
+            target.close()
+        seconds = time.perf_counter() - start
+        stall = probed or stall_report(self.db.write_waits(start, start + seconds), 'transactions')
+
+        integrity = integrity_check(partial, quick)
+        if integrity != 'ok':
+            os.replace(partial, path + '.corrupt')
+            raise RuntimeError(f"snapshot-ul {path} nu trece verificarea de integritate: {integrity}")
+        _publish(partial, path)
+        report = {
+            'path': path, 'source': self.db.db_path, 'created_at': created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'pages': pages, 'bytes': os.path.getsize(path), 'steps': steps, 'seconds': round(seconds, 3),
+            'integrity': integrity, 'stall': stall._asdict(),
+        }
+        _write_json(os.path.splitext(path)[0] + '.json', report)
+        if prune:
+            self.prune()
+        return report
+
+    def snapshots(self) -> List[Dict]:
+        """Snapshot-urile existente, cel mai nou primul, cu raportul din manifest când există"""
+        found = []
+        for path in sorted(glob.glob(os.path.join(self.directory, f"{self.stem}-*.db")), reverse=True):
+            try:
+                with open(os.path.splitext(path)[0] + '.json', encoding='utf-8') as manifest:
+                    found.append(json.load(manifest))
+            except (OSError, ValueError):
+                found.append({'path': path, 'bytes': os.path.getsize(path)})
+        return found
+
+    def prune(self) -> List[str]:
+        removed = []
+        for snapshot in self.snapshots()[self.keep:]:
+            path = snapshot['path']
+            for stale in (path, os.path.splitext(path)[0] + '.json'):
+                if os.path.exists(stale):
+                    os.remove(stale)
+            removed.append(path)
+        return removed
+
+    def restore(self, snapshot_path: str, safety: bool = True) -> Optional[Dict]:
+        """Înlocuiește conținutul bazei cu snapshot-ul; cu safety, face întâi un snapshot al stării curente.
+
+        Restaurarea trece tot prin API-ul de backup, într-un singur pas sub lock-ul de scriere:
+        conexiunile deschise văd fie baza veche, fie pe cea restaurată, niciodată un amestec.
+        """
+        integrity = integrity_check(snapshot_path)
+        if integrity != 'ok':
+            raise ValueError(f"{snapshot_path} nu poate fi restaurat: {integrity}")
+        # Fără retenție aici: snapshot-ul de restaurat poate fi chiar cel mai vechi
+        before = self.snapshot(prune=False) if safety else None
+
+        source = sqlite3.connect(snapshot_path)
+        target = sqlite3.connect(self.db.db_path, timeout=self.db.busy_timeout)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+        return before
+
+
+class BackupScheduler:
+    """Fir de fundal care face un snapshot (și retenția) la fiecare interval_s"""
+
+    def __init__(self, service: BackupService, interval_s: float = 3600):
+        self.service = service
+        self.interval = interval_s
+        self.last_report: Optional[Dict] = None
+        self.last_error: Optional[str] = None
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="backups", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.last_report, self.last_error = self.service.snapshot(), None
+            except (sqlite3.Error, OSError, RuntimeError) as error:
+                # Disc plin, bază blocată: reîncercăm la următorul interval
+                self.last_error = str(error)
+
+    def close(self):
+        self._stopped.set()
+        self._thread.join()
+
+
+def describe(report: Dict) -> str:
+    stall = report.get('stall')
+    line = f"{report['path']}: {report['bytes'] / 1e6:,.1f} MB"
+    if 'pages' in report:
+        line += (f", {report['pages']:,} pagini în {report['seconds']:.2f}s ({report['steps']} pași), "
+                 f"integritate {report['integrity']}")
+    if stall and stall.get('writes'):
+        unit = "sonde" if stall['source'] == 'probe' else "scrieri"
+        line += f"; scriitori: {stall['writes']} {unit}, p99 {stall['p99_ms']:.2f} ms, max {stall['max_ms']:.2f} ms"
+    elif stall:
+        line += "; nicio scriere în proces în timpul copierii"
+    return line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["snapshot", "list", "verify", "restore", "schedule"])
+    parser.add_argument("snapshot", nargs="?", help="pentru verify și restore")
+    parser.add_argument("--db", default="reddit_clone.db")
+    parser.add_argument("--dir", default="backups")
+    parser.add_argument("--keep", type=int, default=DEFAULT_KEEP)
+    parser.add_argument("--pages-per-step", type=int, default=PAGES_PER_STEP)
+    parser.add_argument("--sleep-ms", type=int, default=STEP_SLEEP_MS)
+    parser.add_argument("--every", type=float, default=3600, help="secunde între snapshot-uri (schedule)")
+    parser.add_argument("--no-safety", action="store_true", help="restore fără snapshot-ul stării curente")
+    args = parser.parse_args(argv)
+    if args.command in ("verify", "restore") and not args.snapshot:
+        parser.error(f"{args.command} cere calea snapshot-ului")
+
+    if args.command == "verify":
+        integrity = integrity_check(args.snapshot)
+        print(f"{args.snapshot}: {integrity}")
+        raise SystemExit(0 if integrity == 'ok' else 1)
+
+    db = Database(args.db)
+    service = BackupService(db, args.dir, args.keep, args.pages_per_step, args.sleep_ms)
+    try:
+        if args.command == "snapshot":
+            print(describe(service.snapshot()))
+        elif args.command == "list":
+            for report in service.snapshots():
+                print(describe(report))
+        elif args.command == "restore":
+            before = service.restore(args.snapshot, safety=not args.no_safety)
+            if before:
+                print(f"starea anterioară: {before['path']}")
+            print(f"{args.db} restaurată din {args.snapshot}")
+        else:
+            while True:
+                print(describe(service.snapshot()), flush=True)
+                time.sleep(args.every)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Latența scriitorilor în timpul unui backup: copie sub lock vs. backup online în pași.
+
+Un fir scrie continuu tranzacții mici (un UPDATE per commit) cât timp rulează
+copierea. "copie sub lock" e varianta consistentă a copierii fișierului:
+BEGIN IMMEDIATE, shutil.copyfile, ROLLBACK; scriitorul așteaptă toată
+copierea. Backup-ul online (backup.py) e măsurat cu mai multe dimensiuni ale
+pasului, cu sonda de scriitori din backup.py pornită (probe_writers=True),
+al cărei p99 apare în ultima coloană; fără nicio copiere avem latența de
+referință. Rulare:
+python benchmarks/bench_backup.py [--scale small --pages 64 256 1024]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backup import BackupService
+from database import Database
+from datagen import SCALES, build_database
+
+
+def measure_writer(path: str, action) -> dict:
+    stopped = threading.Event()
+    latencies = []
+
+    def writer():
+        conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        conn.execute("PRAGMA synchronous = NORMAL")
+        index = 0
+        while not stopped.is_set():
+            start = time.perf_counter()
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("UPDATE users SET bio = ? WHERE rowid = ?", (str(index), index % 1000 + 1))
+            conn.execute("COMMIT")
+            latencies.append((time.perf_counter() - start) * 1000)
+            index += 1
+            time.sleep(0.001)
+        conn.close()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    start = time.perf_counter()
+    report = action()
+    elapsed = time.perf_counter() - start
+    stopped.set()
+    thread.join()
+    latencies.sort()
+    # Doar snapshot-urile întorc un raport; sonda lor e pornită cu probe_writers=True
+    stall = report.get('stall') if isinstance(report, dict) else None
+    return {
+        'seconds': elapsed, 'writes': len(latencies),
+        'p50': latencies[len(latencies) // 2], 'p99': latencies[int(len(latencies) * 0.99)], 'max': latencies[-1],
+        'probe_p99': stall['p99_ms'] if stall else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--pages", type=int, nargs="+", default=[64, 256, 1024])
+    parser.add_argument("--sleep-ms", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "backup.db")
+        print(f"Generare date {args.scale}...")
+        build_database(path, SCALES[args.scale], verbose=False)
+        db = Database(path)
+        print(f"{os.path.getsize(path) / 1e6:,.0f} MB, pauză {args.sleep_ms} ms între pași\n")
+
+        def locked_copy():
+            conn = sqlite3.connect(path, isolation_level=None)
+            conn.execute("BEGIN IMMEDIATE")
+            shutil.copyfile(path, os.path.join(tmp, "copy.db"))
+            conn.execute("ROLLBACK")
+            conn.close()
+
+        variants = [("fără copiere (2s)", lambda: time.sleep(2)), ("copie sub lock", locked_copy)]
+        for pages in args.pages:
+            service = BackupService(db, os.path.join(tmp, f"snapshots{pages}"), keep=1, pages_per_step=pages,
+                                    sleep_ms=args.sleep_ms, probe_writers=True)
+            variants.append((f"backup, {pages} pagini/pas", lambda service=service: service.snapshot(quick=True)))
+
+        print(f"{'variantă':<26} {'durată s':>9} {'scrieri':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+              f"{'sondă p99':>10}")
+        for label, action in variants:
+            result = measure_writer(path, action)
+            probe = f"{result['probe_p99']:.2f}" if result['probe_p99'] is not None else "-"
+            print(f"{label:<26} {result['seconds']:>9.2f} {result['writes']:>8,} {result['p50']:>8.2f} "
+                  f"{result['p99']:>8.2f} {result['max']:>8.2f} {probe:>10}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
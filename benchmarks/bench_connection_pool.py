@@ -0,0 +1,94 @@
+"""Compară ops/sec: conexiune nouă per operație vs. pool-ul din Database.
+
+Rulare: python benchmarks/bench_connection_pool.py [--ops 2000]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database, User, Post
+
+
+def legacy_read(db_path, user_id):
+    # Comportamentul vechi: connect + query + close pentru fiecare apel
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "SELECT id, username, email, karma, bio, created_at FROM users WHERE id = ?",
+        (user_id,)
+    ).fetchone()
+    conn.close()
+
+
+def legacy_write(db_path, author_id, community_id):
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "INSERT INTO posts (id, title, content, post_type, author_id, community_id) VALUES (?, ?, ?, ?, ?, ?)",
+        (str(uuid.uuid4()), "titlu", "conținut", "text", author_id, community_id)
+    )
+    conn.commit()
+    conn.close()
+
+
+def measure(label, ops, fn):
+    start = time.perf_counter()
+    for _ in range(ops):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {ops / elapsed:>12,.0f} ops/sec")
+    return ops / elapsed
+
+
+def seed(db):
+    User(db).create_user("bench", "bench@example.com", "parola123")
+    with db.connection() as conn:
+        user_id = conn.execute("SELECT id FROM users WHERE username = 'bench'").fetchone()[0]
+        community_id = str(uuid.uuid4())
+        conn.execute(
+            "INSERT INTO communities (id, name, description, creator_id) VALUES (?, ?, ?, ?)",
+            (community_id, "bench", "", user_id)
+        )
+    return user_id, community_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ops", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Baza "legacy" rămâne în modul rollback journal, ca înainte
+        legacy_path = os.path.join(tmp, "legacy.db")
+        legacy_db = Database(legacy_path)
+        user_id, community_id = seed(legacy_db)
+        legacy_db.close()
+        conn = sqlite3.connect(legacy_path)
+        conn.execute("PRAGMA journal_mode = DELETE")
+        conn.close()
+
+        pooled_db = Database(os.path.join(tmp, "pooled.db"))
+        pooled_user_id, pooled_community_id = seed(pooled_db)
+        users = User(pooled_db)
+        posts = Post(pooled_db)
+
+        print(f"{args.ops} operații per scenariu\n")
+        before = measure("citire (connect per op)", args.ops, lambda: legacy_read(legacy_path, user_id))
+        after = measure("citire (pool + WAL)", args.ops, lambda: users.get_user_by_id(pooled_user_id))
+        print(f"{'':<28} {after / before:>11.1f}x\n")
+
+        before = measure("scriere (connect per op)", args.ops, lambda: legacy_write(legacy_path, user_id, community_id))
+        after = measure("scriere (pool + WAL)", args.ops, lambda: posts.create_post(
+            "titlu", "conținut", "text", pooled_user_id, pooled_community_id
+        ))
+        print(f"{'':<28} {after / before:>11.1f}x")
+
+        pooled_db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Timpul de încărcare al unei pagini din feed în funcție de adâncime.
+
+Compară paginarea keyset (Post.get_feed_page) cu varianta OFFSET pe o bază
+sintetică. Rulare: python benchmarks/bench_feed_pagination.py [--posts 1000000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database, Post, encode_cursor
+
+PAGE_SIZE = 20
+
+
+def seed(db, posts):
+    start = datetime(2020, 1, 1)
+    with db.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO users (id, username, email, password_hash) VALUES (?, ?, ?, '')",
+            ((f"u{i}", f"user{i}", f"user{i}@example.com") for i in range(1000))
+        )
+        conn.executemany(
+            "INSERT INTO communities (id, name, creator_id) VALUES (?, ?, 'u0')",
+            ((f"c{i}", f"comunitate{i}") for i in range(50))
+        )
+        conn.executemany(
+            "INSERT INTO posts (id, title, content, author_id, community_id, created_at) VALUES (?, ?, '', ?, ?, ?)",
+            (
+                (f"p{i:08d}", f"Postarea {i}", f"u{i % 1000}", f"c{i % 50}",
+                 (start + timedelta(seconds=i // 3)).strftime("%Y-%m-%d %H:%M:%S"))
+                for i in range(posts)
+            )
+        )
+
+
+def cursor_for_page(db, page):
+    # Cursorul pe care clientul l-ar fi primit după page - 1 pagini
+    if page == 1:
+        return None
+    with db.connection() as conn:
+        created_at, post_id = conn.execute(
+            "SELECT created_at, id FROM posts ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET ?",
+            ((page - 1) * PAGE_SIZE - 1,)
+        ).fetchone()
+    return encode_cursor('new', created_at, post_id)
+
+
+def offset_page(db, page):
+    with db.connection() as conn:
+        return conn.execute('''
+            SELECT p.id, p.title, p.content, p.post_type, p.created_at, p.upvotes, p.downvotes,
+                   u.username, c.name, p.author_id
+            FROM posts p
+            JOIN users u ON p.author_id = u.id
+            JOIN communities c ON p.community_id = c.id
+            ORDER BY p.created_at DESC, p.id DESC
+            LIMIT ? OFFSET ?
+        ''', (PAGE_SIZE, (page - 1) * PAGE_SIZE)).fetchall()
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 500, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "feed.db"))
+        print(f"Generare {args.posts:,} postări...")
+        seed(db, args.posts)
+        posts = Post(db)
+
+        print(f"\n{'pagina':>8} {'keyset (ms)':>12} {'offset (ms)':>12}")
+        for page in args.pages:
+            if (page - 1) * PAGE_SIZE >= args.posts:
+                continue
+            cursor = cursor_for_page(db, page)
+            keyset = timed(lambda: posts.get_feed_page(PAGE_SIZE, cursor), args.repeat)
+            offset = timed(lambda: offset_page(db, page), args.repeat)
+            print(f"{page:>8} {keyset:>12.3f} {offset:>12.3f}")
+
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Login-uri pe secundă pentru un cost KDF dat.
+
+Rulare: python benchmarks/bench_password_hashing.py [--scheme scrypt --n 16384 --workers 4]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database, User
+from passwords import PasswordHasher
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scheme", choices=["scrypt", "pbkdf2_sha256"], default="scrypt")
+    parser.add_argument("--n", type=int, default=2 ** 14, help="cost scrypt (putere a lui 2)")
+    parser.add_argument("--r", type=int, default=8)
+    parser.add_argument("--p", type=int, default=1)
+    parser.add_argument("--iterations", type=int, default=600_000, help="iterații PBKDF2")
+    parser.add_argument("--workers", type=int, default=None, help="procese KDF (0 = în firul apelantului)")
+    parser.add_argument("--sessions", type=int, default=16, help="sesiuni care se autentifică simultan")
+    parser.add_argument("--logins", type=int, default=200)
+    args = parser.parse_args()
+
+    params = {'n': args.n, 'r': args.r, 'p': args.p} if args.scheme == 'scrypt' else {'i': args.iterations}
+    hasher = PasswordHasher(args.scheme, params, workers=args.workers)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "login.db"))
+        users = User(db, hasher)
+        for i in range(args.sessions):
+            users.create_user(f"user{i}", f"user{i}@example.com", "parola-secreta")
+
+        def login(i):
+            assert users.authenticate(f"user{i % args.sessions}", "parola-secreta")
+
+        # Prima rundă pornește procesele din pool
+        login(0)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.sessions) as sessions:
+            list(sessions.map(login, range(args.logins)))
+        elapsed = time.perf_counter() - start
+
+        print(f"{args.scheme} {params}, {hasher.workers} procese KDF, {args.sessions} sesiuni")
+        print(f"{args.logins / elapsed:,.1f} login-uri/sec ({elapsed / args.logins * 1000:.1f} ms/login)")
+        hasher.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Costul formatării unei pagini: apelurile din utils per element vs. presenter pe toată pagina.
+
+Varianta veche e copiată aici (utils importă streamlit): parsează timestamp-ul
+la fiecare apel, construiește dicționarul de iconițe per postare și compilează
+expresia pentru URL la fiecare link. Ambele variante primesc aceleași pagini
+de PostRecord din baza sintetică; presenter e măsurat o dată cu memo-urile
+goale (prima rulare a procesului) și apoi cald (rulările următoare ale
+scriptului Streamlit). Rulare:
+python benchmarks/bench_presentation.py [--scale small --pages 500 --page-size 25]
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import presenter
+from database import Database
+from datagen import SCALES, build_database
+from records import PostRecord
+
+
+def legacy_time_ago(timestamp_str):
+    try:
+        timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
+        diff = datetime.utcnow() - timestamp
+        if diff.days > 0:
+            return f"acum {diff.days} {'zi' if diff.days == 1 else 'zile'}"
+        elif diff.seconds > 3600:
+            hours = diff.seconds // 3600
+            return f"acum {hours} {'oră' if hours == 1 else 'ore'}"
+        elif diff.seconds > 60:
+            minutes = diff.seconds // 60
+            return f"acum {minutes} {'minut' if minutes == 1 else 'minute'}"
+        else:
+            return "acum câteva secunde"
+    except:
+        return timestamp_str
+
+
+def legacy_is_valid_url(url):
+    url_pattern = re.compile(
+        r'^https?://'
+        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'
+        r'localhost|'
+        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'
+        r'(?::\d+)?'
+        r'(?:/?|[/?]\S+)$', re.IGNORECASE)
+    return url_pattern.match(url) is not None
+
+
+def legacy_format_number(num):
+    if num >= 1000000:
+        return f"{num/1000000:.1f}M"
+    elif num >= 1000:
+        return f"{num/1000:.1f}k"
+    else:
+        return str(num)
+
+
+def legacy_present(page):
+    # Ce făcea un card: câte un apel utils pentru fiecare câmp, prin cheile de dict
+    shown = []
+    for post in page:
+        icons = {'text': '📝', 'link': '🔗', 'image': '🖼️', 'video': '🎥'}
+        score = post['upvotes'] - post['downvotes']
+        content = post['content']
+        shown.append((
+            legacy_time_ago(post['created_at']),
+            legacy_format_number(score),
+            icons.get(post['post_type'], '📝'),
+            content if len(content) <= 200 else content[:200] + "...",
+            post['post_type'] != 'link' or legacy_is_valid_url(content),
+        ))
+    return shown
+
+
+def clear_memos():
+    presenter.parse_timestamp.cache_clear()
+    presenter.age_label.cache_clear()
+    presenter.format_number.cache_clear()
+
+
+def measure(present, pages, cold):
+    if not cold:
+        for page in pages:
+            present(page)
+    timings = []
+    for page in pages:
+        if cold:
+            clear_memos()
+        start = time.perf_counter()
+        present(page)
+        timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--page-size", type=int, default=25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "presentation.db")
+        print(f"Generare date {args.scale}...")
+        build_database(path, SCALES[args.scale], verbose=False)
+        db = Database(path)
+        with db.connection() as conn:
+            rows = conn.execute('''
+                SELECT p.id, p.title, p.content, p.post_type, p.created_at, p.upvotes, p.downvotes,
+                       u.username, c.name, p.author_id
+                FROM posts p JOIN users u ON p.author_id = u.id JOIN communities c ON p.community_id = c.id
+                ORDER BY p.created_at DESC
+                LIMIT ?
+            ''', (args.pages * args.page_size,)).fetchall()
+        db.close()
+
+    pages = [[PostRecord(*row) for row in rows[start:start + args.page_size]]
+             for start in range(0, len(rows), args.page_size)]
+    print(f"{len(pages)} pagini de câte {args.page_size} postări\n")
+    print(f"{'variantă':<22} {'p50 µs/pagină':>14} {'p95 µs/pagină':>14} {'µs/postare':>11}")
+    for label, present, cold in (
+        ("utils per element", legacy_present, False),
+        ("presenter, rece", presenter.present_posts, True),
+        ("presenter, cald", presenter.present_posts, False),
+    ):
+        p50, p95 = measure(present, pages, cold)
+        print(f"{label:<22} {p50:>14.1f} {p95:>14.1f} {p50 / args.page_size:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Memorie și timp per rând: dict-urile vechi vs. clasele din records.py.
+
+Citește aceleași rânduri brute din baza sintetică și le convertește în
+ambele forme; memoria e măsurată cu tracemalloc (doar obiectele create la
+conversie, nu și tuplurile sursă). Rulare:
+python benchmarks/bench_row_memory.py [--scale small --rows 50000 --repeat 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from datagen import SCALES, build_database
+from records import CommentRecord, MessageRecord, PostRecord
+
+QUERIES = {
+    'posts': ('''
+        SELECT p.id, p.title, p.content, p.post_type, p.created_at, p.upvotes, p.downvotes,
+               u.username, c.name, p.author_id
+        FROM posts p JOIN users u ON p.author_id = u.id JOIN communities c ON p.community_id = c.id
+        LIMIT ?
+    ''', PostRecord),
+    'comments': ('''
+        SELECT c.id, c.content, c.created_at, c.upvotes, c.downvotes, c.parent_id,
+               u.username, c.path, c.depth, c.reply_count
+        FROM comments c JOIN users u ON c.author_id = u.id
+        LIMIT ?
+    ''', CommentRecord),
+    'messages': ('''
+        SELECT m.id, m.content, m.created_at, m.is_read, s.username, r.username, m.sender_id
+        FROM messages m JOIN users s ON m.sender_id = s.id JOIN users r ON m.receiver_id = r.id
+        LIMIT ?
+    ''', MessageRecord),
+}
+
+
+def as_dicts(rows, record):
+    # Conversia de dinainte: un literal dict cu aceleași chei pentru fiecare rând
+    keys = ", ".join(f"{name!r}: row[{index}]" for index, name in enumerate(record._columns))
+    to_dict = eval(f"lambda row: {{{keys}}}")
+    return [to_dict(row) for row in rows]
+
+
+def as_records(rows, record):
+    return [record(*row) for row in rows]
+
+
+def measure(convert, rows, record, repeat):
+    # Timpul separat de memorie: tracemalloc încetinește fiecare alocare; cea mai bună din repeat treceri
+    elapsed = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        convert(rows, record)
+        elapsed = min(elapsed, time.perf_counter() - start)
+
+    tracemalloc.start()
+    converted = convert(rows, record)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del converted
+    return size / len(rows), elapsed / len(rows) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rows.db")
+        print(f"Generare date {args.scale}...")
+        build_database(path, SCALES[args.scale], verbose=False)
+        db = Database(path)
+
+        print(f"\n{'tabel':<10} {'rânduri':>8} {'dict B/rând':>12} {'slots B/rând':>13} {'dict µs':>8} {'slots µs':>9}")
+        for table, (sql, record) in QUERIES.items():
+            with db.connection() as conn:
+                rows = conn.execute(sql, (args.rows,)).fetchall()
+            if not rows:
+                continue
+            dict_bytes, dict_us = measure(as_dicts, rows, record, args.repeat)
+            record_bytes, record_us = measure(as_records, rows, record, args.repeat)
+            print(f"{table:<10} {len(rows):>8,} {dict_bytes:>12,.0f} {record_bytes:>13,.0f} "
+                  f"{dict_us:>8.2f} {record_us:>9.2f}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Debitul scrierilor concurente în funcție de numărul de shard-uri.
+
+Câteva fire scriu în paralel în comunități alese aleator: postări noi și
+voturi pe postări existente. Cu un shard toate scrierile trec prin același
+lock, ca în baza de date obișnuită; cu mai multe, doar scrierile din
+comunitățile aflate pe același shard se mai așteaptă. Voturile pozitive scriu
+și o notificare în catalog, care rămâne comun tuturor shard-urilor. Rulare:
+python benchmarks/bench_sharding.py [--shards 1 2 4 8 --threads 8 --seconds 3]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from database import Community, User
+from shards import ShardedDatabase, ShardedPost, ShardedVote, make_id
+
+COMMUNITIES = 64
+USERS = 32
+SEED_POSTS_PER_COMMUNITY = 5
+
+
+def seed(db: ShardedDatabase):
+    users = User(db.catalog)
+    # password_hash direct: KDF-ul ar domina timpul de pregătire
+    users.bulk_create({'username': f"bench{index}", 'email': f"bench{index}@example.com", 'password_hash': "-"}
+                      for index in range(USERS))
+    with db.catalog.connection() as conn:
+        user_ids = [row[0] for row in conn.execute("SELECT id FROM users").fetchall()]
+    communities = Community(db.catalog)
+    for index in range(COMMUNITIES):
+        communities.create_community(f"bench{index}", "", user_ids[0])
+    community_ids = [community['id'] for community in communities.get_all_communities()]
+
+    posts = []
+    for community_id in community_ids:
+        for _ in range(SEED_POSTS_PER_COMMUNITY):
+            posts.append({'id': make_id(db.shard_index(community_id)), 'title': "titlu",
+                          'author_id': random.choice(user_ids), 'community_id': community_id})
+    ShardedPost(db).bulk_create(posts)
+    return user_ids, community_ids, [post['id'] for post in posts]
+
+
+def run(shard_count: int, threads: int, seconds: float, vote_share: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = ShardedDatabase(tmp, shard_count, busy_timeout=30.0)
+        user_ids, community_ids, post_ids = seed(db)
+        posts, votes = ShardedPost(db), ShardedVote(db)
+        counts = [0] * threads
+        start_gate = threading.Barrier(threads + 1)
+        deadline = [0.0]
+
+        def writer(slot: int):
+            rng = random.Random(slot)
+            start_gate.wait()
+            while time.perf_counter() < deadline[0]:
+                if rng.random() < vote_share:
+                    votes.vote(rng.choice(user_ids), 'post', rng.choice(post_ids), rng.choice((1, -1)))
+                else:
+                    posts.create_post("titlu", "conținut", "text", rng.choice(user_ids), rng.choice(community_ids))
+                counts[slot] += 1
+
+        workers = [threading.Thread(target=writer, args=(slot,)) for slot in range(threads)]
+        for worker in workers:
+            worker.start()
+        deadline[0] = time.perf_counter() + seconds
+        start = time.perf_counter()
+        start_gate.wait()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        db.close()
+    return {'ops': sum(counts), 'ops_per_sec': sum(counts) / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--vote-share", type=float, default=0.3)
+    parser.add_argument("--durable", action="store_true",
+                        help="synchronous=FULL: fiecare commit așteaptă fsync-ul, ținând lock-ul de scriere")
+    args = parser.parse_args()
+    if args.durable:
+        database.CONNECTION_PRAGMAS = tuple(
+            "PRAGMA synchronous = FULL" if pragma.startswith("PRAGMA synchronous") else pragma
+            for pragma in database.CONNECTION_PRAGMAS
+        )
+
+    print(f"{args.threads} fire, {args.seconds:g}s per configurație, {args.vote_share:.0%} voturi, "
+          f"{os.cpu_count()} CPU{', synchronous=FULL' if args.durable else ''}\n")
+    print(f"{'shard-uri':>9} {'scrieri':>9} {'scrieri/s':>11} {'față de 1':>10}")
+    baseline = None
+    for shard_count in args.shards:
+        result = run(shard_count, args.threads, args.seconds, args.vote_share)
+        baseline = baseline or result['ops_per_sec']
+        print(f"{shard_count:>9} {result['ops']:>9,} {result['ops_per_sec']:>11,.0f} "
+              f"{result['ops_per_sec'] / baseline:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
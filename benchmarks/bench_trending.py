@@ -0,0 +1,113 @@
+"""Trending din jurnalul de evenimente vs. sortarea tuturor comunităților după membri.
+
+Pornește un TrendingEngine la rece pe datele generate, cu ceasul fixat la
+sfârșitul lor (datagen.END), și măsoară cât durează citirea jurnalului și o
+interogare trending(), față de varianta veche: get_all_communities și o
+sortare după members_count la fiecare afișare. Precizia topului (recall@10)
+e comparată cu scorurile exacte, recalculate din tot jurnalul fără limită de
+memorie. Rulare:
+python benchmarks/bench_trending.py [--scale small --capacity 50 200 --queries 10000]
+"""
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+from calendar import timegm
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Community, Database
+from datagen import END, SCALES, build_database
+from events import EVENT_COLUMNS, decode_events
+from trending import ACTIVITY_WEIGHTS, HALF_LIFE_SECONDS, HORIZON_HALF_LIVES, KINDS, TrendingEngine, _epoch
+
+
+def exact_scores(db: Database, now: float) -> dict:
+    # Aceleași reguli ca TrendingEngine.apply, dar cu un dict nelimitat per tip
+    rate = math.log(2) / HALF_LIFE_SECONDS
+    horizon = now - HORIZON_HALF_LIVES * HALF_LIFE_SECONDS
+    scores = {kind: defaultdict(float) for kind in KINDS}
+    with db.connection() as conn:
+        post_community = dict(conn.execute("SELECT id, community_id FROM posts"))
+        comment_post = dict(conn.execute("SELECT id, post_id FROM comments"))
+        for event in decode_events(conn.execute(f"SELECT {EVENT_COLUMNS} FROM events")):
+            weights = ACTIVITY_WEIGHTS.get(event.kind)
+            at = min(_epoch(event.created_at), now)
+            if weights is None or at < horizon:
+                continue
+            post_id = community_id = None
+            if event.kind == 'post_created':
+                post_id = event.entity_id
+            elif event.kind == 'comment_created':
+                post_id = event.data['post']
+            elif event.kind == 'vote_cast':
+                if not event.data.get('value'):
+                    continue
+                post_id = event.entity_id if event.data['type'] == 'post' else comment_post.get(event.entity_id)
+            else:
+                community_id = event.entity_id
+            community_id = community_id or post_community.get(post_id)
+            decay = math.exp(-rate * (now - at))
+            if post_id and weights[0]:
+                scores['post'][post_id] += weights[0] * decay
+            if community_id and weights[1]:
+                scores['community'][community_id] += weights[1] * decay
+    return scores
+
+
+def per_call_us(fn, calls: int, repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--capacity", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--queries", type=int, default=10_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "trending.db")
+        print(f"Generare date {args.scale}...")
+        build_database(path, SCALES[args.scale], verbose=False)
+        db = Database(path)
+        now = timegm(END.timetuple())
+        with db.connection() as conn:
+            total = conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        print(f"{total:,} evenimente în jurnal\n")
+
+        exact = exact_scores(db, now)
+        truth = {kind: {item_id for item_id, _ in sorted(scores.items(), key=lambda item: -item[1])[:10]}
+                 for kind, scores in exact.items()}
+        communities = Community(db)
+        legacy = per_call_us(
+            lambda: sorted(communities.get_all_communities(), key=lambda x: x['members_count'], reverse=True)[:5],
+            args.queries // 10)
+        print(f"sortare după membri (get_all_communities): {legacy:,.1f} µs/afișare\n")
+
+        print(f"{'capacitate':>10} {'catch-up ev/s':>14} {'trending µs':>12} {'recall@10 com.':>15} "
+              f"{'recall@10 post.':>16}")
+        for capacity in args.capacity:
+            start = time.perf_counter()
+            engine = TrendingEngine(db, capacity=capacity, clock=lambda: now, start=False)
+            engine.catch_up()
+            elapsed = time.perf_counter() - start
+            query = per_call_us(lambda: engine.trending('community', 5), args.queries)
+            recall = {kind: len(truth[kind] & {item_id for item_id, _ in engine.trending(kind, 10)})
+                      / max(1, len(truth[kind])) for kind in KINDS}
+            print(f"{capacity:>10} {total / elapsed:>14,.0f} {query:>12.1f} {recall['community']:>15.2f} "
+                  f"{recall['post']:>16.2f}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
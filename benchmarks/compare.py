@@ -0,0 +1,69 @@
+"""Compară două rulări ale suitei (benchmarks/suite.py --out) și semnalează regresiile.
+
+Un caz e regresie dacă p50 sau p95 crește peste pragul relativ și, în același
+timp, cu mai mult decât pragul absolut (zgomotul la cazurile de microsecunde
+nu contează). Codul de ieșire e 1 când există regresii, ca scriptul să poată
+opri un CI.
+
+Rulare: python benchmarks/compare.py baseline.json current.json [--threshold 0.2 --min-delta-ms 0.05]
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List, Tuple
+
+METRICS = ('p50_ms', 'p95_ms')
+
+
+def load(path: str) -> Dict:
+    with open(path, encoding="utf-8") as source:
+        return json.load(source)
+
+
+def compare(baseline: Dict, current: Dict, threshold: float, min_delta_ms: float) -> List[Tuple[str, str, float, float, bool]]:
+    """Rânduri (caz, metrică, valoare veche, valoare nouă, regresie) pentru cazurile comune"""
+    rows = []
+    for name in sorted(set(baseline['results']) & set(current['results'])):
+        for metric in METRICS:
+            before, after = baseline['results'][name][metric], current['results'][name][metric]
+            regressed = after > before * (1 + threshold) and after - before > min_delta_ms
+            rows.append((name, metric, before, after, regressed))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.2, help="creștere relativă tolerată (0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05)
+    args = parser.parse_args()
+
+    baseline, current = load(args.baseline), load(args.current)
+    for key in ('scale', 'seed'):
+        if baseline['meta'].get(key) != current['meta'].get(key):
+            print(f"Atenție: {key} diferă ({baseline['meta'].get(key)} vs {current['meta'].get(key)})",
+                  file=sys.stderr)
+
+    rows = compare(baseline, current, args.threshold, args.min_delta_ms)
+    print(f"{'caz':<42} {'metrică':<7} {'înainte':>9} {'acum':>9} {'variație':>9}")
+    for name, metric, before, after, regressed in rows:
+        change = (after - before) / before * 100 if before else 0.0
+        marker = "  REGRESIE" if regressed else ""
+        print(f"{name:<42} {metric:<7} {before:>9.3f} {after:>9.3f} {change:>+8.1f}%{marker}")
+
+    for label, names in (("doar în referință", set(baseline['results']) - set(current['results'])),
+                         ("cazuri noi", set(current['results']) - set(baseline['results']))):
+        if names:
+            print(f"{label}: {', '.join(sorted(names))}")
+
+    regressions = sorted({name for name, _, _, _, regressed in rows if regressed})
+    if regressions:
+        print(f"\n{len(regressions)} regresii: {', '.join(regressions)}")
+        return 1
+    print("\nFără regresii.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
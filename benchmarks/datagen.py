@@ -0,0 +1,288 @@
+"""Generator determinist de date sintetice pentru benchmark-uri.
+
+Aceeași scară și aceeași sămânță dau mereu aceeași bază: id-uri, texte,
+timestamp-uri și distribuții. Activitatea e asimetrică, ca pe un forum real:
+puțini utilizatori scriu mult (Zipf), câteva postări adună majoritatea
+comentariilor, iar thread-urile au ramuri adânci. Mesajele circulă între
+grupuri mici de contacte.
+
+Rulare: python benchmarks/datagen.py small --out small.db [--seed 42]
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, NamedTuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import migrations
+from database import Comment, Database, Post, User
+from passwords import hash_password
+
+
+class Scale(NamedTuple):
+    users: int
+    communities: int
+    posts: int
+    comments: int
+    messages: int
+
+
+SCALES: Dict[str, Scale] = {
+    'tiny': Scale(users=1_000, communities=20, posts=5_000, comments=25_000, messages=5_000),
+    'small': Scale(users=10_000, communities=100, posts=50_000, comments=250_000, messages=50_000),
+    'medium': Scale(users=100_000, communities=1_000, posts=300_000, comments=1_500_000, messages=500_000),
+    'large': Scale(users=1_000_000, communities=10_000, posts=1_000_000, comments=5_000_000, messages=2_000_000),
+}
+
+DEFAULT_SEED = 42
+# Parola tuturor utilizatorilor generați (hash-ul e calculat o singură dată)
+PASSWORD = "parola-benchmark"
+END = datetime(2024, 1, 1)
+SPAN_SECONDS = 365 * 24 * 3600
+CONTACTS_PER_USER = 5
+
+WORDS = (
+    "pisică câine mașină oraș munte mare carte film muzică joc cod python date server "
+    "rețea vară iarnă cafea ceai tren avion fotbal istorie știință artă foto rețetă "
+    "grădină bicicletă concert examen facultate proiect idee întrebare răspuns ajutor"
+).split()
+
+
+def user_id(i: int) -> str:
+    return f"u{i:07d}"
+
+
+def community_id(i: int) -> str:
+    return f"c{i:05d}"
+
+
+def post_id(i: int) -> str:
+    return f"p{i:08d}"
+
+
+def comment_id(i: int) -> str:
+    return f"k{i:09d}"
+
+
+def zipf_weights(n: int, s: float = 1.1) -> List[float]:
+    """Ponderi cumulative Zipf pentru random.choices(cum_weights=...)"""
+    return list(itertools.accumulate(1 / (rank + 1) ** s for rank in range(n)))
+
+
+def _timestamp(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choices(WORDS, k=words))
+
+
+class DataGenerator:
+    """Fluxuri de rânduri pentru bulk_create; fiecare flux are propriul Random derivat din sămânță"""
+
+    def __init__(self, scale: Scale, seed: int = DEFAULT_SEED):
+        self.scale = scale
+        self.seed = seed
+        self._user_weights = zipf_weights(scale.users)
+        self._community_weights = zipf_weights(scale.communities)
+
+    def _rng(self, stream: str) -> random.Random:
+        return random.Random(f"{self.seed}:{stream}")
+
+    def _post_time(self, i: int) -> datetime:
+        # Postările sunt numerotate cronologic pe tot anul
+        return END - timedelta(seconds=SPAN_SECONDS * (self.scale.posts - i) // self.scale.posts)
+
+    def users(self) -> Iterator[Dict]:
+        password_hash = hash_password(PASSWORD)
+        for i in range(self.scale.users):
+            yield {
+                'id': user_id(i), 'username': f"user{i}", 'email': f"user{i}@example.com",
+                'password_hash': password_hash,
+                'created_at': _timestamp(END - timedelta(seconds=SPAN_SECONDS * 2 * (self.scale.users - i)
+                                                         // self.scale.users)),
+            }
+
+    def communities(self) -> Iterator[tuple]:
+        rng = self._rng('communities')
+        for i in range(self.scale.communities):
+            yield (community_id(i), f"comunitate{i}", _text(rng, 8), user_id(rng.randrange(self.scale.users)))
+
+    def memberships(self) -> Iterator[tuple]:
+        """Membrii fiecărei comunități, creatorul primul; members_count rezultă din triggere"""
+        rng = self._rng('memberships')
+        for i, (community, _, _, creator) in enumerate(self.communities()):
+            # Mărimea comunității urmează aceeași lege ca popularitatea ei
+            size = max(1, int(self.scale.users * 0.2 / (i + 1) ** 1.1))
+            members = {creator, *(user_id(u) for u in rng.sample(range(self.scale.users), size - 1))}
+            for member in sorted(members):
+                yield (member, community)
+
+    def posts(self) -> Iterator[Dict]:
+        rng = self._rng('posts')
+        authors = rng.choices(range(self.scale.users), cum_weights=self._user_weights, k=self.scale.posts)
+        communities = rng.choices(range(self.scale.communities), cum_weights=self._community_weights,
+                                  k=self.scale.posts)
+        for i in range(self.scale.posts):
+            upvotes = int(rng.paretovariate(1.2)) - 1
+            yield {
+                'id': post_id(i), 'title': _text(rng, rng.randint(3, 10)).capitalize(),
+                'content': _text(rng, rng.randint(5, 60)),
+                'author_id': user_id(authors[i]), 'community_id': community_id(communities[i]),
+                'created_at': _timestamp(self._post_time(i)),
+                'upvotes': upvotes, 'downvotes': int(upvotes * rng.random() * 0.3),
+            }
+
+    def comment_counts(self) -> List[int]:
+        """Numărul de comentarii al fiecărei postări (Zipf peste o permutare a postărilor)"""
+        rng = self._rng('comment_counts')
+        order = list(range(self.scale.posts))
+        rng.shuffle(order)
+        counts = [0] * self.scale.posts
+        for rank in rng.choices(range(self.scale.posts), cum_weights=zipf_weights(self.scale.posts),
+                                k=self.scale.comments):
+            counts[order[rank]] += 1
+        return counts
+
+    def comments(self) -> Iterator[Dict]:
+        rng = self._rng('comments')
+        authors = iter(rng.choices(range(self.scale.users), cum_weights=self._user_weights,
+                                   k=self.scale.comments))
+        next_id = itertools.count()
+        for post, count in enumerate(self.comment_counts()):
+            created = self._post_time(post)
+            thread: List[str] = []
+            for _ in range(count):
+                parent = None
+                if thread and rng.random() > 0.35:
+                    # Răspunsurile merg mai ales spre comentariile recente: ramuri adânci
+                    parent = thread[max(0, len(thread) - 1 - int(rng.expovariate(0.3)))]
+                created += timedelta(seconds=rng.randint(1, 600))
+                cid = comment_id(next(next_id))
+                thread.append(cid)
+                yield {
+                    'id': cid, 'content': _text(rng, rng.randint(3, 40)),
+                    'author_id': user_id(next(authors)), 'post_id': post_id(post),
+                    'parent_id': parent, 'created_at': _timestamp(created),
+                }
+
+    def contacts(self, user: int) -> List[int]:
+        """Contactele fixe ale unui utilizator (fără el însuși)"""
+        users = self.scale.users
+        return [c for c in ((user * 7919 + k * 104729 + 1) % users for k in range(CONTACTS_PER_USER))
+                if c != user] or [(user + 1) % users]
+
+    def messages(self) -> Iterator[tuple]:
+        rng = self._rng('messages')
+        senders = rng.choices(range(self.scale.users), cum_weights=self._user_weights, k=self.scale.messages)
+        for i, sender in enumerate(senders):
+            receiver = rng.choice(self.contacts(sender))
+            sent = END - timedelta(seconds=SPAN_SECONDS * (self.scale.messages - i) // self.scale.messages)
+            yield (f"m{i:09d}", user_id(sender), user_id(receiver), _text(rng, rng.randint(2, 30)),
+                   _timestamp(sent), rng.random() < 0.7)
+
+
+def _insert_all(db: Database, sql: str, rows: Iterator[tuple], chunk_size: int = 10_000):
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        with db.transaction() as conn:
+            conn.executemany(sql, chunk)
+
+
+def _backfill_conversations(db: Database):
+    with db.transaction() as conn:
+        migrations.backfill_conversations(conn.cursor())
+
+
+def _backfill_timelines(db: Database):
+    with db.transaction() as conn:
+        migrations.backfill_timelines(conn.cursor())
+
+
+def _backfill_events(db: Database):
+    # Utilizatorii, postările și comentariile au fost jurnalizate de bulk_create; restul a fost inserat direct
+    with db.transaction() as conn:
+        migrations.backfill_events(conn.cursor(), ('community_created', 'member_joined', 'message_sent'))
+
+
+def _reply_notifications(db: Database):
+    # Răspunsurile din date notifică autorul părintelui; cele din ultima săptămână sunt necitite
+    with db.transaction() as conn:
+        conn.execute('''
+            INSERT INTO notifications (user_id, kind, actor_id, target_type, target_id, text, read, created_at)
+            SELECT p.author_id, 'reply', c.author_id, 'post', c.post_id, substr(c.content, 1, ?), c.created_at < ?,
+                   c.created_at
+            FROM comments c JOIN comments p ON p.id = c.parent_id
+            WHERE p.author_id != c.author_id
+            ORDER BY c.created_at
+        ''', (migrations.MESSAGE_PREVIEW_CHARS, _timestamp(END - timedelta(days=7))))
+
+
+def build_database(path: str, scale: Scale, seed: int = DEFAULT_SEED, verbose: bool = True) -> str:
+    """Construiește baza la `path`; fișierul apare doar după ce e completă"""
+    partial = f"{path}.partial"
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(partial + suffix):
+            os.remove(partial + suffix)
+
+    generator = DataGenerator(scale, seed)
+    db = Database(partial)
+    db.init_database()
+
+    def step(label, fn):
+        start = time.perf_counter()
+        result = fn()
+        if verbose:
+            print(f"  {label}: {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        failures = getattr(result, 'failures', None)
+        if failures:
+            raise RuntimeError(f"{label}: {len(failures)} rânduri respinse, ex. {failures[0]}")
+
+    step(f"{scale.users:,} utilizatori", lambda: User(db).bulk_create(generator.users()))
+    step(f"{scale.communities:,} comunități", lambda: _insert_all(db, '''
+        INSERT INTO communities (id, name, description, creator_id, members_count) VALUES (?, ?, ?, ?, 0)
+    ''', generator.communities()))
+    step(f"{scale.posts:,} postări", lambda: Post(db).bulk_create(generator.posts()))
+    step(f"{scale.comments:,} comentarii", lambda: Comment(db).bulk_create(generator.comments()))
+    step(f"{scale.messages:,} mesaje", lambda: _insert_all(db, '''
+        INSERT INTO messages (id, sender_id, receiver_id, content, created_at, is_read) VALUES (?, ?, ?, ?, ?, ?)
+    ''', generator.messages()))
+    step("conversații", lambda: _backfill_conversations(db))
+    # Membrii vin după postări: timeline-urile primesc doar ultimele postări ale fiecărei
+    # comunități, ca la o alăturare, nu fan-out-ul întregului istoric
+    step("membri", lambda: _insert_all(db, '''
+        INSERT INTO community_members (user_id, community_id) VALUES (?, ?)
+    ''', generator.memberships()))
+    step("timeline-uri", lambda: _backfill_timelines(db))
+    step("notificări", lambda: _reply_notifications(db))
+    step("jurnal de evenimente", lambda: _backfill_events(db))
+    with db.connection() as conn:
+        conn.execute("ANALYZE")
+    # Ultima conexiune închisă golește WAL-ul: baza rămâne un singur fișier, ușor de copiat
+    db.close()
+    os.replace(partial, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scale", choices=list(SCALES))
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    print(f"Generare {args.scale} (sămânța {args.seed}) în {args.out}", file=sys.stderr)
+    build_database(args.out, SCALES[args.scale], args.seed)
+    print(f"Gata în {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,577 @@
+"""Suita de benchmark-uri pentru metodele publice ale managerilor din database.py.
+
+Baza sintetică (datagen.py) e construită o dată per scară/sămânță și păstrată
+în --data-dir; fiecare rulare lucrează pe o copie, ca scrierile să nu
+modifice datele rulărilor următoare. Pentru fiecare caz se raportează
+p50/p95/p99 și debitul (apeluri/sec, un singur fir), iar cu --out rezultatele
+sunt scrise ca JSON, de comparat cu benchmarks/compare.py.
+
+Rulare: python benchmarks/suite.py --scale small [--iterations 500 --only Post. --out run.json]
+"""
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import datagen
+import migrations
+from database import Comment, Community, Database, Message, Notification, Post, Search, User, Vote
+from datagen import (DEFAULT_SEED, PASSWORD, SCALES, WORDS, DataGenerator, build_database,
+                     community_id, user_id, zipf_weights)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+MANAGERS = (User, Community, Post, Comment, Message, Notification, Vote, Search)
+# Metode publice care nu au sens într-o buclă de benchmark
+EXCLUDED = {
+    'Search.rebuild': "reconstruiește tot indexul FTS",
+}
+BULK_ROWS = 1000
+
+
+class Case(NamedTuple):
+    name: str
+    method: str
+    setup: Callable[['Context'], Callable[[int], object]]
+    max_iterations: Optional[int]
+    writes: bool
+
+
+CASES: List[Case] = []
+
+
+def case(method: str, variant: str = "", max_iterations: Optional[int] = None, writes: bool = False):
+    """Înregistrează un caz; setup(ctx) întoarce funcția cronometrată, apelată cu indicele apelului"""
+    def register(setup):
+        name = f"{method}[{variant}]" if variant else method
+        CASES.append(Case(name, method, setup, max_iterations, writes))
+        return setup
+    return register
+
+
+class Context:
+    def __init__(self, db: Database, generator: DataGenerator, seed: int):
+        self.db = db
+        self.scale = generator.scale
+        self.generator = generator
+        self.rng = random.Random(f"{seed}:suite")
+        self._user_weights = zipf_weights(self.scale.users)
+        self._community_weights = zipf_weights(self.scale.communities)
+        self._threads = None
+
+    def active_user(self) -> str:
+        return user_id(self.rng.choices(range(self.scale.users), cum_weights=self._user_weights)[0])
+
+    def any_user(self) -> str:
+        return user_id(self.rng.randrange(self.scale.users))
+
+    def community(self) -> str:
+        return community_id(self.rng.choices(range(self.scale.communities), cum_weights=self._community_weights)[0])
+
+    def thread(self) -> str:
+        """O postare cu comentarii, aleasă proporțional cu numărul lor (ca traficul real)"""
+        if self._threads is None:
+            with self.db.connection() as conn:
+                rows = conn.execute(
+                    "SELECT post_id, COUNT(*) FROM comments GROUP BY post_id ORDER BY 2 DESC, 1 LIMIT 1000"
+                ).fetchall()
+            self._threads = ([post for post, _ in rows], [count for _, count in rows])
+        posts, counts = self._threads
+        return self.rng.choices(posts, weights=counts)[0]
+
+    def sample(self, table: str, columns: str, count: int, where: str = "1") -> List[tuple]:
+        """Rânduri alese după rowid cu generatorul suitei (ORDER BY random() n-ar fi reproductibil)"""
+        rows = []
+        with self.db.connection() as conn:
+            last = conn.execute(f"SELECT MAX(rowid) FROM {table}").fetchone()[0]
+            if last is None:
+                return rows
+            for _ in range(count * 20):
+                row = conn.execute(f"SELECT {columns} FROM {table} WHERE rowid = ? AND {where}",
+                                   (self.rng.randint(1, last),)).fetchone()
+                if row:
+                    rows.append(row)
+                    if len(rows) == count:
+                        break
+        return rows
+
+    def word(self) -> str:
+        return self.rng.choice(WORDS)
+
+
+# --- utilizatori și comunități ---
+
+@case("User.authenticate", max_iterations=30)
+def _(ctx):
+    users = User(ctx.db)
+    return lambda i: users.authenticate(f"user{int(ctx.active_user()[1:])}", PASSWORD)
+
+
+@case("User.get_user_by_id")
+def _(ctx):
+    users = User(ctx.db)
+    return lambda i: users.get_user_by_id(ctx.active_user())
+
+
+@case("User.get_user_by_username")
+def _(ctx):
+    users = User(ctx.db)
+    return lambda i: users.get_user_by_username(f"user{int(ctx.active_user()[1:])}")
+
+
+@case("User.create_user", max_iterations=30, writes=True)
+def _(ctx):
+    users = User(ctx.db)
+    return lambda i: users.create_user(f"bench{i}", f"bench{i}@example.com", PASSWORD)
+
+
+@case("User.bulk_create", f"{BULK_ROWS} rânduri", max_iterations=10, writes=True)
+def _(ctx):
+    users = User(ctx.db)
+    return lambda i: users.bulk_create(
+        {'username': f"bulk{i}_{n}", 'email': f"bulk{i}_{n}@example.com", 'password_hash': 'x' * 64}
+        for n in range(BULK_ROWS)
+    )
+
+
+@case("Community.get_all_communities", max_iterations=200)
+def _(ctx):
+    communities = Community(ctx.db)
+    return lambda i: communities.get_all_communities()
+
+
+@case("Community.create_community", writes=True)
+def _(ctx):
+    communities = Community(ctx.db)
+    return lambda i: communities.create_community(f"bench{i}", "comunitate de test", ctx.any_user())
+
+
+@case("Community.join_community", writes=True)
+def _(ctx):
+    communities = Community(ctx.db)
+    return lambda i: communities.join_community(ctx.any_user(), ctx.community())
+
+
+@case("Community.leave_community", max_iterations=200, writes=True)
+def _(ctx):
+    communities = Community(ctx.db)
+    memberships = _require(ctx.sample("community_members", "user_id, community_id", 200), "community_members")
+    return lambda i: communities.leave_community(*memberships[i % len(memberships)])
+
+
+@case("Community.get_member_communities")
+def _(ctx):
+    communities = Community(ctx.db)
+    return lambda i: communities.get_member_communities(ctx.active_user())
+
+
+# --- postări ---
+
+@case("Post.get_feed_posts", "new")
+def _(ctx):
+    posts = Post(ctx.db)
+    return lambda i: posts.get_feed_posts(20, sort='new')
+
+
+@case("Post.get_feed_posts", "hot")
+def _(ctx):
+    posts = Post(ctx.db)
+    return lambda i: posts.get_feed_posts(20, sort='hot')
+
+
+@case("Post.get_feed_posts", "top")
+def _(ctx):
+    posts = Post(ctx.db)
+    return lambda i: posts.get_feed_posts(20, sort='top')
+
+
+@case("Post.get_feed_page", "50 pagini")
+def _(ctx):
+    # Parcurge feed-ul pagină cu pagină, ca un cititor care derulează
+    posts = Post(ctx.db)
+    state = {'cursor': None, 'page': 0}
+
+    def next_page(i):
+        if state['page'] == 50:
+            state['cursor'], state['page'] = None, 0
+        page, state['cursor'] = posts.get_feed_page(20, state['cursor'])
+        state['page'] = state['page'] + 1 if state['cursor'] else 50
+        return page
+    return next_page
+
+
+@case("Post.get_community_page")
+def _(ctx):
+    posts = Post(ctx.db)
+    return lambda i: posts.get_community_page(ctx.community(), 20, sort='hot')
+
+
+def _require(rows: list, table: str) -> list:
+    if not rows:
+        raise RuntimeError(f"Tabelul {table} e gol: baza nu are datele cerute de acest caz "
+                           f"(generată de o versiune mai veche a datagen.py?)")
+    return rows
+
+
+def _members_by_count(ctx, most: bool) -> List[str]:
+    with ctx.db.connection() as conn:
+        rows = conn.execute(f'''
+            SELECT user_id FROM community_members GROUP BY user_id
+            ORDER BY COUNT(*) {'DESC' if most else 'ASC'}, user_id LIMIT 50
+        ''').fetchall()
+    return _require([row[0] for row in rows], "community_members")
+
+
+# Costul feed-ului personal nu trebuie să crească cu numărul comunităților utilizatorului
+@case("Post.get_home_page", "puține comunități")
+def _(ctx):
+    posts = Post(ctx.db)
+    users = _members_by_count(ctx, most=False)
+    return lambda i: posts.get_home_page(users[i % len(users)], 20)
+
+
+@case("Post.get_home_page", "multe comunități")
+def _(ctx):
+    posts = Post(ctx.db)
+    users = _members_by_count(ctx, most=True)
+    return lambda i: posts.get_home_page(users[i % len(users)], 20)
+
+
+@case("Post.create_post", writes=True)
+def _(ctx):
+    posts = Post(ctx.db)
+    return lambda i: posts.create_post(f"Postare {i}", "conținut de test", "text", ctx.active_user(), ctx.community())
+
+
+@case("Post.bulk_create", f"{BULK_ROWS} rânduri", max_iterations=5, writes=True)
+def _(ctx):
+    posts = Post(ctx.db)
+    return lambda i: posts.bulk_create(
+        {'title': f"Bulk {i} {n}", 'content': "conținut de test", 'author_id': ctx.any_user(),
+         'community_id': ctx.community()}
+        for n in range(BULK_ROWS)
+    )
+
+
+@case("Post.delete_post", max_iterations=200, writes=True)
+def _(ctx):
+    posts = Post(ctx.db)
+    victims = ctx.sample("posts", "id, author_id", 200)
+    return lambda i: posts.delete_post(*victims[i % len(victims)])
+
+
+# --- comentarii ---
+
+@case("Comment.get_post_comments")
+def _(ctx):
+    comments = Comment(ctx.db)
+    return lambda i: comments.get_post_comments(ctx.thread())
+
+
+@case("Comment.get_post_comments", "max_depth=3")
+def _(ctx):
+    comments = Comment(ctx.db)
+    return lambda i: comments.get_post_comments(ctx.thread(), max_depth=3)
+
+
+@case("Comment.get_thread_page")
+def _(ctx):
+    comments = Comment(ctx.db)
+    return lambda i: comments.get_thread_page(ctx.thread(), max_depth=3, limit=100)
+
+
+@case("Comment.get_comment_subtree")
+def _(ctx):
+    comments = Comment(ctx.db)
+    roots = ctx.sample("comments", "id", 500, where="reply_count > 0")
+    return lambda i: comments.get_comment_subtree(roots[i % len(roots)][0], max_depth=3)
+
+
+@case("Comment.create_comment", writes=True)
+def _(ctx):
+    comments = Comment(ctx.db)
+    targets = ctx.sample("comments", "id, post_id", 500)
+
+    def reply(i):
+        parent, post = targets[i % len(targets)]
+        return comments.create_comment("răspuns de test", ctx.active_user(), post, parent)
+    return reply
+
+
+@case("Comment.bulk_create", f"{BULK_ROWS} rânduri", max_iterations=5, writes=True)
+def _(ctx):
+    comments = Comment(ctx.db)
+
+    def bulk(i):
+        post = ctx.thread()
+        rows = []
+        for n in range(BULK_ROWS):
+            parent = rows[ctx.rng.randrange(n)]['id'] if n and ctx.rng.random() > 0.35 else None
+            rows.append({'id': f"bulk{i}_{n}", 'content': "răspuns de test", 'author_id': ctx.any_user(),
+                         'post_id': post, 'parent_id': parent})
+        return comments.bulk_create(rows)
+    return bulk
+
+
+# --- mesaje ---
+
+@case("Message.get_user_messages")
+def _(ctx):
+    messages = Message(ctx.db)
+    return lambda i: messages.get_user_messages(ctx.active_user())
+
+
+@case("Message.get_inbox")
+def _(ctx):
+    messages = Message(ctx.db)
+    return lambda i: messages.get_inbox(ctx.active_user())
+
+
+@case("Message.get_conversation_page")
+def _(ctx):
+    messages = Message(ctx.db)
+    conversations = ctx.sample("conversations", "id, user_a", 500)
+    return lambda i: messages.get_conversation_page(*conversations[i % len(conversations)])
+
+
+@case("Message.count_unread")
+def _(ctx):
+    messages = Message(ctx.db)
+    return lambda i: messages.count_unread(ctx.active_user())
+
+
+@case("Message.mark_conversation_read", writes=True)
+def _(ctx):
+    messages = Message(ctx.db)
+    conversations = ctx.sample("conversations", "id, user_b", 500, where="unread_b > 0")
+    return lambda i: messages.mark_conversation_read(*conversations[i % len(conversations)])
+
+
+@case("Message.send_message", writes=True)
+def _(ctx):
+    messages = Message(ctx.db)
+
+    def send(i):
+        sender = ctx.active_user()
+        receiver = user_id(ctx.rng.choice(ctx.generator.contacts(int(sender[1:]))))
+        return messages.send_message(sender, receiver, "mesaj de test")
+    return send
+
+
+# --- notificări ---
+
+def _notified_users(ctx) -> List[str]:
+    rows = ctx.sample("notifications", "user_id", 50, "read = 0")
+    return [user for user, in rows] or [ctx.active_user()]
+
+
+@case("Notification.count_unread")
+def _(ctx):
+    notifications = Notification(ctx.db)
+    return lambda i: notifications.count_unread(ctx.active_user())
+
+
+@case("Notification.since", "primul apel")
+def _(ctx):
+    notifications = Notification(ctx.db)
+    users = _notified_users(ctx)
+    return lambda i: notifications.since(users[i % len(users)])
+
+
+@case("Notification.since", "polling fără noutăți")
+def _(ctx):
+    notifications = Notification(ctx.db)
+    users = _notified_users(ctx)
+    cursors = [notifications.since(user)[1] for user in users]
+    return lambda i: notifications.since(users[i % len(users)], cursors[i % len(users)])
+
+
+@case("Notification.get_recent")
+def _(ctx):
+    notifications = Notification(ctx.db)
+    users = _notified_users(ctx)
+    return lambda i: notifications.get_recent(users[i % len(users)])
+
+
+@case("Notification.mark_read", max_iterations=50, writes=True)
+def _(ctx):
+    notifications = Notification(ctx.db)
+    users = _notified_users(ctx)
+    return lambda i: notifications.mark_read(users[i % len(users)])
+
+
+# --- voturi ---
+
+@case("Vote.vote", writes=True)
+def _(ctx):
+    votes = Vote(ctx.db)
+    targets = ctx.sample("posts", "id", 1000)
+    return lambda i: votes.vote(ctx.any_user(), 'post', targets[i % len(targets)][0], ctx.rng.choice((1, -1)))
+
+
+@case("Vote.get_user_votes", "20 postări")
+def _(ctx):
+    votes = Vote(ctx.db)
+    page = [post['id'] for post in Post(ctx.db).get_feed_posts(20)]
+    return lambda i: votes.get_user_votes(ctx.active_user(), 'post', page)
+
+
+# --- căutare ---
+
+@case("Search.search_posts")
+def _(ctx):
+    search = Search(ctx.db)
+    return lambda i: search.search_posts(f"{ctx.word()} {ctx.word()}")
+
+
+@case("Search.search_comments")
+def _(ctx):
+    search = Search(ctx.db)
+    return lambda i: search.search_comments(ctx.word())
+
+
+@case("Search.search_communities")
+def _(ctx):
+    search = Search(ctx.db)
+    return lambda i: search.search_communities(ctx.word()[:3])
+
+
+def public_methods() -> List[str]:
+    return [
+        f"{manager.__name__}.{name}"
+        for manager in MANAGERS
+        for name, member in vars(manager).items()
+        if not name.startswith('_') and inspect.isfunction(member)
+    ]
+
+
+def uncovered_methods() -> List[str]:
+    covered = {c.method for c in CASES}
+    return [method for method in public_methods() if method not in covered and method not in EXCLUDED]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Percentila prin rangul cel mai apropiat"""
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_case(ctx: Context, bench: Case, iterations: int) -> Dict[str, float]:
+    fn = bench.setup(ctx)
+    calls = min(iterations, bench.max_iterations or iterations)
+    for i in range(min(10, max(1, calls // 10))):
+        fn(-1 - i)
+
+    timings = []
+    for i in range(calls):
+        start = time.perf_counter_ns()
+        fn(i)
+        timings.append((time.perf_counter_ns() - start) / 1e6)
+    timings.sort()
+    total = sum(timings)
+    return {
+        'calls': calls,
+        'mean_ms': total / calls,
+        'p50_ms': percentile(timings, 0.50),
+        'p95_ms': percentile(timings, 0.95),
+        'p99_ms': percentile(timings, 0.99),
+        'max_ms': timings[-1],
+        'ops_per_sec': calls / total * 1000 if total else 0.0,
+    }
+
+
+def dataset(scale: str, seed: int, data_dir: str) -> str:
+    os.makedirs(data_dir, exist_ok=True)
+    # Schema și generatorul fac parte din cheie: după o migrare sau o schimbare în datagen.py
+    # (ex. membrii comunităților), o bază veche din cache nu mai e refolosită
+    with open(datagen.__file__, 'rb') as source:
+        generator = hashlib.sha256(source.read()).hexdigest()[:8]
+    path = os.path.join(data_dir, f"{scale}-{seed}-v{migrations.LATEST_VERSION}-{generator}.db")
+    if not os.path.exists(path):
+        print(f"Generare date {scale} (sămânța {seed})...", file=sys.stderr)
+        build_database(path, SCALES[scale], seed)
+    return path
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=list(SCALES), default="tiny")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--iterations", type=int, default=300, help="apeluri per caz (unele cazuri au o limită)")
+    parser.add_argument("--only", action="append", default=[], help="rulează doar cazurile care încep cu acest prefix")
+    parser.add_argument("--read-only", action="store_true", help="sare peste cazurile care scriu")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--out", help="fișierul JSON cu rezultatele")
+    args = parser.parse_args()
+
+    missing = uncovered_methods()
+    if missing:
+        print(f"Atenție: metode publice fără benchmark: {', '.join(missing)}", file=sys.stderr)
+
+    selected = [c for c in CASES
+                if (not args.only or any(c.name.startswith(prefix) for prefix in args.only))
+                and not (args.read_only and c.writes)]
+    # Citirile întâi: văd exact datele generate, nemodificate de cazurile de scriere
+    selected.sort(key=lambda c: c.writes)
+
+    source = dataset(args.scale, args.seed, args.data_dir)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        shutil.copyfile(source, path)
+        db = Database(path)
+        db.init_database()
+        ctx = Context(db, DataGenerator(SCALES[args.scale], args.seed), args.seed)
+
+        print(f"{'caz':<42} {'apeluri':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/sec':>10}")
+        for bench in selected:
+            result = run_case(ctx, bench, args.iterations)
+            results[bench.name] = result
+            print(f"{bench.name:<42} {result['calls']:>7} {result['p50_ms']:>9.3f} {result['p95_ms']:>9.3f} "
+                  f"{result['p99_ms']:>9.3f} {result['ops_per_sec']:>10,.0f}")
+        db.close()
+
+    if args.out:
+        report = {
+            'meta': {
+                'scale': args.scale,
+                'seed': args.seed,
+                'iterations': args.iterations,
+                'commit': git_commit(),
+                'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'platform': platform.platform(),
+                'uncovered': missing,
+            },
+            'results': results,
+        }
+        with open(args.out, "w", encoding="utf-8") as out:
+            json.dump(report, out, indent=2, ensure_ascii=False)
+        print(f"Rezultate scrise în {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
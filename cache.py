@@ -0,0 +1,209 @@
+"""Cache read-through partajat pentru managerii din database.py.
+
+O singură instanță QueryCache per proces (în app.py prin st.cache_resource) e
+folosită de toate sesiunile. Intrările sunt limitate ca număr (LRU) și ca
+vârstă (TTL) și poartă etichete: o scriere invalidează exact etichetele pe
+care le afectează (ex. create_post -> 'feed'), nu tot cache-ul.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, List, Optional
+
+from database import Database, User, Community, Post
+from passwords import PasswordHasher
+from records import CommunityRecord, Record, UserRecord
+
+_MISSING = object()
+
+
+class QueryCache:
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._tags: Dict[str, set] = {}
+        # Generația fiecărei etichete: o încărcare pornită înainte de o invalidare nu se mai salvează
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value, tags: Iterable[str] = (), ttl: Optional[float] = None,
+            generations: Optional[Dict[str, int]] = None):
+        tags = tuple(tags)
+        with self._lock:
+            if generations is not None and any(
+                self._generations.get(tag, 0) != generation for tag, generation in generations.items()
+            ):
+                # Datele au fost invalidate cât timp se încărcau
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable, tags: Iterable[str] = (), ttl: Optional[float] = None):
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        tags = tuple(tags)
+        with self._lock:
+            generations = {tag: self._generations.get(tag, 0) for tag in tags}
+        value = loader()
+        self.set(key, value, tags, ttl, generations)
+        return value
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+
+    def invalidate_tag(self, tag: str):
+        with self._lock:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            for tag in self._tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
+
+    def _remove(self, key: Hashable):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+def _invalidate_after_commit(db: Database, cache: QueryCache, tag: str):
+    # Invalidată înainte de COMMIT, o etichetă ar lăsa un cititor să pună în cache, sub generația
+    # nouă, datele de dinainte de scriere (ex. scrierile grupate de aio.AsyncDataAccess)
+    db.after_commit(lambda: cache.invalidate_tag(tag))
+
+
+def _copy_rows(rows: List[Record]) -> List[Record]:
+    # Rândurile din cache sunt partajate între sesiuni; fiecare apelant primește copii
+    return [row.copy() for row in rows]
+
+
+class CachedUser(User):
+    def __init__(self, db: Database, cache: QueryCache, hasher: Optional[PasswordHasher] = None):
+        super().__init__(db, hasher)
+        self.cache = cache
+
+    def get_user_by_id(self, user_id: str) -> Optional[UserRecord]:
+        user = self.cache.get_or_load(
+            ('user', user_id), lambda: User.get_user_by_id(self, user_id), tags=(f'user:{user_id}',)
+        )
+        return user.copy() if user else None
+
+
+class CachedCommunity(Community):
+    def __init__(self, db: Database, cache: QueryCache):
+        super().__init__(db)
+        self.cache = cache
+
+    def create_community(self, name: str, description: str, creator_id: str) -> bool:
+        created = super().create_community(name, description, creator_id)
+        if created:
+            _invalidate_after_commit(self.db, self.cache, 'communities')
+        return created
+
+    def join_community(self, user_id: str, community_id: str) -> bool:
+        joined = super().join_community(user_id, community_id)
+        if joined:
+            _invalidate_after_commit(self.db, self.cache, 'communities')
+        return joined
+
+    def leave_community(self, user_id: str, community_id: str) -> bool:
+        left = super().leave_community(user_id, community_id)
+        if left:
+            _invalidate_after_commit(self.db, self.cache, 'communities')
+        return left
+
+    def get_all_communities(self) -> List[CommunityRecord]:
+        return _copy_rows(self.cache.get_or_load(
+            ('communities',), lambda: Community.get_all_communities(self), tags=('communities',)
+        ))
+
+
+class CachedPost(Post):
+    # Voturile nu invalidează feed-ul (ar anula cache-ul la fiecare click); TTL-ul scurt
+    # limitează cât de vechi pot fi scorurile afișate
+    FEED_TTL = 10.0
+
+    def __init__(self, db: Database, cache: QueryCache):
+        super().__init__(db)
+        self.cache = cache
+
+    def create_post(self, title: str, content: str, post_type: str, author_id: str, community_id: str) -> bool:
+        created = super().create_post(title, content, post_type, author_id, community_id)
+        _invalidate_after_commit(self.db, self.cache, 'feed')
+        return created
+
+    def delete_post(self, post_id: str, user_id: str) -> bool:
+        deleted = super().delete_post(post_id, user_id)
+        if deleted:
+            _invalidate_after_commit(self.db, self.cache, 'feed')
+        return deleted
+
+    def get_feed_page(self, limit: int = 20, cursor: Optional[str] = None,
+                      sort: str = 'new', window: str = 'all'):
+        posts, next_cursor = self.cache.get_or_load(
+            ('feed', limit, cursor, sort, window),
+            lambda: Post.get_feed_page(self, limit, cursor, sort, window),
+            tags=('feed',), ttl=self.FEED_TTL
+        )
+        return _copy_rows(posts), next_cursor
+
+    def get_community_page(self, community_id: str, limit: int = 20, cursor: Optional[str] = None,
+                           sort: str = 'new', window: str = 'all'):
+        posts, next_cursor = self.cache.get_or_load(
+            ('community_feed', community_id, limit, cursor, sort, window),
+            lambda: Post.get_community_page(self, community_id, limit, cursor, sort, window),
+            tags=('feed',), ttl=self.FEED_TTL
+        )
+        return _copy_rows(posts), next_cursor
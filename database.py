@@ -1,173 +1,388 @@
 import sqlite3
-import hashlib
 import uuid
-from datetime import datetime
-from typing import List, Dict, Optional
+import base64
+import json
+import re
+import queue
+import itertools
+import pathlib
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta
+from typing import List, Dict, Iterable, NamedTuple, Optional, Set, Tuple
+
+import diagnostics
+import migrations
+import passwords
+import ranking
+from records import (CommentRecord, CommentSearchRecord, CommunityRecord, ConversationRecord, MessageRecord,
+                     NotificationRecord, PostRecord, PostSearchRecord, UserRecord)
+
+# Pragma-uri aplicate pe fiecare conexiune nouă din pool
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+)
+
+# Câte tranzacții de scriere recente își păstrează așteptarea lock-ului (vezi Database.write_waits)
+WRITE_WAIT_SAMPLES = 4096
+
+def encode_cursor(*values) -> str:
+    """Codifică cheia ultimului rând dintr-o pagină într-un token opac"""
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(token: str) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Cursor invalid")
+    if not isinstance(values, list):
+        raise ValueError("Cursor invalid")
+    return values
+
+# Sortările feed-ului și coloana (indexată) după care ordonează fiecare
+FEED_SORTS = {
+    'new': 'p.created_at',
+    'hot': 'p.hot_rank',
+    'top': 'p.score',
+    'controversial': 'p.controversy',
+}
+
+# Ferestrele de timp pentru sortarea 'top', în zile (None = oricând)
+TOP_WINDOWS = {'day': 1, 'week': 7, 'month': 30, 'year': 365, 'all': None}
+
+def _utc_now() -> str:
+    # Același format ca CURRENT_TIMESTAMP din SQLite
+    return datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+
+# Jurnalul de mutații (migrarea 11); proiecțiile care îl citesc sunt în events.py
+EVENT_SQL = "INSERT INTO events (kind, entity_id, actor_id, data, created_at) VALUES (?, ?, ?, ?, ?)"
+
+def event_row(kind: str, entity_id: str, actor_id: Optional[str], data: Optional[Dict] = None,
+              created_at: Optional[str] = None) -> tuple:
+    return kind, entity_id, actor_id, migrations.encode_event_data(data), created_at or _utc_now()
+
+def record_event(conn: sqlite3.Connection, kind: str, entity_id: str, actor_id: Optional[str],
+                 data: Optional[Dict] = None, created_at: Optional[str] = None):
+    """Adaugă mutația în jurnal, în tranzacția care a făcut-o: jurnalul și tabelele nu se pot despărți"""
+    conn.execute(EVENT_SQL, event_row(kind, entity_id, actor_id, data, created_at))
 
 class Database:
-    def __init__(self, db_path="reddit_clone.db"):
+    def __init__(self, db_path="reddit_clone.db", pool_size: int = 8, busy_timeout: float = 5.0,
+                 tracer: Optional[diagnostics.QueryTracer] = None, read_only: bool = False, writer_gate=None):
         self.db_path = db_path
-        self.init_database()
+        self.pool_size = pool_size
+        self.busy_timeout = busy_timeout
+        # Cu tracer, fiecare instrucțiune e cronometrată (vezi diagnostics.py)
+        self.tracer = tracer
+        # Conexiuni read-only (mode=ro): schema trebuie să fi fost migrată de o instanță de scriere
+        self.read_only = read_only
+        # Context manager care limitează tranzacțiile de scriere simultane (vezi ratelimit.WriterGate)
+        self.writer_gate = writer_gate
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._local = threading.local()
+        # Protejează _closed și pool-ul la close(): o conexiune eliberată după close() nu mai intră în pool
+        self._lock = threading.Lock()
+        self._closed = False
+        # (momentul perf_counter, ms) per tranzacție de scriere: cât a așteptat poarta și BEGIN IMMEDIATE
+        self._write_waits = deque(maxlen=WRITE_WAIT_SAMPLES)
+        if not read_only:
+            self.init_database()
+    
+    def _connect(self) -> sqlite3.Connection:
+        # timeout setează busy handler-ul: așteptăm lock-ul în loc să eșuăm imediat
+        factory = diagnostics.TracedConnection if self.tracer else sqlite3.Connection
+        if self.read_only:
+            target = pathlib.Path(self.db_path).resolve().as_uri() + "?mode=ro"
+            conn = sqlite3.connect(target, timeout=self.busy_timeout, check_same_thread=False,
+                                   factory=factory, uri=True)
+        else:
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, check_same_thread=False, factory=factory)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        if self.tracer:
+            conn.tracer = self.tracer
+        ranking.register_functions(conn)
+        return conn
+    
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._connect()
+    
+    def _release(self, conn: sqlite3.Connection):
+        with self._lock:
+            if not self._closed:
+                try:
+                    self._pool.put_nowait(conn)
+                    return
+                except queue.Full:
+                    pass
+        conn.close()
+    
+    @contextmanager
+    def connection(self):
+        """Împrumută o conexiune din pool; commit la ieșire, rollback la excepție"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            # Apel imbricat pe același fir: refolosim conexiunea și tranzacția curentă
+            yield conn
+            return
+        
+        conn = self._acquire()
+        self._local.conn = conn
+        self._local.after_commit = []
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            callbacks, self._local.after_commit = self._local.after_commit, []
+            self._local.conn = None
+            self._release(conn)
+        for callback in callbacks:
+            callback()
+    
+    def after_commit(self, callback):
+        """Rulează callback după commit-ul tranzacției curente a firului (imediat, dacă nu e niciuna)"""
+        if getattr(self._local, 'conn', None) is None:
+            callback()
+        else:
+            # La rollback, callback-urile se aruncă odată cu tranzacția
+            self._local.after_commit.append(callback)
+    
+    @contextmanager
+    def transaction(self):
+        """Ca connection(), dar ia lock-ul de scriere de la început (BEGIN IMMEDIATE)"""
+        # Doar tranzacția exterioară așteaptă la poartă; cele imbricate sunt deja înăuntru
+        outermost = getattr(self._local, 'conn', None) is None
+        gate = self.writer_gate if self.writer_gate is not None and outermost else nullcontext()
+        start = time.perf_counter()
+        locked = False
+        try:
+            with gate, self.connection() as conn:
+                if not conn.in_transaction:
+                    # Fără upgrade read->write în mijlocul tranzacției, care ar ocoli busy_timeout
+                    conn.execute("BEGIN IMMEDIATE")
+                locked = True
+                if outermost:
+                    self._record_write_wait(start)
+                yield conn
+        except sqlite3.OperationalError:
+            # Timeout la poartă sau pe lock: o așteptare eșuată e tot o blocare a scriitorului
+            if outermost and not locked:
+                self._record_write_wait(start)
+            raise
+    
+    def _record_write_wait(self, start: float):
+        now = time.perf_counter()
+        self._write_waits.append((now, (now - start) * 1000))
+    
+    def write_waits(self, since: float, until: Optional[float] = None) -> List[float]:
+        """Așteptările (ms) tranzacțiilor de scriere din proces care au obținut lock-ul între since și until
+        (momente time.perf_counter()); doar ultimele WRITE_WAIT_SAMPLES sunt păstrate"""
+        until = time.perf_counter() if until is None else until
+        # list() copiază deque-ul dintr-o bucată, sub GIL, chiar dacă alte fire adaugă între timp
+        return [waited for at, waited in list(self._write_waits) if since <= at <= until]
+    
+    def close(self):
+        """Închide conexiunile libere; cele împrumutate de alte fire se închid când sunt eliberate"""
+        idle = []
+        with self._lock:
+            self._closed = True
+            while True:
+                try:
+                    idle.append(self._pool.get_nowait())
+                except queue.Empty:
+                    break
+        if idle and not self.read_only:
+            # Actualizează statisticile planificatorului (ex. pentru indexurile acoperitoare), pe o conexiune
+            # scoasă din pool de acest fir: niciun alt fir nu o mai poate folosi
+            try:
+                idle[0].execute("PRAGMA optimize")
+            except sqlite3.Error:
+                pass
+        for conn in idle:
+            conn.close()
     
     def init_database(self):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Tabela utilizatori
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id TEXT PRIMARY KEY,
-                username TEXT UNIQUE NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                karma INTEGER DEFAULT 0,
-                bio TEXT DEFAULT ''
-            )
-        ''')
-        
-        # Tabela comunități
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS communities (
-                id TEXT PRIMARY KEY,
-                name TEXT UNIQUE NOT NULL,
-                description TEXT,
-                creator_id TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                members_count INTEGER DEFAULT 1,
-                FOREIGN KEY (creator_id) REFERENCES users (id)
-            )
-        ''')
-        
-        # Tabela postări
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS posts (
-                id TEXT PRIMARY KEY,
-                title TEXT NOT NULL,
-                content TEXT,
-                post_type TEXT DEFAULT 'text',
-                author_id TEXT,
-                community_id TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                upvotes INTEGER DEFAULT 0,
-                downvotes INTEGER DEFAULT 0,
-                FOREIGN KEY (author_id) REFERENCES users (id),
-                FOREIGN KEY (community_id) REFERENCES communities (id)
-            )
-        ''')
-        
-        # Tabela comentarii
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS comments (
-                id TEXT PRIMARY KEY,
-                content TEXT NOT NULL,
-                author_id TEXT,
-                post_id TEXT,
-                parent_id TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                upvotes INTEGER DEFAULT 0,
-                downvotes INTEGER DEFAULT 0,
-                FOREIGN KEY (author_id) REFERENCES users (id),
-                FOREIGN KEY (post_id) REFERENCES posts (id),
-                FOREIGN KEY (parent_id) REFERENCES comments (id)
-            )
-        ''')
-        
-        # Tabela mesaje private
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS messages (
-                id TEXT PRIMARY KEY,
-                sender_id TEXT,
-                receiver_id TEXT,
-                content TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                is_read BOOLEAN DEFAULT FALSE,
-                FOREIGN KEY (sender_id) REFERENCES users (id),
-                FOREIGN KEY (receiver_id) REFERENCES users (id)
-            )
-        ''')
-        
-        # Tabela membri comunități
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS community_members (
-                user_id TEXT,
-                community_id TEXT,
-                joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                PRIMARY KEY (user_id, community_id),
-                FOREIGN KEY (user_id) REFERENCES users (id),
-                FOREIGN KEY (community_id) REFERENCES communities (id)
-            )
-        ''')
+        # Schema la zi: nu mai rulăm niciun DDL la pornire
+        with self.connection() as conn:
+            if migrations.current_version(conn) >= migrations.LATEST_VERSION:
+                return
         
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            migrations.migrate(conn)
     
     def get_connection(self):
-        return sqlite3.connect(self.db_path)
+        # Păstrat pentru compatibilitate; codul nou folosește connection()/transaction()
+        return self._connect()
+
+# Rânduri per tranzacție la importurile în masă
+BULK_CHUNK_SIZE = 1000
+
+class BulkResult(NamedTuple):
+    inserted: int
+    # (indexul rândului în intrare, motivul) pentru fiecare rând respins
+    failures: List[Tuple[int, str]]
+
+def _chunks(iterable: Iterable, size: int):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def bulk_insert(db: Database, sql: str, rows: Iterable, prepare, chunk_size: int = BULK_CHUNK_SIZE,
+                after_chunk=None) -> BulkResult:
+    """Inserează rândurile cu executemany, câte o tranzacție per bucată.
+    
+    prepare(index, row, conn, chunk_state) transformă un rând de intrare în parametrii SQL
+    (sau ridică ValueError/KeyError ca să-l respingă). Dacă o bucată lovește o
+    constrângere, e reluată rând cu rând, ca rândurile greșite să fie raportate fără
+    să oprească lotul. after_chunk(conn, inserted_params) rulează în aceeași tranzacție.
+    """
+    inserted = 0
+    failures: List[Tuple[int, str]] = []
+    
+    for chunk in _chunks(enumerate(rows), chunk_size):
+        with db.transaction() as conn:
+            state = {}
+            prepared = []
+            for index, row in chunk:
+                try:
+                    prepared.append((index, prepare(index, row, conn, state)))
+                except (KeyError, ValueError, TypeError) as error:
+                    failures.append((index, f"{type(error).__name__}: {error}"))
+            
+            conn.execute("SAVEPOINT bulk_chunk")
+            try:
+                conn.executemany(sql, [params for _, params in prepared])
+                conn.execute("RELEASE bulk_chunk")
+                ok = [params for _, params in prepared]
+            except sqlite3.IntegrityError:
+                conn.execute("ROLLBACK TO bulk_chunk")
+                conn.execute("RELEASE bulk_chunk")
+                ok = []
+                for index, params in prepared:
+                    try:
+                        conn.execute(sql, params)
+                        ok.append(params)
+                    except sqlite3.IntegrityError as error:
+                        failures.append((index, str(error)))
+            
+            if after_chunk is not None:
+                after_chunk(conn, ok)
+            inserted += len(ok)
+    
+    return BulkResult(inserted, failures)
 
 class User:
-    def __init__(self, db: Database):
+    def __init__(self, db: Database, hasher: Optional[passwords.PasswordHasher] = None):
         self.db = db
+        # Fără hasher dedicat, KDF-ul rulează în firul apelantului
+        self.hasher = hasher or passwords.PasswordHasher(workers=0)
     
     def create_user(self, username: str, email: str, password: str) -> bool:
+        return self.insert_user(str(uuid.uuid4()), username, email, self.hasher.hash(password))
+    
+    def insert_user(self, user_id: str, username: str, email: str, password_hash: str) -> bool:
+        """Partea de scriere din create_user, cu parola deja trecută prin KDF"""
         try:
-            user_id = str(uuid.uuid4())
-            password_hash = hashlib.sha256(password.encode()).hexdigest()
-            
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO users (id, username, email, password_hash) VALUES (?, ?, ?, ?)",
-                (user_id, username, email, password_hash)
-            )
-            conn.commit()
-            conn.close()
+            with self.db.transaction() as conn:
+                conn.execute(
+                    "INSERT INTO users (id, username, email, password_hash) VALUES (?, ?, ?, ?)",
+                    (user_id, username, email, password_hash)
+                )
+                record_event(conn, 'user_created', user_id, user_id)
             return True
         except sqlite3.IntegrityError:
             return False
     
-    def authenticate(self, username: str, password: str) -> Optional[Dict]:
-        password_hash = hashlib.sha256(password.encode()).hexdigest()
+    def bulk_create(self, users: Iterable[Dict], chunk_size: int = BULK_CHUNK_SIZE) -> BulkResult:
+        """Import în masă: fiecare rând are username, email și fie password_hash, fie password.
         
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id, username, email, karma, bio FROM users WHERE username = ? AND password_hash = ?",
-            (username, password_hash)
-        )
-        user = cursor.fetchone()
-        conn.close()
+        password_hash (ex. SHA-256 dintr-un forum vechi) e păstrat ca atare și refăcut la
+        primul login; password e trecut prin KDF, deci e mult mai lent.
+        """
+        def prepare(index, user, conn, state):
+            password_hash = user.get('password_hash') or self.hasher.hash(user['password'])
+            return (user.get('id') or str(uuid.uuid4()), user['username'], user['email'], password_hash,
+                    user.get('created_at') or _utc_now(), user.get('karma', 0), user.get('bio', ''))
         
-        if user:
-            return {
-                'id': user[0],
-                'username': user[1],
-                'email': user[2],
-                'karma': user[3],
-                'bio': user[4]
-            }
-        return None
+        def log_events(conn, inserted):
+            conn.executemany(EVENT_SQL, [event_row('user_created', params[0], params[0], created_at=params[4])
+                                         for params in inserted])
+        
+        return bulk_insert(self.db, '''
+            INSERT INTO users (id, username, email, password_hash, created_at, karma, bio)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', users, prepare, chunk_size, after_chunk=log_events)
     
-    def get_user_by_id(self, user_id: str) -> Optional[Dict]:
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id, username, email, karma, bio, created_at FROM users WHERE id = ?",
-            (user_id,)
-        )
-        user = cursor.fetchone()
-        conn.close()
+    def authenticate(self, username: str, password: str) -> Optional[UserRecord]:
+        user, rehash = self.verify_credentials(username, password)
+        if rehash is not None:
+            self.replace_password_hash(user['id'], *rehash)
+        return user
+    
+    def verify_credentials(self, username: str, password: str) -> Tuple[Optional[UserRecord], Optional[Tuple[str, str]]]:
+        """Doar citiri și KDF: utilizatorul și, dacă hash-ul trebuie refăcut, (hash vechi, hash nou)"""
+        with self.db.connection() as conn:
+            user = conn.execute(
+                "SELECT id, username, email, karma, bio, created_at, password_hash FROM users WHERE username = ?",
+                (username,)
+            ).fetchone()
         
-        if user:
-            return {
-                'id': user[0],
-                'username': user[1],
-                'email': user[2],
-                'karma': user[3],
-                'bio': user[4],
-                'created_at': user[5]
-            }
-        return None
+        if not user:
+            # Același cost ca pentru un utilizator existent: timpul nu trădează ce nume există
+            self.hasher.verify(password, self.hasher.dummy_hash())
+            return None, None
+        password_hash = user[6]
+        if not self.hasher.verify(password, password_hash):
+            return None, None
+        
+        rehash = None
+        if self.hasher.needs_rehash(password_hash):
+            # Hash vechi (SHA-256) sau cost schimbat: îl refacem cât timp avem parola în clar
+            rehash = (password_hash, self.hasher.hash(password))
+        return UserRecord(*user[:6]), rehash
+    
+    def replace_password_hash(self, user_id: str, old_hash: str, new_hash: str):
+        # Condiționat de hash-ul vechi: o schimbare de parolă între timp nu e suprascrisă
+        with self.db.transaction() as conn:
+            conn.execute(
+                "UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?",
+                (new_hash, user_id, old_hash)
+            )
+    
+    def get_user_by_id(self, user_id: str) -> Optional[UserRecord]:
+        with self.db.connection() as conn:
+            user = conn.execute(
+                "SELECT id, username, email, karma, bio, created_at FROM users WHERE id = ?",
+                (user_id,)
+            ).fetchone()
+        
+        return UserRecord(*user) if user else None
+    
+    def get_user_by_username(self, username: str) -> Optional[UserRecord]:
+        with self.db.connection() as conn:
+            user = conn.execute(
+                "SELECT id, username, email, karma, bio, created_at FROM users WHERE username = ?",
+                (username,)
+            ).fetchone()
+        
+        return UserRecord(*user) if user else None
 
 class Community:
     def __init__(self, db: Database):
@@ -177,42 +392,97 @@ class Community:
         try:
             community_id = str(uuid.uuid4())
             
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO communities (id, name, description, creator_id) VALUES (?, ?, ?, ?)",
-                (community_id, name, description, creator_id)
-            )
-            # Adaugă creatorul ca membru
-            cursor.execute(
-                "INSERT INTO community_members (user_id, community_id) VALUES (?, ?)",
-                (creator_id, community_id)
-            )
-            conn.commit()
-            conn.close()
+            with self.db.transaction() as conn:
+                # members_count e ținut de triggerele pe community_members
+                conn.execute(
+                    "INSERT INTO communities (id, name, description, creator_id, members_count) VALUES (?, ?, ?, ?, 0)",
+                    (community_id, name, description, creator_id)
+                )
+                # Adaugă creatorul ca membru
+                conn.execute(
+                    "INSERT INTO community_members (user_id, community_id) VALUES (?, ?)",
+                    (creator_id, community_id)
+                )
+                record_event(conn, 'community_created', community_id, creator_id)
+                record_event(conn, 'member_joined', community_id, creator_id)
             return True
         except sqlite3.IntegrityError:
             return False
     
-    def get_all_communities(self) -> List[Dict]:
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id, name, description, members_count, created_at FROM communities ORDER BY members_count DESC"
-        )
-        communities = cursor.fetchall()
-        conn.close()
+    def get_all_communities(self) -> List[CommunityRecord]:
+        with self.db.connection() as conn:
+            communities = conn.execute(
+                "SELECT id, name, description, members_count, created_at FROM communities ORDER BY members_count DESC"
+            ).fetchall()
+        
+        return [CommunityRecord(*comm) for comm in communities]
+    
+    def join_community(self, user_id: str, community_id: str) -> bool:
+        """False dacă utilizatorul era deja membru"""
+        with self.db.transaction() as conn:
+            joined = conn.execute(
+                "INSERT OR IGNORE INTO community_members (user_id, community_id) VALUES (?, ?)",
+                (user_id, community_id)
+            ).rowcount
+            if not joined:
+                return False
+            record_event(conn, 'member_joined', community_id, user_id)
+            # Comunitățile cu fan-out: timeline-ul membrului nou primește ultimele postări
+            conn.execute('''
+                INSERT OR IGNORE INTO timelines (user_id, created_at, post_id, community_id)
+                SELECT ?, created_at, id, community_id FROM posts
+                WHERE community_id = ? AND (SELECT pull_feed FROM communities WHERE id = ?) = 0
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?
+            ''', (user_id, community_id, community_id, migrations.TIMELINE_BACKFILL_POSTS))
+        return True
+    
+    def leave_community(self, user_id: str, community_id: str) -> bool:
+        with self.db.transaction() as conn:
+            left = conn.execute(
+                "DELETE FROM community_members WHERE user_id = ? AND community_id = ?", (user_id, community_id)
+            ).rowcount
+            if left:
+                conn.execute("DELETE FROM timelines WHERE user_id = ? AND community_id = ?", (user_id, community_id))
+                record_event(conn, 'member_left', community_id, user_id)
+        return bool(left)
+    
+    def get_member_communities(self, user_id: str) -> Set[str]:
+        with self.db.connection() as conn:
+            rows = conn.execute("SELECT community_id FROM community_members WHERE user_id = ?", (user_id,)).fetchall()
+        return {row[0] for row in rows}
+    
+    def get_communities(self, community_ids: List[str]) -> List[CommunityRecord]:
+        """Comunitățile cu id-urile date, în aceeași ordine; id-urile inexistente lipsesc"""
+        if not community_ids:
+            return []
+        placeholders = ', '.join('?' * len(community_ids))
+        with self.db.connection() as conn:
+            rows = conn.execute(
+                f"SELECT id, name, description, members_count, created_at FROM communities WHERE id IN ({placeholders})",
+                list(community_ids)
+            ).fetchall()
         
-        return [
-            {
-                'id': comm[0],
-                'name': comm[1],
-                'description': comm[2],
-                'members_count': comm[3],
-                'created_at': comm[4]
-            }
-            for comm in communities
-        ]
+        by_id = {row[0]: CommunityRecord(*row) for row in rows}
+        return [by_id[community_id] for community_id in community_ids if community_id in by_id]
+    
+    def get_largest_communities(self, limit: int) -> List[CommunityRecord]:
+        # Pe idx_communities_members: citește doar primele `limit` rânduri
+        with self.db.connection() as conn:
+            rows = conn.execute(
+                "SELECT id, name, description, members_count, created_at FROM communities "
+                "ORDER BY members_count DESC LIMIT ?", (limit,)
+            ).fetchall()
+        
+        return [CommunityRecord(*row) for row in rows]
+
+# Fan-out la scriere: o postare dintr-o comunitate mică intră în timeline-ul fiecărui membru
+FAN_OUT_SQL = '''
+    INSERT OR IGNORE INTO timelines (user_id, created_at, post_id, community_id)
+    SELECT m.user_id, ?, ?, m.community_id
+    FROM community_members m JOIN communities c ON c.id = m.community_id
+    WHERE m.community_id = ? AND c.pull_feed = 0
+'''
 
 class Post:
     def __init__(self, db: Database):
@@ -220,66 +490,188 @@ class Post:
     
     def create_post(self, title: str, content: str, post_type: str, author_id: str, community_id: str) -> bool:
         post_id = str(uuid.uuid4())
+        created_at = _utc_now()
         
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO posts (id, title, content, post_type, author_id, community_id) VALUES (?, ?, ?, ?, ?, ?)",
-            (post_id, title, content, post_type, author_id, community_id)
-        )
-        conn.commit()
-        conn.close()
+        with self.db.transaction() as conn:
+            conn.execute('''
+                INSERT INTO posts (id, title, content, post_type, author_id, community_id, created_at, hot_rank)
+                VALUES (?, ?, ?, ?, ?, ?, ?, hot_score(0, 0, ?))
+            ''', (post_id, title, content, post_type, author_id, community_id, created_at, created_at))
+            conn.execute(FAN_OUT_SQL, (created_at, post_id, community_id))
+            record_event(conn, 'post_created', post_id, author_id, {'community': community_id}, created_at)
         return True
     
-    def get_feed_posts(self, limit: int = 20) -> List[Dict]:
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT p.id, p.title, p.content, p.post_type, p.created_at, p.upvotes, p.downvotes,
-                   u.username, c.name as community_name, p.author_id
-            FROM posts p
-            JOIN users u ON p.author_id = u.id
-            JOIN communities c ON p.community_id = c.id
-            ORDER BY p.created_at DESC
-            LIMIT ?
-        ''', (limit,))
-        posts = cursor.fetchall()
-        conn.close()
+    def bulk_create(self, posts: Iterable[Dict], chunk_size: int = BULK_CHUNK_SIZE) -> BulkResult:
+        """Import în masă; scorurile de ranking se calculează la inserare, ca la create_post"""
+        def prepare(index, post, conn, state):
+            upvotes, downvotes = int(post.get('upvotes', 0)), int(post.get('downvotes', 0))
+            created_at = post.get('created_at') or _utc_now()
+            return (post.get('id') or str(uuid.uuid4()), post['title'], post.get('content', ''),
+                    post.get('post_type', 'text'), post['author_id'], post['community_id'], created_at,
+                    upvotes, downvotes, upvotes - downvotes, ranking.hot_score(upvotes, downvotes, created_at),
+                    ranking.controversy_score(upvotes, downvotes))
+        
+        def fan_out_and_log(conn, inserted):
+            conn.executemany(FAN_OUT_SQL, [(params[6], params[0], params[5]) for params in inserted])
+            events = []
+            for params in inserted:
+                data = {'community': params[5]}
+                if params[7] or params[8]:
+                    # Voturile importate fără rânduri în votes intră în eveniment ca up/down inițiale
+                    data.update(up=params[7], down=params[8])
+                events.append(event_row('post_created', params[0], params[4], data, params[6]))
+            conn.executemany(EVENT_SQL, events)
         
-        return [
-            {
-                'id': post[0],
-                'title': post[1],
-                'content': post[2],
-                'post_type': post[3],
-                'created_at': post[4],
-                'upvotes': post[5],
-                'downvotes': post[6],
-                'author': post[7],
-                'community': post[8],
-                'author_id': post[9]
-            }
-            for post in posts
-        ]
+        return bulk_insert(self.db, '''
+            INSERT INTO posts (id, title, content, post_type, author_id, community_id, created_at,
+                               upvotes, downvotes, score, hot_rank, controversy)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', posts, prepare, chunk_size, after_chunk=fan_out_and_log)
+    
+    def get_feed_posts(self, limit: int = 20, cursor: Optional[str] = None,
+                       sort: str = 'new', window: str = 'all') -> List[PostRecord]:
+        return self.get_feed_page(limit, cursor, sort, window)[0]
+    
+    def get_feed_page(self, limit: int = 20, cursor: Optional[str] = None,
+                      sort: str = 'new', window: str = 'all') -> Tuple[List[PostRecord], Optional[str]]:
+        """Returnează o pagină din feed și cursorul paginii următoare (None la final)"""
+        return self._query_page("", (), limit, cursor, sort, window)
+    
+    def get_community_page(self, community_id: str, limit: int = 20, cursor: Optional[str] = None,
+                           sort: str = 'new', window: str = 'all') -> Tuple[List[PostRecord], Optional[str]]:
+        return self._query_page("p.community_id = ?", (community_id,), limit, cursor, sort, window)
+    
+    def get_home_page(self, user_id: str, limit: int = 20,
+                      cursor: Optional[str] = None) -> Tuple[List[PostRecord], Optional[str]]:
+        """Feed-ul personal, cele mai noi primele: timeline-ul utilizatorului plus comunitățile mari.
+        
+        Costul unei pagini nu depinde de numărul comunităților utilizatorului: timeline-ul
+        e un range scan, iar comunitățile mari (pull_feed) sunt puține pe tot site-ul.
+        """
+        after, after_params = "", ()
+        if cursor:
+            cursor_sort, created_at, post_id = decode_cursor(cursor)
+            if cursor_sort != 'home':
+                raise ValueError("Cursorul aparține altei sortări")
+            after, after_params = "AND (created_at, {id}) < (?, ?)", (created_at, post_id)
+        
+        with self.db.connection() as conn:
+            # CROSS JOIN fixează ordinea: comunitățile mari din indexul parțial, apoi o căutare
+            # în cheia primară a membrilor, nu toate apartenențele utilizatorului
+            pulled = [row[0] for row in conn.execute('''
+                SELECT c.id FROM communities c
+                CROSS JOIN community_members m ON m.user_id = ? AND m.community_id = c.id
+                WHERE c.pull_feed = 1
+            ''', (user_id,)).fetchall()]
+            
+            # Fiecare sursă contribuie cel mult o pagină; UNION elimină postările aflate
+            # în ambele (scrise înainte ca o comunitate să depășească pragul de fan-out)
+            branches = [f'''
+                SELECT * FROM (SELECT post_id, created_at FROM timelines WHERE user_id = ? {after.format(id='post_id')}
+                               ORDER BY created_at DESC, post_id DESC LIMIT ?)
+            ''']
+            params = (user_id, *after_params, limit + 1)
+            for community_id in pulled:
+                branches.append(f'''
+                    SELECT * FROM (SELECT id, created_at FROM posts WHERE community_id = ? {after.format(id='id')}
+                                   ORDER BY created_at DESC, id DESC LIMIT ?)
+                ''')
+                params += (community_id, *after_params, limit + 1)
+            
+            posts = conn.execute(f'''
+                SELECT p.id, p.title, p.content, p.post_type, p.created_at, p.upvotes, p.downvotes,
+                       u.username, c.name as community_name, p.author_id
+                FROM ({" UNION ".join(branches)}) home
+                JOIN posts p ON p.id = home.post_id
+                JOIN users u ON p.author_id = u.id
+                JOIN communities c ON p.community_id = c.id
+                ORDER BY p.created_at DESC, p.id DESC
+                LIMIT ?
+            ''', params + (limit + 1,)).fetchall()
+        
+        next_cursor = None
+        if len(posts) > limit:
+            posts = posts[:limit]
+            next_cursor = encode_cursor('home', posts[-1][4], posts[-1][0])
+        
+        return [PostRecord(*post) for post in posts], next_cursor
+    
+    def _query_page(self, where: str, params: tuple, limit: int, cursor: Optional[str],
+                    sort: str = 'new', window: str = 'all'):
+        sort_column, where_sql, params = self._page_filter(where, params, cursor, sort, window)
+        
+        with self.db.connection() as conn:
+            posts = conn.execute(f'''
+                SELECT p.id, p.title, p.content, p.post_type, p.created_at, p.upvotes, p.downvotes,
+                       u.username, c.name as community_name, p.author_id, {sort_column}
+                FROM posts p
+                JOIN users u ON p.author_id = u.id
+                JOIN communities c ON p.community_id = c.id
+                {where_sql}
+                ORDER BY {sort_column} DESC, p.id DESC
+                LIMIT ?
+            ''', params + (limit + 1,)).fetchall()
+        
+        # Rândul în plus ne spune doar dacă mai există o pagină
+        next_cursor = None
+        if len(posts) > limit:
+            posts = posts[:limit]
+            next_cursor = encode_cursor(sort, posts[-1][10], posts[-1][0])
+        
+        # Coloana 10 (cheia de sortare) servește doar cursorului
+        return [PostRecord(*post[:10]) for post in posts], next_cursor
+    
+    @staticmethod
+    def _page_filter(where: str, params: tuple, cursor: Optional[str], sort: str,
+                     window: str) -> Tuple[str, str, tuple]:
+        """Coloana de sortare, clauza WHERE și parametrii unei pagini din feed"""
+        if sort not in FEED_SORTS:
+            raise ValueError(f"Sortare necunoscută: {sort}")
+        if window not in TOP_WINDOWS:
+            raise ValueError(f"Fereastră de timp necunoscută: {window}")
+        sort_column = FEED_SORTS[sort]
+        
+        conditions = [where] if where else []
+        if sort == 'top' and TOP_WINDOWS[window]:
+            since = datetime.utcnow() - timedelta(days=TOP_WINDOWS[window])
+            conditions.append("p.created_at >= ?")
+            params += (since.strftime('%Y-%m-%d %H:%M:%S'),)
+        # Paginare keyset pe (cheia de sortare, id): fiecare pagină e un range scan pe index,
+        # deci costul nu crește cu adâncimea ca la OFFSET
+        if cursor:
+            cursor_sort, sort_key, post_id = decode_cursor(cursor)
+            if cursor_sort != sort:
+                raise ValueError("Cursorul aparține altei sortări")
+            conditions.append(f"({sort_column}, p.id) < (?, ?)")
+            params += (sort_key, post_id)
+        where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return sort_column, where_sql, params
     
     def delete_post(self, post_id: str, user_id: str) -> bool:
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        # Verifică dacă utilizatorul este autorul postării
-        cursor.execute("SELECT author_id FROM posts WHERE id = ?", (post_id,))
-        result = cursor.fetchone()
-        
-        if result and result[0] == user_id:
-            # Șterge comentariile asociate
-            cursor.execute("DELETE FROM comments WHERE post_id = ?", (post_id,))
-            # Șterge postarea
-            cursor.execute("DELETE FROM posts WHERE id = ?", (post_id,))
-            conn.commit()
-            conn.close()
-            return True
+        with self.db.transaction() as conn:
+            # Verifică dacă utilizatorul este autorul postării
+            result = conn.execute("SELECT author_id, community_id FROM posts WHERE id = ?", (post_id,)).fetchone()
+            
+            if result and result[0] == user_id:
+                # Comentariile dispar odată cu postarea: evenimentul spune câte avea fiecare autor
+                comment_authors = dict(conn.execute(
+                    "SELECT author_id, COUNT(*) FROM comments WHERE post_id = ? GROUP BY author_id", (post_id,)
+                ).fetchall())
+                record_event(conn, 'post_deleted', post_id, user_id,
+                             {'community': result[1], 'comments': comment_authors})
+                # Șterge voturile postării și ale comentariilor ei
+                conn.execute('''
+                    DELETE FROM votes WHERE target_type = 'comment'
+                    AND target_id IN (SELECT id FROM comments WHERE post_id = ?)
+                ''', (post_id,))
+                conn.execute("DELETE FROM votes WHERE target_type = 'post' AND target_id = ?", (post_id,))
+                conn.execute("DELETE FROM timelines WHERE post_id = ?", (post_id,))
+                # Șterge comentariile asociate
+                conn.execute("DELETE FROM comments WHERE post_id = ?", (post_id,))
+                # Șterge postarea
+                conn.execute("DELETE FROM posts WHERE id = ?", (post_id,))
+                return True
         
-        conn.close()
         return False
 
 class Comment:
@@ -289,84 +681,742 @@ class Comment:
     def create_comment(self, content: str, author_id: str, post_id: str, parent_id: str = None) -> bool:
         comment_id = str(uuid.uuid4())
         
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO comments (id, content, author_id, post_id, parent_id) VALUES (?, ?, ?, ?, ?)",
-            (comment_id, content, author_id, post_id, parent_id)
-        )
-        conn.commit()
-        conn.close()
+        with self.db.transaction() as conn:
+            inserted, recipient = self._insert_comment(conn, comment_id, content, author_id, post_id, parent_id)
+            if not inserted:
+                return False
+            # Autorul comentariului părinte (sau al postării) află de răspuns
+            notify(conn, recipient, 'reply', author_id, 'post', post_id, content)
         return True
     
-    def get_post_comments(self, post_id: str) -> List[Dict]:
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT c.id, c.content, c.created_at, c.upvotes, c.downvotes, c.parent_id,
-                   u.username
-            FROM comments c
-            JOIN users u ON c.author_id = u.id
-            WHERE c.post_id = ?
-            ORDER BY c.created_at ASC
-        ''', (post_id,))
-        comments = cursor.fetchall()
-        conn.close()
+    @staticmethod
+    def _insert_comment(conn: sqlite3.Connection, comment_id: str, content: str, author_id: str, post_id: str,
+                        parent_id: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """Scrie comentariul în tranzacția curentă; întoarce (inserat, cine trebuie notificat)"""
+        parent_path, depth = '', 0
+        if parent_id:
+            parent = conn.execute(
+                "SELECT path, depth, author_id FROM comments WHERE id = ? AND post_id = ?", (parent_id, post_id)
+            ).fetchone()
+            if not parent:
+                return False, None
+            parent_path, depth, recipient = parent[0], parent[1] + 1, parent[2]
+        else:
+            post = conn.execute("SELECT author_id FROM posts WHERE id = ?", (post_id,)).fetchone()
+            recipient = post[0] if post else None
+        
+        cursor = conn.execute(
+            "INSERT INTO comments (id, content, author_id, post_id, parent_id, depth) VALUES (?, ?, ?, ?, ?, ?)",
+            (comment_id, content, author_id, post_id, parent_id, depth)
+        )
+        # Calea depinde de rowid, cunoscut abia după INSERT
+        conn.execute(
+            "UPDATE comments SET path = ? WHERE rowid = ?",
+            (migrations.comment_path(parent_path, cursor.lastrowid), cursor.lastrowid)
+        )
+        if parent_id:
+            conn.execute("UPDATE comments SET reply_count = reply_count + 1 WHERE id = ?", (parent_id,))
+        record_event(conn, 'comment_created', comment_id, author_id,
+                     {'post': post_id, 'parent': parent_id} if parent_id else {'post': post_id})
+        return True, recipient
+    
+    def bulk_create(self, comments: Iterable[Dict], chunk_size: int = BULK_CHUNK_SIZE) -> BulkResult:
+        """Import în masă; un părinte trebuie să apară înaintea răspunsurilor lui (sau să existe deja).
+        
+        Rowid-urile sunt alocate explicit, ca să cunoaștem calea fiecărui comentariu
+        înainte de INSERT și să putem folosi executemany.
+        """
+        def prepare(index, comment, conn, state):
+            if 'next_rowid' not in state:
+                # Suntem în tranzacția de scriere a bucății: nimeni altcineva nu alocă rowid-uri
+                state['next_rowid'] = conn.execute("SELECT IFNULL(MAX(rowid), 0) + 1 FROM comments").fetchone()[0]
+                state['paths'] = {}
+            
+            post_id, parent_id = comment['post_id'], comment.get('parent_id')
+            parent_path, depth = '', 0
+            if parent_id:
+                parent = state['paths'].get(parent_id) or conn.execute(
+                    "SELECT post_id, path, depth FROM comments WHERE id = ?", (parent_id,)
+                ).fetchone()
+                if not parent or parent[0] != post_id:
+                    raise ValueError(f"părinte inexistent: {parent_id}")
+                parent_path, depth = parent[1], parent[2] + 1
+            
+            rowid = state['next_rowid']
+            state['next_rowid'] += 1
+            comment_id = comment.get('id') or str(uuid.uuid4())
+            path = migrations.comment_path(parent_path, rowid)
+            state['paths'][comment_id] = (post_id, path, depth)
+            return (rowid, comment_id, comment['content'], comment['author_id'], post_id, parent_id,
+                    comment.get('created_at') or _utc_now(), path, depth)
         
-        return [
-            {
-                'id': comment[0],
-                'content': comment[1],
-                'created_at': comment[2],
-                'upvotes': comment[3],
-                'downvotes': comment[4],
-                'parent_id': comment[5],
-                'author': comment[6]
-            }
-            for comment in comments
-        ]
+        def count_replies(conn, inserted):
+            replies: Dict[str, int] = {}
+            for params in inserted:
+                parent_id = params[5]
+                if parent_id:
+                    replies[parent_id] = replies.get(parent_id, 0) + 1
+            # Un răspuns al cărui părinte a fost respins în aceeași bucată rămâne orfan
+            # și e afișat ca rădăcină de build_comment_tree
+            conn.executemany(
+                "UPDATE comments SET reply_count = reply_count + ? WHERE id = ?",
+                [(count, parent_id) for parent_id, count in replies.items()]
+            )
+            conn.executemany(EVENT_SQL, [
+                event_row('comment_created', params[1], params[3],
+                          {'post': params[4], 'parent': params[5]} if params[5] else {'post': params[4]}, params[6])
+                for params in inserted
+            ])
+        
+        return bulk_insert(self.db, '''
+            INSERT INTO comments (rowid, id, content, author_id, post_id, parent_id, created_at, path, depth)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', comments, prepare, chunk_size, after_chunk=count_replies)
+    
+    def get_post_comments(self, post_id: str, max_depth: Optional[int] = None) -> List[CommentRecord]:
+        """Returnează thread-ul ca arbore: comentariile rădăcină, fiecare cu lista 'children'"""
+        return build_comment_tree(self.get_thread_page(post_id, max_depth, limit=None)[0])
+    
+    def get_thread_page(self, post_id: str, max_depth: Optional[int] = None, limit: Optional[int] = 200,
+                        cursor: Optional[str] = None) -> Tuple[List[CommentRecord], Optional[str]]:
+        """Comentariile unei postări în preordine (după cale), paginate keyset pe cale"""
+        conditions, params = ["c.post_id = ?"], [post_id]
+        if max_depth is not None:
+            conditions.append("c.depth <= ?")
+            params.append(max_depth)
+        if cursor:
+            conditions.append("c.path > ?")
+            params.append(decode_cursor(cursor)[0])
+        
+        rows = self._query(" AND ".join(conditions), params, limit)
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]['path'])
+        return rows, next_cursor
+    
+    def get_comment_subtree(self, comment_id: str, max_depth: Optional[int] = None) -> List[CommentRecord]:
+        """Descendenții unui comentariu (fără el), în preordine; max_depth e relativ la comentariu"""
+        with self.db.connection() as conn:
+            root = conn.execute("SELECT post_id, path, depth FROM comments WHERE id = ?", (comment_id,)).fetchone()
+        if not root:
+            return []
+        
+        post_id, path, depth = root
+        # Toate căile din subarbore încep cu calea rădăcinii; '~' e după orice cifră hex
+        conditions = "c.post_id = ? AND c.path > ? AND c.path < ?"
+        params = [post_id, path, path + '~']
+        if max_depth is not None:
+            conditions += " AND c.depth <= ?"
+            params.append(depth + max_depth)
+        return self._query(conditions, params, None)
+    
+    def _query(self, where: str, params: list, limit: Optional[int]) -> List[CommentRecord]:
+        limit_sql = "LIMIT ?" if limit is not None else ""
+        if limit is not None:
+            # Un rând în plus ca să știm dacă mai urmează o pagină
+            params = params + [limit + 1]
+        
+        with self.db.connection() as conn:
+            comments = conn.execute(f'''
+                SELECT c.id, c.content, c.created_at, c.upvotes, c.downvotes, c.parent_id,
+                       u.username, c.path, c.depth, c.reply_count
+                FROM comments c
+                JOIN users u ON c.author_id = u.id
+                WHERE {where}
+                ORDER BY c.path
+                {limit_sql}
+            ''', params).fetchall()
+        
+        return [CommentRecord(*comment) for comment in comments]
+
+def build_comment_tree(comments: List[CommentRecord]) -> List[CommentRecord]:
+    """Construiește arborele într-o singură trecere, cu un index id -> nod.
+    
+    Comentariile trebuie să vină în preordine (sortate după 'path'), deci fiecare
+    părinte apare înaintea copiilor lui. Fiecare comentariu primește cheia 'children';
+    un comentariu al cărui părinte nu e în listă (nu a fost încă încărcat) devine rădăcină.
+    """
+    nodes = {}
+    roots = []
+    for comment in comments:
+        comment['children'] = []
+        nodes[comment['id']] = comment
+        parent = nodes.get(comment['parent_id'])
+        if parent is not None:
+            parent['children'].append(comment)
+        else:
+            roots.append(comment)
+    return roots
 
 class Message:
     def __init__(self, db: Database):
         self.db = db
     
     def send_message(self, sender_id: str, receiver_id: str, content: str) -> bool:
+        """Salvează mesajul și actualizează conversația perechii (ultimul mesaj, necitite)"""
         message_id = str(uuid.uuid4())
+        user_a, user_b = sorted((sender_id, receiver_id))
+        created_at = _utc_now()
+        preview = content[:migrations.MESSAGE_PREVIEW_CHARS]
+        # Un mesaj către sine e necitit o singură dată
+        unread_a = int(receiver_id == user_a)
+        unread_b = int(receiver_id == user_b and user_a != user_b)
         
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO messages (id, sender_id, receiver_id, content) VALUES (?, ?, ?, ?)",
-            (message_id, sender_id, receiver_id, content)
-        )
-        conn.commit()
-        conn.close()
+        with self.db.transaction() as conn:
+            updated = conn.execute('''
+                UPDATE conversations
+                SET last_message_id = ?, last_message = ?, last_sender_id = ?, last_activity = ?,
+                    unread_a = unread_a + ?, unread_b = unread_b + ?, message_count = message_count + 1
+                WHERE user_a = ? AND user_b = ?
+            ''', (message_id, preview, sender_id, created_at, unread_a, unread_b, user_a, user_b)).rowcount
+            if updated:
+                conversation_id = conn.execute(
+                    "SELECT id FROM conversations WHERE user_a = ? AND user_b = ?", (user_a, user_b)
+                ).fetchone()[0]
+            else:
+                conversation_id = str(uuid.uuid4())
+                conn.execute('''
+                    INSERT INTO conversations (id, user_a, user_b, last_message_id, last_message, last_sender_id,
+                                               last_activity, unread_a, unread_b, message_count)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
+                ''', (conversation_id, user_a, user_b, message_id, preview, sender_id, created_at, unread_a, unread_b))
+            conn.execute(
+                "INSERT INTO messages (id, sender_id, receiver_id, content, created_at, conversation_id) VALUES (?, ?, ?, ?, ?, ?)",
+                (message_id, sender_id, receiver_id, content, created_at, conversation_id)
+            )
+            # Conținutul rămâne doar în messages; jurnalul ține cine, cui și când
+            record_event(conn, 'message_sent', message_id, sender_id,
+                         {'to': receiver_id, 'conversation': conversation_id}, created_at)
+            notify(conn, receiver_id, 'message', sender_id, 'conversation', conversation_id, preview, coalesce=True)
         return True
     
-    def get_user_messages(self, user_id: str) -> List[Dict]:
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT m.id, m.content, m.created_at, m.is_read,
-                   sender.username as sender_username,
-                   receiver.username as receiver_username
-            FROM messages m
-            JOIN users sender ON m.sender_id = sender.id
-            JOIN users receiver ON m.receiver_id = receiver.id
-            WHERE m.sender_id = ? OR m.receiver_id = ?
-            ORDER BY m.created_at DESC
-        ''', (user_id, user_id))
-        messages = cursor.fetchall()
-        conn.close()
+    def get_inbox(self, user_id: str, limit: int = 20,
+                  cursor: Optional[str] = None) -> Tuple[List[ConversationRecord], Optional[str]]:
+        """Conversațiile utilizatorului, cele mai recente primele; citește doar rânduri din conversations"""
+        keyset, params = "", []
+        if cursor:
+            last_activity, conversation_id = decode_cursor(cursor)
+            keyset = "AND (last_activity, id) < (?, ?)"
+            params = [last_activity, conversation_id]
+        
+        # Câte o ramură pentru fiecare poziție din pereche, fiecare limitată pe indexul ei
+        with self.db.connection() as conn:
+            rows = conn.execute(f'''
+                SELECT i.id, i.other_id, i.last_message, i.last_sender_id, i.last_activity, i.unread,
+                       i.message_count, u.username
+                FROM (
+                    SELECT * FROM (
+                        SELECT id, user_b AS other_id, last_message, last_sender_id, last_activity,
+                               unread_a AS unread, message_count
+                        FROM conversations
+                        WHERE user_a = ? {keyset}
+                        ORDER BY last_activity DESC, id DESC
+                        LIMIT ?
+                    )
+                    UNION ALL
+                    SELECT * FROM (
+                        SELECT id, user_a, last_message, last_sender_id, last_activity, unread_b, message_count
+                        FROM conversations
+                        WHERE user_b = ? AND user_a != user_b {keyset}
+                        ORDER BY last_activity DESC, id DESC
+                        LIMIT ?
+                    )
+                ) i
+                JOIN users u ON u.id = i.other_id
+                ORDER BY i.last_activity DESC, i.id DESC
+                LIMIT ?
+            ''', [user_id, *params, limit + 1, user_id, *params, limit + 1, limit + 1]).fetchall()
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][4], rows[-1][0])
+        return [ConversationRecord(*row) for row in rows], next_cursor
+    
+    def get_conversation_page(self, conversation_id: str, user_id: str, limit: int = 30,
+                              cursor: Optional[str] = None) -> Tuple[List[MessageRecord], Optional[str]]:
+        """Mesajele unei conversații, cele mai noi primele, paginate keyset pe (created_at, rowid).
+        
+        Un utilizator care nu face parte din conversație primește o pagină goală.
+        """
+        conditions, params = ["m.conversation_id = ?"], [conversation_id]
+        if cursor:
+            created_at, rowid = decode_cursor(cursor)
+            conditions.append("(m.created_at, m.rowid) < (?, ?)")
+            params += [created_at, rowid]
+        
+        with self.db.connection() as conn:
+            members = conn.execute(
+                "SELECT user_a, user_b FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+            if not members or user_id not in members:
+                return [], None
+            rows = conn.execute(f'''
+                SELECT m.id, m.content, m.created_at, m.is_read, sender.username, receiver.username, m.sender_id,
+                       m.rowid
+                FROM messages m
+                JOIN users sender ON m.sender_id = sender.id
+                JOIN users receiver ON m.receiver_id = receiver.id
+                WHERE {' AND '.join(conditions)}
+                ORDER BY m.created_at DESC, m.rowid DESC
+                LIMIT ?
+            ''', params + [limit + 1]).fetchall()
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][2], rows[-1][7])
+        return [MessageRecord(*row[:7]) for row in rows], next_cursor
+    
+    def mark_conversation_read(self, conversation_id: str, user_id: str) -> int:
+        """Marchează ca citite mesajele primite de user_id în conversație; întoarce câte erau necitite"""
+        with self.db.transaction() as conn:
+            row = conn.execute(
+                "SELECT user_a, user_b, unread_a, unread_b FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+            if not row or user_id not in row[:2]:
+                return 0
+            unread_column, unread = ('unread_a', row[2]) if user_id == row[0] else ('unread_b', row[3])
+            if not unread:
+                return 0
+            conn.execute(
+                "UPDATE messages SET is_read = 1 WHERE conversation_id = ? AND receiver_id = ? AND is_read = 0",
+                (conversation_id, user_id)
+            )
+            conn.execute(f"UPDATE conversations SET {unread_column} = 0 WHERE id = ?", (conversation_id,))
+        return unread
+    
+    def count_unread(self, user_id: str) -> int:
+        """Totalul mesajelor necitite, din contoarele conversațiilor"""
+        with self.db.connection() as conn:
+            return conn.execute('''
+                SELECT (SELECT IFNULL(SUM(unread_a), 0) FROM conversations WHERE user_a = ?)
+                     + (SELECT IFNULL(SUM(unread_b), 0) FROM conversations WHERE user_b = ? AND user_a != user_b)
+            ''', (user_id, user_id)).fetchone()[0]
+    
+    def get_user_messages(self, user_id: str, limit: Optional[int] = None) -> List[MessageRecord]:
+        """Istoricul utilizatorului (tot, fără limit); interfața folosește get_inbox/get_conversation_page"""
+        # O ramură per index: cu OR, SQLite scanează messages în loc să le folosească pe amândouă.
+        # Mesajele către sine apar doar în ramura expeditorului. LIMIT -1 înseamnă fără limită.
+        limit = -1 if limit is None else limit
+        with self.db.connection() as conn:
+            messages = conn.execute('''
+                SELECT m.id, m.content, m.created_at, m.is_read,
+                       sender.username as sender_username,
+                       receiver.username as receiver_username,
+                       m.sender_id
+                FROM (
+                    SELECT * FROM (
+                        SELECT id, content, created_at, is_read, sender_id, receiver_id FROM messages
+                        WHERE sender_id = ? ORDER BY created_at DESC LIMIT ?
+                    )
+                    UNION ALL
+                    SELECT * FROM (
+                        SELECT id, content, created_at, is_read, sender_id, receiver_id FROM messages
+                        WHERE receiver_id = ? AND sender_id != ? ORDER BY created_at DESC LIMIT ?
+                    )
+                ) m
+                JOIN users sender ON m.sender_id = sender.id
+                JOIN users receiver ON m.receiver_id = receiver.id
+                ORDER BY m.created_at DESC
+                LIMIT ?
+            ''', (user_id, limit, user_id, user_id, limit, limit)).fetchall()
+        
+        return [MessageRecord(*msg) for msg in messages]
+
+# Tabelele ale căror contoare upvotes/downvotes sunt actualizate de voturi
+VOTE_TARGETS = {'post': 'posts', 'comment': 'comments'}
+
+class Vote:
+    def __init__(self, db: Database, buffer: Optional['VoteBuffer'] = None):
+        self.db = db
+        self.buffer = buffer
+    
+    def vote(self, user_id: str, target_type: str, target_id: str, value: int) -> Tuple[int, int]:
+        """Înregistrează votul (1, -1 sau 0 pentru retragere).
+        
+        Returnează variația (upvotes, downvotes) pe care votul o aduce țintei,
+        ca interfața să poată actualiza scorul afișat fără o nouă citire.
+        """
+        if target_type not in VOTE_TARGETS:
+            raise ValueError(f"Tip de țintă necunoscut: {target_type}")
+        if value not in (-1, 0, 1):
+            raise ValueError("Votul trebuie să fie 1, -1 sau 0")
+        
+        if self.buffer is not None:
+            previous = self.buffer.swap(user_id, target_type, target_id, value)
+        else:
+            # Votul anterior se citește sub BEGIN IMMEDIATE: două click-uri simultane nu pot
+            # porni de la același vot anterior și întoarce aceeași variație de două ori
+            with self.db.transaction() as conn:
+                previous = _stored_vote(conn, user_id, target_type, target_id)
+                apply_votes(conn, [(user_id, target_type, target_id, value)])
+        return _vote_delta(previous, value)
+    
+    def get_user_votes(self, user_id: str, target_type: str, target_ids: List[str]) -> Dict[str, int]:
+        """Voturile utilizatorului pentru țintele date, inclusiv cele încă nescrise din buffer"""
+        if not target_ids:
+            return {}
+        placeholders = ', '.join('?' * len(target_ids))
+        with self.db.connection() as conn:
+            votes = dict(conn.execute(
+                f"SELECT target_id, value FROM votes WHERE user_id = ? AND target_type = ? AND target_id IN ({placeholders})",
+                (user_id, target_type, *target_ids)
+            ).fetchall())
+        
+        if self.buffer is not None:
+            for target_id in target_ids:
+                pending = self.buffer.pending_vote(user_id, target_type, target_id)
+                if pending is not None:
+                    votes[target_id] = pending
+        return {target_id: value for target_id, value in votes.items() if value}
+
+def _stored_vote(conn: sqlite3.Connection, user_id: str, target_type: str, target_id: str) -> int:
+    row = conn.execute(
+        "SELECT value FROM votes WHERE user_id = ? AND target_type = ? AND target_id = ?",
+        (user_id, target_type, target_id)
+    ).fetchone()
+    return row[0] if row else 0
+
+def _vote_delta(previous: int, value: int) -> Tuple[int, int]:
+    return (value == 1) - (previous == 1), (value == -1) - (previous == -1)
+
+def apply_votes(conn: sqlite3.Connection, votes, notifications: Optional[List[tuple]] = None) -> int:
+    """Aplică un lot de voturi (user_id, target_type, target_id, value) în tranzacția curentă.
+    
+    Contoarele țintelor se actualizează atomic (col = col + delta), o singură dată
+    per țintă, oricâte voturi ar conține lotul. Returnează numărul de voturi aplicate.
+    Cu lista notifications, argumentele notify(..., coalesce=True) se adaugă în ea în
+    loc să fie scrise în conn (în modul sharded notificările stau în catalog).
+    """
+    deltas: Dict[Tuple[str, str], List] = {}
+    applied = 0
+    
+    for user_id, target_type, target_id, value in votes:
+        previous = _stored_vote(conn, user_id, target_type, target_id)
+        if previous == value:
+            continue
+        
+        if value == 0:
+            conn.execute(
+                "DELETE FROM votes WHERE user_id = ? AND target_type = ? AND target_id = ?",
+                (user_id, target_type, target_id)
+            )
+        else:
+            conn.execute('''
+                INSERT INTO votes (user_id, target_type, target_id, value) VALUES (?, ?, ?, ?)
+                ON CONFLICT (user_id, target_type, target_id) DO UPDATE SET value = excluded.value
+            ''', (user_id, target_type, target_id, value))
+        
+        up, down = _vote_delta(previous, value)
+        # [upvotes, downvotes, ultimul utilizator care a dat upvote, (votant, vot anterior, vot nou)]
+        delta = deltas.setdefault((target_type, target_id), [0, 0, None, []])
+        delta[0] += up
+        delta[1] += down
+        if up > 0:
+            delta[2] = user_id
+        delta[3].append((user_id, previous, value))
+        applied += 1
+    
+    for (target_type, target_id), (up, down, voter, cast) in deltas.items():
+        text_column = 'title' if target_type == 'post' else 'content'
+        target = conn.execute(
+            f"SELECT author_id, {text_column} FROM {VOTE_TARGETS[target_type]} WHERE id = ?", (target_id,)
+        ).fetchone()
+        # Autorul țintei e în eveniment: karma se poate calcula doar din jurnal
+        author = target[0] if target else None
+        conn.executemany(EVENT_SQL, [
+            event_row('vote_cast', target_id, user_id,
+                      {'type': target_type, 'author': author, 'previous': previous, 'value': value})
+            for user_id, previous, value in cast
+        ])
+        if up > 0:
+            # Doar upvote-urile noi notifică autorul, grupate într-o singură notificare necitită
+            if target and notifications is not None:
+                notifications.append((target[0], 'vote', voter, target_type, target_id, target[1], up))
+            elif target:
+                notify(conn, target[0], 'vote', voter, target_type, target_id, target[1], count=up, coalesce=True)
+        if up or down:
+            conn.execute(
+                f"UPDATE {VOTE_TARGETS[target_type]} SET upvotes = upvotes + ?, downvotes = downvotes + ? WHERE id = ?",
+                (up, down, target_id)
+            )
+            if target_type == 'post':
+                # Scorurile de ranking se recalculează doar pentru postarea votată
+                conn.execute('''
+                    UPDATE posts SET score = upvotes - downvotes,
+                                     hot_rank = hot_score(upvotes, downvotes, created_at),
+                                     controversy = controversy_score(upvotes, downvotes)
+                    WHERE id = ?
+                ''', (target_id,))
+    return applied
+
+class VoteBuffer:
+    """Buffer write-behind pentru voturi, partajat de toate sesiunile din proces.
+    
+    Voturile se adună în memorie (ultimul vot al unui utilizator pe o țintă îl
+    înlocuiește pe cel anterior) și sunt scrise de un fir de fundal într-o singură
+    tranzacție la fiecare interval_ms, deci un click nu mai ia lock-ul de scriere.
+    Buffer-ul e singurul scriitor al voturilor din baza lui de date: votul anterior
+    al unui click vine din _pending, din lotul aflat în scriere sau, dacă nu e în
+    niciunul, din bază, citit sub lock-ul buffer-ului, unde niciun flush nu-l poate schimba.
+    """
+    
+    def __init__(self, db: Database, interval_ms: int = 250):
+        self.db = db
+        self.interval = interval_ms / 1000
+        self._pending: Dict[Tuple[str, str, str], int] = {}
+        # Lotul scos din _pending de flush, până la commit-ul lui
+        self._flushing: Dict[Tuple[str, str, str], int] = {}
+        self._lock = threading.Lock()
+        # Un singur lot în scriere: flush-ul manual și cel din fundal nu se suprapun
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="vote-buffer", daemon=True)
+        self._thread.start()
+    
+    def add(self, user_id: str, target_type: str, target_id: str, value: int):
+        with self._lock:
+            self._pending[(user_id, target_type, target_id)] = value
+    
+    def swap(self, user_id: str, target_type: str, target_id: str, value: int) -> int:
+        """Ca add, dar întoarce votul pe care îl înlocuiește, în aceeași secțiune critică"""
+        key = (user_id, target_type, target_id)
+        with self._lock:
+            previous = self._pending.get(key)
+            if previous is None:
+                previous = self._flushing.get(key)
+            if previous is None:
+                with self.db.connection() as conn:
+                    previous = _stored_vote(conn, *key)
+            self._pending[key] = value
+        return previous
+    
+    def pending_vote(self, user_id: str, target_type: str, target_id: str) -> Optional[int]:
+        key = (user_id, target_type, target_id)
+        with self._lock:
+            pending = self._pending.get(key)
+            return self._flushing.get(key) if pending is None else pending
+    
+    def flush(self) -> int:
+        with self._flush_lock:
+            return self._flush()
+    
+    def _flush(self) -> int:
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            self._flushing = batch
+        if not batch:
+            return 0
+        
+        try:
+            with self.db.transaction() as conn:
+                applied = apply_votes(conn, [key + (value,) for key, value in batch.items()])
+        except sqlite3.Error:
+            # Punem lotul înapoi; voturile venite între timp au prioritate
+            with self._lock:
+                for key, value in batch.items():
+                    self._pending.setdefault(key, value)
+                self._flushing = {}
+            raise
+        with self._lock:
+            self._flushing = {}
+        return applied
+    
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # Reîncercăm la următorul interval
+                continue
+    
+    def close(self):
+        self._stopped.set()
+        self._thread.join()
+        self.flush()
+
+def notify(conn: sqlite3.Connection, user_id: Optional[str], kind: str, actor_id: Optional[str],
+           target_type: str, target_id: str, text: str, count: int = 1, coalesce: bool = False):
+    """Notificare pentru user_id, scrisă în tranzacția curentă; acțiunile proprii nu notifică.
+    
+    Cu coalesce, notificarea necitită de același fel pentru aceeași țintă e înlocuită de una
+    nouă care le însumează: un id nou, ca polling-ul după cursor să o vadă.
+    """
+    if user_id is None or user_id == actor_id:
+        return
+    if coalesce:
+        previous = conn.execute(
+            "SELECT id, count FROM notifications WHERE user_id = ? AND read = 0 AND kind = ? AND target_id = ?",
+            (user_id, kind, target_id)
+        ).fetchone()
+        if previous:
+            conn.execute("DELETE FROM notifications WHERE id = ?", (previous[0],))
+            count += previous[1]
+    conn.execute('''
+        INSERT INTO notifications (user_id, kind, actor_id, target_type, target_id, text, count, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (user_id, kind, actor_id, target_type, target_id, (text or '')[:migrations.MESSAGE_PREVIEW_CHARS],
+          count, _utc_now()))
+
+class Notification:
+    """Notificările generate de răspunsuri, mesaje și voturi (vezi notify)"""
+    _SELECT = '''
+        SELECT n.id, n.kind, u.username, n.target_type, n.target_id, n.text, n.count, n.read, n.created_at
+        FROM notifications n LEFT JOIN users u ON u.id = n.actor_id
+    '''
+    
+    def __init__(self, db: Database):
+        self.db = db
+    
+    def count_unread(self, user_id: str) -> int:
+        """Contorul ținut de triggere: o căutare după cheia primară, nu un COUNT"""
+        with self.db.connection() as conn:
+            row = conn.execute("SELECT unread_notifications FROM users WHERE id = ?", (user_id,)).fetchone()
+        return row[0] if row else 0
+    
+    def since(self, user_id: str, cursor: Optional[str] = None,
+              limit: int = 50) -> Tuple[List[NotificationRecord], Optional[str]]:
+        """Notificările necitite apărute după cursor, în ordinea sosirii, și cursorul următorului apel.
+        
+        Fără cursor întoarce ultimele `limit` necitite. Cursorul nu se schimbă cât timp nu apare nimic nou.
+        """
+        with self.db.connection() as conn:
+            if cursor:
+                last_id, = decode_cursor(cursor)
+                rows = conn.execute(f'''
+                    {self._SELECT}
+                    WHERE n.user_id = ? AND n.read = 0 AND n.id > ?
+                    ORDER BY n.id
+                    LIMIT ?
+                ''', (user_id, last_id, limit)).fetchall()
+            else:
+                rows = conn.execute(f'''
+                    {self._SELECT}
+                    WHERE n.user_id = ? AND n.read = 0
+                    ORDER BY n.created_at DESC, n.id DESC
+                    LIMIT ?
+                ''', (user_id, limit)).fetchall()[::-1]
+                # Nimic necitit: polling-ul pornește de la ultimul id din tabel (id-urile sunt globale)
+                if not rows:
+                    last_id = conn.execute("SELECT MAX(id) FROM notifications").fetchone()[0] or 0
+        
+        if rows:
+            last_id = rows[-1][0]
+        return [NotificationRecord(*row) for row in rows], encode_cursor(last_id)
+    
+    def get_recent(self, user_id: str, limit: int = 30) -> List[NotificationRecord]:
+        """Cele mai noi notificări, citite sau nu: două range scan-uri pe index, unite"""
+        with self.db.connection() as conn:
+            rows = conn.execute(f'''
+                {self._SELECT}
+                WHERE n.id IN (
+                    SELECT id FROM (SELECT id, created_at FROM notifications WHERE user_id = ? AND read = 0
+                                    ORDER BY created_at DESC LIMIT ?)
+                    UNION ALL
+                    SELECT id FROM (SELECT id, created_at FROM notifications WHERE user_id = ? AND read = 1
+                                    ORDER BY created_at DESC LIMIT ?)
+                )
+                ORDER BY n.created_at DESC, n.id DESC
+                LIMIT ?
+            ''', (user_id, limit, user_id, limit, limit)).fetchall()
+        return [NotificationRecord(*row) for row in rows]
+    
+    def mark_read(self, user_id: str, notification_ids: Optional[List[int]] = None) -> int:
+        """Marchează ca citite notificările date (toate, dacă lipsesc); întoarce câte s-au schimbat"""
+        where, params = "user_id = ? AND read = 0", (user_id,)
+        if notification_ids is not None:
+            if not notification_ids:
+                return 0
+            where += f" AND id IN ({', '.join('?' * len(notification_ids))})"
+            params += tuple(notification_ids)
+        with self.db.transaction() as conn:
+            return conn.execute(f"UPDATE notifications SET read = 1 WHERE {where}", params).rowcount
+
+# Cuvintele din interogarea utilizatorului; restul (operatori FTS5, ghilimele) e ignorat
+_SEARCH_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+def fts_query(text: str, prefix: bool = True) -> Optional[str]:
+    """Transformă textul liber într-o interogare FTS5 sigură: termeni între ghilimele, AND implicit.
+    
+    Ultimul termen devine prefix ("pis" găsește "pisică"), pentru căutarea în timp ce scrii.
+    """
+    terms = [f'"{term}"' for term in _SEARCH_TOKEN.findall(text)]
+    if not terms:
+        return None
+    if prefix:
+        terms[-1] += '*'
+    return ' '.join(terms)
+
+class Search:
+    def __init__(self, db: Database):
+        self.db = db
+    
+    def search_posts(self, query: str, limit: int = 20, offset: int = 0) -> List[PostSearchRecord]:
+        match = fts_query(query)
+        if not match:
+            return []
+        
+        with self.db.connection() as conn:
+            # bm25: titlul contează de 10 ori mai mult decât conținutul
+            posts = conn.execute('''
+                SELECT p.id, p.title, p.content, p.post_type, p.created_at, p.upvotes, p.downvotes,
+                       u.username, c.name as community_name, p.author_id,
+                       snippet(posts_fts, 1, '**', '**', '…', 16)
+                FROM posts_fts f
+                JOIN posts p ON p.rowid = f.rowid
+                JOIN users u ON p.author_id = u.id
+                JOIN communities c ON p.community_id = c.id
+                WHERE posts_fts MATCH ?
+                ORDER BY bm25(posts_fts, 10.0, 1.0)
+                LIMIT ? OFFSET ?
+            ''', (match, limit, offset)).fetchall()
+        
+        return [PostSearchRecord(*post) for post in posts]
+    
+    def search_comments(self, query: str, limit: int = 20, offset: int = 0) -> List[CommentSearchRecord]:
+        match = fts_query(query)
+        if not match:
+            return []
+        
+        with self.db.connection() as conn:
+            comments = conn.execute('''
+                SELECT c.id, c.content, c.created_at, c.post_id, p.title, u.username,
+                       snippet(comments_fts, 0, '**', '**', '…', 16)
+                FROM comments_fts f
+                JOIN comments c ON c.rowid = f.rowid
+                JOIN posts p ON c.post_id = p.id
+                JOIN users u ON c.author_id = u.id
+                WHERE comments_fts MATCH ?
+                ORDER BY bm25(comments_fts)
+                LIMIT ? OFFSET ?
+            ''', (match, limit, offset)).fetchall()
+        
+        return [CommentSearchRecord(*comment) for comment in comments]
+    
+    def search_communities(self, query: str, limit: int = 20, offset: int = 0) -> List[CommunityRecord]:
+        match = fts_query(query)
+        if not match:
+            return []
+        
+        with self.db.connection() as conn:
+            communities = conn.execute('''
+                SELECT c.id, c.name, c.description, c.members_count, c.created_at
+                FROM communities_fts f
+                JOIN communities c ON c.rowid = f.rowid
+                WHERE communities_fts MATCH ?
+                ORDER BY bm25(communities_fts, 5.0, 1.0)
+                LIMIT ? OFFSET ?
+            ''', (match, limit, offset)).fetchall()
+        
+        return [CommunityRecord(*comm) for comm in communities]
+    
+    def rebuild(self):
+        """Reconstruiește indexurile FTS din tabelele sursă.
         
-        return [
-            {
-                'id': msg[0],
-                'content': msg[1],
-                'created_at': msg[2],
-                'is_read': msg[3],
-                'sender': msg[4],
-                'receiver': msg[5]
-            }
-            for msg in messages
-        ]
+        Necesar după VACUUM: indexurile sunt legate de rowid, pe care VACUUM îl poate renumerota.
+        """
+        with self.db.transaction() as conn:
+            for fts in ('posts_fts', 'comments_fts', 'communities_fts'):
+                conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
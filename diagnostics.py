@@ -0,0 +1,242 @@
+"""Instrumentarea interogărilor SQL: latență, rânduri și metoda care le-a cerut.
+
+Database(tracer=QueryTracer()) deschide conexiunile cu TracedConnection:
+fiecare execute() întoarce un TracedCursor care cronometrează execuția și
+citirea rândurilor. O instrucțiune e înregistrată când cursorul ei se
+termină (ultimul rând citit, un nou execute, close sau eliberarea
+cursorului), deci latența include și fetch-ul, unde SQLite face de fapt
+munca. Hook-urile sqlite3 (set_trace_callback) dau doar textul SQL, fără
+durată, de aceea folosim un wrapper.
+
+Instrucțiunile peste `slow_ms` intră într-un jurnal circular, împreună cu
+EXPLAIN QUERY PLAN.
+
+Apelantul se află parcurgând stiva, ceea ce costă mai mult decât execuția
+unei interogări simple; de aceea e căutat doar pentru una din `sample_every`
+instrucțiuni (apelanții din statistici sunt un eșantion) și pentru fiecare
+instrucțiune lentă. Cu `enabled` fals, cursorul doar execută, fără cronometrare.
+"""
+import re
+import sqlite3
+import sys
+import threading
+import time
+from functools import lru_cache
+from itertools import count
+from collections import Counter, deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Modulele ale căror metode publice sunt raportate ca apelanți
+TRACED_MODULES = {'database', 'cache'}
+# Context managerii din Database: BEGIN/COMMIT aparțin metodei care i-a deschis
+_PLUMBING = {'connection', 'transaction'}
+
+_WHITESPACE = re.compile(r'\s+')
+# IN (?, ?, ?) are lungime variabilă: toate listele devin aceeași instrucțiune
+_PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    return _PLACEHOLDER_LIST.sub('(?, ...)', _WHITESPACE.sub(' ', sql).strip())
+
+
+def _qualified(frame, name: str) -> str:
+    # co_qualname există doar din Python 3.11
+    owner = frame.f_locals.get('self')
+    return f"{type(owner).__name__}.{name}" if owner is not None else name
+
+
+def calling_method() -> str:
+    """Prima metodă publică din database.py/cache.py de pe stivă (ex. 'Post.get_feed_page')"""
+    frame = sys._getframe(1)
+    fallback = None
+    while frame is not None:
+        module = frame.f_globals.get('__name__')
+        if module != __name__:
+            name = frame.f_code.co_name
+            if module in TRACED_MODULES and not name.startswith('_') and name not in _PLUMBING:
+                return _qualified(frame, name)
+            if fallback is None:
+                fallback = f"{module}.{_qualified(frame, name)}"
+        frame = frame.f_back
+    return fallback or '?'
+
+
+class QueryTracer:
+    """Statistici agregate pe instrucțiune și jurnalul interogărilor lente, partajate de toate conexiunile"""
+
+    def __init__(self, slow_ms: float = 100.0, log_size: int = 200, explain: bool = True,
+                 sample_every: int = 16, enabled: bool = True):
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.sample_every = sample_every
+        self.enabled = enabled
+        self._ticks = count()
+        self.slow_log = deque(maxlen=log_size)
+        self._stats: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def sample(self) -> bool:
+        """Dacă instrucțiunea care începe acum își caută apelantul pe stivă"""
+        return next(self._ticks) % self.sample_every == 0
+
+    def record(self, conn: sqlite3.Connection, sql: str, params, elapsed_ms: float, rows: int,
+               caller: Optional[str], many: bool = False):
+        key = normalize_sql(sql)
+        if caller is None and elapsed_ms >= self.slow_ms:
+            # Cursorul e terminat de obicei din metoda care l-a citit, deci apelantul e tot pe stivă
+            caller = calling_method()
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is None:
+                entry = self._stats[key] = {
+                    'sql': key, 'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0, 'callers': Counter(),
+                }
+            entry['calls'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            entry['rows'] += rows
+            if caller is not None:
+                entry['callers'][caller] += 1
+
+        if elapsed_ms >= self.slow_ms:
+            plan = None
+            if self.explain and not many:
+                plan = self._explain(conn, sql, params)
+            self.slow_log.append({
+                'at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'sql': key,
+                'params': repr(params)[:200],
+                'elapsed_ms': elapsed_ms,
+                'rows': rows,
+                'caller': caller,
+                'plan': plan,
+            })
+
+    @staticmethod
+    def _explain(conn: sqlite3.Connection, sql: str, params) -> Optional[str]:
+        # Direct pe clasa de bază: planul nu trebuie să fie el însuși urmărit
+        try:
+            rows = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", params or ()).fetchall()
+        except sqlite3.Error:
+            return None
+        return "\n".join(detail for _, _, _, detail in rows)
+
+    def stats(self, limit: Optional[int] = None) -> List[Dict]:
+        """Instrucțiunile ordonate după timpul total, cu media și apelanții cei mai frecvenți"""
+        with self._lock:
+            entries = [dict(entry, callers=entry['callers'].most_common(3)) for entry in self._stats.values()]
+        for entry in entries:
+            entry['mean_ms'] = entry['total_ms'] / entry['calls']
+        entries.sort(key=lambda entry: entry['total_ms'], reverse=True)
+        return entries[:limit] if limit else entries
+
+    def slow_queries(self) -> List[Dict]:
+        """Jurnalul interogărilor lente, cele mai recente primele"""
+        return list(reversed(self.slow_log))
+
+    def export(self) -> Dict:
+        return {'slow_ms': self.slow_ms, 'statements': self.stats(), 'slow_queries': self.slow_queries()}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self.slow_log.clear()
+
+
+class TracedCursor(sqlite3.Cursor):
+    _pending = None
+
+    def execute(self, sql, parameters=()):
+        return self._run(super().execute, sql, parameters, False)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._run(super().executemany, sql, seq_of_parameters, True)
+
+    def _run(self, method, sql, parameters, many):
+        self._finish()
+        tracer = self.connection.tracer
+        if tracer is None or not tracer.enabled:
+            method(sql, parameters)
+            return self
+        caller = calling_method() if tracer.sample() else None
+        start = time.perf_counter()
+        try:
+            method(sql, parameters)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._pending = [sql, None if many else parameters, elapsed, 0, caller, many]
+        if self.description is None:
+            # Fără rânduri de citit (INSERT/UPDATE/DDL): instrucțiunea s-a terminat deja
+            self._pending[3] = max(self.rowcount, 0)
+            self._finish()
+        return self
+
+    def _timed(self, method, *args):
+        pending = self._pending
+        if pending is None:
+            return method(*args)
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            pending[2] += time.perf_counter() - start
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if self._pending is not None:
+            if row is None:
+                self._finish()
+            else:
+                self._pending[3] += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(super().fetchmany, self.arraysize if size is None else size)
+        if self._pending is not None:
+            self._pending[3] += len(rows)
+            if not rows:
+                self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        if self._pending is not None:
+            self._pending[3] += len(rows)
+            self._finish()
+        return rows
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        self._finish()
+
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return
+        sql, params, elapsed, rows, caller, many = pending
+        tracer = getattr(self.connection, 'tracer', None)
+        if tracer is not None:
+            tracer.record(self.connection, sql, params, elapsed * 1000, rows, caller, many)
+
+
+class TracedConnection(sqlite3.Connection):
+    """Conexiune ale cărei execute/executemany trec prin TracedCursor; `tracer` e setat de Database"""
+    tracer: Optional[QueryTracer] = None
+
+    def execute(self, sql, parameters=()):
+        return self.cursor(TracedCursor).execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor(TracedCursor).executemany(sql, seq_of_parameters)
@@ -0,0 +1,262 @@
+"""Proiecții (read models) construite din jurnalul de evenimente.
+
+Managerii din database.py adaugă fiecare mutație în tabelul events, în
+aceeași tranzacție cu scrierea propriu-zisă (record_event). O proiecție
+citește jurnalul în ordinea seq de la checkpoint-ul ei și își actualizează
+tabelele; lotul și noul checkpoint se scriu împreună, deci o proiecție
+întreruptă reia exact de unde a rămas. O vedere nouă nu mai cere un
+backfill online: se adaugă un Projector și se reconstruiește din jurnal.
+
+Rulare:
+    python events.py status [--db reddit_clone.db]
+    python events.py catch-up [user_stats ...]
+    python events.py replay user_stats
+"""
+import argparse
+import json
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from database import Database, _utc_now
+
+# Evenimente aplicate per tranzacție când o proiecție ține pasul cu jurnalul
+CATCH_UP_BATCH = 1000
+# La reconstrucție, loturi mari: o singură tranzacție, fără commit-uri intermediare
+REPLAY_BATCH = 50_000
+
+EVENT_COLUMNS = "seq, kind, entity_id, actor_id, data, created_at"
+
+
+class Event(NamedTuple):
+    seq: int
+    kind: str
+    entity_id: str
+    actor_id: Optional[str]
+    data: Dict
+    created_at: str
+
+
+def decode_events(rows) -> List[Event]:
+    return [Event(seq, kind, entity_id, actor_id, json.loads(data) if data else {}, created_at)
+            for seq, kind, entity_id, actor_id, data, created_at in rows]
+
+
+class Projector:
+    """Un read model: tabelele lui (schema), golite la reconstrucție, și apply pentru un lot de evenimente"""
+    name = ''
+    schema: Tuple[str, ...] = ()
+    tables: Tuple[str, ...] = ()
+
+    def ensure(self, conn):
+        for statement in self.schema:
+            conn.execute(statement)
+
+    def reset(self, conn):
+        for table in self.tables:
+            conn.execute(f"DELETE FROM {table}")
+
+    def apply(self, conn, events: List[Event]):
+        raise NotImplementedError
+
+
+class UserStatsProjector(Projector):
+    """Karma (voturi primite), postări și comentarii existente, per utilizator.
+
+    Ca pe Reddit, karma rămâne după ștergerea unei postări; contoarele de postări și
+    comentarii scad.
+    """
+    name = 'user_stats'
+    tables = ('user_stats',)
+    schema = ('''
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id TEXT PRIMARY KEY,
+            karma INTEGER NOT NULL DEFAULT 0,
+            posts INTEGER NOT NULL DEFAULT 0,
+            comments INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''',)
+
+    def apply(self, conn, events: List[Event]):
+        # Lotul se reduce în memorie la o variație per utilizator, scrisă cu un singur executemany
+        deltas: Dict[str, List[int]] = defaultdict(lambda: [0, 0, 0])
+        for event in events:
+            kind, data = event.kind, event.data
+            if kind == 'vote_cast':
+                if data.get('author'):
+                    deltas[data['author']][0] += data['value'] - data['previous']
+            elif kind == 'post_created' or kind == 'comment_created':
+                delta = deltas[event.actor_id]
+                delta[0] += data.get('up', 0) - data.get('down', 0)
+                delta[1 if kind == 'post_created' else 2] += 1
+            elif kind == 'post_deleted':
+                deltas[event.actor_id][1] -= 1
+                for author_id, count in data.get('comments', {}).items():
+                    deltas[author_id][2] -= count
+            elif kind == 'user_created':
+                deltas[event.entity_id]
+        conn.executemany('''
+            INSERT INTO user_stats (user_id, karma, posts, comments) VALUES (?, ?, ?, ?)
+            ON CONFLICT (user_id) DO UPDATE SET karma = karma + excluded.karma, posts = posts + excluded.posts,
+                                                comments = comments + excluded.comments
+        ''', [(user_id, *delta) for user_id, delta in deltas.items() if user_id])
+
+
+class DailyActivityProjector(Projector):
+    """Activitatea pe zile (UTC): câte conturi, postări, comentarii, mesaje și voturi au apărut"""
+    name = 'daily_activity'
+    tables = ('daily_activity',)
+    schema = ('''
+        CREATE TABLE IF NOT EXISTS daily_activity (
+            day TEXT PRIMARY KEY,
+            users INTEGER NOT NULL DEFAULT 0,
+            posts INTEGER NOT NULL DEFAULT 0,
+            comments INTEGER NOT NULL DEFAULT 0,
+            messages INTEGER NOT NULL DEFAULT 0,
+            votes INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''',)
+    COLUMNS = {'user_created': 0, 'post_created': 1, 'comment_created': 2, 'message_sent': 3, 'vote_cast': 4}
+
+    def apply(self, conn, events: List[Event]):
+        counts: Dict[str, List[int]] = defaultdict(lambda: [0] * 5)
+        for event in events:
+            column = self.COLUMNS.get(event.kind)
+            if column is not None:
+                counts[event.created_at[:10]][column] += 1
+        conn.executemany('''
+            INSERT INTO daily_activity (day, users, posts, comments, messages, votes) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (day) DO UPDATE SET users = users + excluded.users, posts = posts + excluded.posts,
+                                            comments = comments + excluded.comments,
+                                            messages = messages + excluded.messages, votes = votes + excluded.votes
+        ''', [(day, *row) for day, row in counts.items()])
+
+
+PROJECTORS: Dict[str, Projector] = {projector.name: projector
+                                    for projector in (UserStatsProjector(), DailyActivityProjector())}
+
+
+def checkpoint(conn, name: str) -> int:
+    row = conn.execute("SELECT seq FROM projections WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else 0
+
+
+def save_checkpoint(conn, name: str, seq: int):
+    conn.execute('''
+        INSERT INTO projections (name, seq, updated_at) VALUES (?, ?, ?)
+        ON CONFLICT (name) DO UPDATE SET seq = excluded.seq, updated_at = excluded.updated_at
+    ''', (name, seq, _utc_now()))
+
+
+def catch_up(db: Database, projector: Projector, batch_size: int = CATCH_UP_BATCH) -> int:
+    """Aplică evenimentele de după checkpoint, câte un lot per tranzacție; întoarce câte au fost aplicate"""
+    applied = 0
+    while True:
+        # Verificarea fără lock de scriere: o proiecție la zi nu blochează scriitorii
+        with db.connection() as conn:
+            if conn.execute("SELECT IFNULL(MAX(seq), 0) FROM events").fetchone()[0] <= checkpoint(conn, projector.name):
+                return applied
+        with db.transaction() as conn:
+            projector.ensure(conn)
+            # Checkpoint-ul e recitit sub lock: două procese nu aplică același lot de două ori
+            rows = conn.execute(f"SELECT {EVENT_COLUMNS} FROM events WHERE seq > ? ORDER BY seq LIMIT ?",
+                                (checkpoint(conn, projector.name), batch_size)).fetchall()
+            if not rows:
+                return applied
+            projector.apply(conn, decode_events(rows))
+            save_checkpoint(conn, projector.name, rows[-1][0])
+        applied += len(rows)
+
+
+def rebuild(db: Database, projector: Projector, batch_size: int = REPLAY_BATCH) -> int:
+    """Reconstruiește proiecția de la zero, într-o singură tranzacție: cititorii văd vechea versiune până la commit"""
+    replayed = 0
+    with db.transaction() as conn:
+        projector.ensure(conn)
+        projector.reset(conn)
+        source = conn.execute(f"SELECT {EVENT_COLUMNS} FROM events ORDER BY seq")
+        last_seq = 0
+        while True:
+            rows = source.fetchmany(batch_size)
+            if not rows:
+                break
+            projector.apply(conn, decode_events(rows))
+            last_seq = rows[-1][0]
+            replayed += len(rows)
+        save_checkpoint(conn, projector.name, last_seq)
+    # Evenimentele scrise între timp de alte procese (după commit-ul nostru)
+    return replayed + catch_up(db, projector)
+
+
+def get_user_stats(db: Database, user_id: str) -> Optional[Dict[str, int]]:
+    with db.connection() as conn:
+        try:
+            row = conn.execute("SELECT karma, posts, comments FROM user_stats WHERE user_id = ?", (user_id,)).fetchone()
+        except sqlite3.OperationalError:
+            # Proiecția n-a rulat încă niciodată
+            return None
+    return dict(zip(('karma', 'posts', 'comments'), row)) if row else None
+
+
+class ProjectionWorker:
+    """Fir de fundal care ține proiecțiile la zi cu jurnalul, la fiecare interval_ms"""
+
+    def __init__(self, db: Database, projectors: Iterable[Projector] = tuple(PROJECTORS.values()),
+                 interval_ms: int = 1000):
+        self.db = db
+        self.projectors = list(projectors)
+        self.interval = interval_ms / 1000
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="projections", daemon=True)
+        self._thread.start()
+
+    def run_once(self) -> int:
+        return sum(catch_up(self.db, projector) for projector in self.projectors)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.run_once()
+            except sqlite3.Error:
+                # Lock ocupat sau bază închisă: reîncercăm la următorul interval
+                continue
+
+    def close(self):
+        self._stopped.set()
+        self._thread.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["status", "catch-up", "replay"])
+    parser.add_argument("projections", nargs="*", help=f"implicit toate: {', '.join(PROJECTORS)}")
+    parser.add_argument("--db", default="reddit_clone.db")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.projections) - set(PROJECTORS)
+    if unknown:
+        parser.error(f"proiecții necunoscute: {', '.join(sorted(unknown))}")
+    selected = [PROJECTORS[name] for name in args.projections or PROJECTORS]
+    db = Database(args.db)
+
+    if args.command == "status":
+        with db.connection() as conn:
+            head = conn.execute("SELECT IFNULL(MAX(seq), 0) FROM events").fetchone()[0]
+            print(f"jurnal: {head:,} evenimente")
+            for projector in selected:
+                seq = checkpoint(conn, projector.name)
+                print(f"{projector.name:<16} seq {seq:>12,}  în urmă cu {head - seq:,}")
+    else:
+        for projector in selected:
+            start = time.perf_counter()
+            count = rebuild(db, projector) if args.command == "replay" else catch_up(db, projector)
+            elapsed = time.perf_counter() - start
+            print(f"{projector.name:<16} {count:>12,} evenimente în {elapsed:.2f}s "
+                  f"({count / elapsed if elapsed else 0:,.0f}/s)")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Import NDJSON (un obiect JSON pe linie) în baza de date, în flux.
+
+Exemple:
+    python import_data.py users users.ndjson
+    python import_data.py posts posts.ndjson --db reddit_clone.db --chunk-size 5000
+    cat comments.ndjson | python import_data.py comments -
+
+Câmpurile fiecărui rând sunt cele acceptate de User/Post/Comment.bulk_create.
+Rândurile respinse sunt raportate pe stderr, fără să oprească importul.
+"""
+import argparse
+import json
+import sys
+import time
+
+from database import BULK_CHUNK_SIZE, Comment, Database, Post, User
+
+
+def read_ndjson(stream, stats):
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as error:
+            stats['invalid'] += 1
+            print(f"linia {line_number}: JSON invalid: {error}", file=sys.stderr)
+            continue
+        stats['records'] += 1
+        yield row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kind", choices=["users", "posts", "comments"])
+    parser.add_argument("path", help="fișier NDJSON sau - pentru stdin")
+    parser.add_argument("--db", default="reddit_clone.db")
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    db = Database(args.db)
+    manager = {"users": User, "posts": Post, "comments": Comment}[args.kind](db)
+    stream = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8")
+    stats = {'records': 0, 'invalid': 0}
+
+    start = time.perf_counter()
+    try:
+        result = manager.bulk_create(read_ndjson(stream, stats), chunk_size=args.chunk_size)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        db.close()
+    elapsed = time.perf_counter() - start
+
+    for index, reason in result.failures:
+        print(f"înregistrarea {index + 1}: {reason}", file=sys.stderr)
+
+    rate = result.inserted / elapsed if elapsed else 0
+    print(f"{result.inserted:,} din {stats['records']:,} înregistrări importate în {elapsed:.1f}s "
+          f"({rate:,.0f} rânduri/sec); {len(result.failures):,} respinse, {stats['invalid']:,} linii JSON invalide")
+    return 1 if result.failures or stats['invalid'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
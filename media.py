@@ -0,0 +1,248 @@
+"""Fișiere media adresate după conținut, cu variante redimensionate generate în fundal.
+
+Un upload e scris pe disc în bucăți, calculând SHA-256 pe parcurs; hash-ul
+devine numele fișierului și cheia din tabelul media, deci același conținut
+încărcat de două ori ocupă loc o singură dată. Structura pe disc:
+
+    media/originals/ab/cd/<hash>
+    media/variants/ab/cd/<hash>_thumb.jpg
+    media/variants/ab/cd/<hash>_preview.jpg
+
+Variantele (thumb pentru feed, preview pentru pagina postării) se generează
+într-un pool de procese, în afara cererii. Fără Pillow instalat, fișierele
+rămân 'pending' și sunt procesate de resume_pending() când Pillow devine
+disponibil; interfața nu afișează niciodată originalul.
+
+Postările create înainte de acest modul au conținutul 'image_<nume fișier>' și
+niciun rând în media: pentru ele nu există variante, ci doar fișierul cu acel
+nume, dacă a fost păstrat (legacy_path).
+"""
+import hashlib
+import importlib.util
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import BinaryIO, Dict, Optional, Tuple
+
+from database import Database
+
+CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+# Numele variantei -> latura maximă în pixeli
+VARIANTS = {'thumb': 320, 'preview': 1080}
+JPEG_QUALITY = 85
+
+# Primii octeți ai formatelor acceptate
+_SIGNATURES = ((b'\x89PNG\r\n\x1a\n', 'image/png'), (b'\xff\xd8\xff', 'image/jpeg'))
+
+HAS_PILLOW = importlib.util.find_spec('PIL') is not None
+# Conținutul postărilor cu imagine dinaintea MediaStore: prefixul urmat de numele fișierului încărcat
+LEGACY_PREFIX = 'image_'
+
+
+def is_legacy(content: str) -> bool:
+    return content.startswith(LEGACY_PREFIX)
+
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    for signature, content_type in _SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    return None
+
+
+def _sharded(root: str, digest: str, suffix: str = '') -> str:
+    # Două niveluri de directoare: niciun director nu ajunge la sute de mii de fișiere
+    return os.path.join(root, digest[:2], digest[2:4], digest + suffix)
+
+
+def render_variants(source: str, targets: Dict[str, Tuple[str, int]]) -> Dict[str, Tuple[int, int]]:
+    """Rulează în procesul lucrător: scrie fiecare variantă și întoarce dimensiunile ei"""
+    from PIL import Image, ImageOps
+
+    sizes = {}
+    with Image.open(source) as original:
+        # Orientarea din EXIF se aplică înainte de redimensionare
+        image = ImageOps.exif_transpose(original).convert('RGB')
+    for name, (path, max_side) in targets.items():
+        variant = image.copy()
+        variant.thumbnail((max_side, max_side))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Fișier temporar + rename: cititorii nu văd niciodată o variantă scrisă pe jumătate
+        fd, partial = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.partial')
+        with os.fdopen(fd, 'wb') as out:
+            variant.save(out, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+        os.replace(partial, path)
+        sizes[name] = variant.size
+    return sizes
+
+
+class MediaStore:
+    """Uploaduri deduplicate pe disc și variantele lor; workers=0 generează variantele în firul apelantului"""
+
+    def __init__(self, db: Database, root: str = "media", workers: Optional[int] = None,
+                 cache_bytes: int = 32 * 1024 * 1024, legacy_root: str = "."):
+        self.db = db
+        self.root = root
+        self.originals = os.path.join(root, "originals")
+        self.variants = os.path.join(root, "variants")
+        self.workers = min(2, os.cpu_count() or 1) if workers is None else workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.legacy_root = legacy_root
+        # Variantele citite des rămân în memorie: LRU limitat la cache_bytes octeți
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._cached_bytes = 0
+        self._max_bytes = cache_bytes
+        os.makedirs(self.originals, exist_ok=True)
+        os.makedirs(self.variants, exist_ok=True)
+
+    def original_path(self, digest: str) -> str:
+        return _sharded(self.originals, digest)
+
+    def variant_path(self, digest: str, name: str) -> str:
+        return _sharded(self.variants, digest, f"_{name}.jpg")
+
+    def legacy_path(self, content: str) -> Optional[str]:
+        """Fișierul unei postări 'image_<nume>' din legacy_root, dacă există; numele nu poate ieși din director"""
+        path = os.path.join(self.legacy_root, os.path.basename(content[len(LEGACY_PREFIX):]))
+        return path if os.path.isfile(path) else None
+
+    def store(self, upload: BinaryIO) -> str:
+        """Scrie fișierul în bucăți și întoarce hash-ul lui; un conținut deja cunoscut nu mai e scris"""
+        return self.register(*self.save_file(upload))
+
+    def save_file(self, upload: BinaryIO) -> Tuple[str, int, str]:
+        """Doar partea de pe disc din store: (hash, mărime, tip), fără nicio scriere în bază"""
+        hasher = hashlib.sha256()
+        size = 0
+        content_type = None
+        fd, partial = tempfile.mkstemp(dir=self.originals, suffix='.partial')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                while True:
+                    chunk = upload.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    if size == 0:
+                        content_type = sniff_content_type(chunk)
+                        if content_type is None:
+                            raise ValueError("Format de imagine neacceptat (doar PNG și JPEG)")
+                    size += len(chunk)
+                    if size > MAX_UPLOAD_BYTES:
+                        raise ValueError(f"Fișierul depășește {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+                    hasher.update(chunk)
+                    out.write(chunk)
+            if size == 0:
+                raise ValueError("Fișier gol")
+
+            digest = hasher.hexdigest()
+            path = self.original_path(digest)
+            if os.path.exists(path):
+                os.remove(partial)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(partial, path)
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        return digest, size, content_type
+
+    def register(self, digest: str, size: int, content_type: str) -> str:
+        """Înregistrează un fișier salvat cu save_file și pornește generarea variantelor"""
+        with self.db.transaction() as conn:
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO media (hash, size, content_type) VALUES (?, ?, ?)",
+                (digest, size, content_type)
+            ).rowcount
+        if inserted:
+            # După commit: un worker rapid își scrie rezultatul doar peste un rând existent
+            self.db.after_commit(lambda: self.schedule(digest))
+        return digest
+
+    def schedule(self, digest: str) -> Optional[Future]:
+        """Pornește generarea variantelor; fără Pillow fișierul rămâne 'pending'"""
+        if not HAS_PILLOW:
+            return None
+        targets = {name: (self.variant_path(digest, name), side) for name, side in VARIANTS.items()}
+        if self.workers == 0:
+            future: Future = Future()
+            try:
+                future.set_result(render_variants(self.original_path(digest), targets))
+            except Exception as error:
+                future.set_exception(error)
+        else:
+            with self._lock:
+                if self._executor is None:
+                    # spawn: procesul Streamlit are multe fire, iar fork-ul lor nu e sigur
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                    )
+            future = self._executor.submit(render_variants, self.original_path(digest), targets)
+        future.add_done_callback(lambda done: self._finished(digest, done))
+        return future
+
+    def _finished(self, digest: str, future: Future):
+        error = future.exception()
+        with self.db.transaction() as conn:
+            if error is None:
+                width, height = future.result()['preview']
+                conn.execute("UPDATE media SET status = 'ready', width = ?, height = ? WHERE hash = ?",
+                             (width, height, digest))
+            else:
+                conn.execute("UPDATE media SET status = 'failed', error = ? WHERE hash = ?",
+                             (f"{type(error).__name__}: {error}"[:500], digest))
+
+    def resume_pending(self) -> int:
+        """Reprogramează fișierele rămase fără variante (repornire, Pillow instalat ulterior)"""
+        if not HAS_PILLOW:
+            return 0
+        with self.db.connection() as conn:
+            pending = [row[0] for row in conn.execute("SELECT hash FROM media WHERE status = 'pending'").fetchall()]
+        for digest in pending:
+            self.schedule(digest)
+        return len(pending)
+
+    def status(self, digest: str) -> Optional[str]:
+        with self.db.connection() as conn:
+            row = conn.execute("SELECT status FROM media WHERE hash = ?", (digest,)).fetchone()
+        return row[0] if row else None
+
+    def read_variant(self, digest: str, name: str) -> Optional[bytes]:
+        """Conținutul variantei sau None dacă nu e (încă) generată; originalul nu e servit niciodată"""
+        if name not in VARIANTS:
+            raise ValueError(f"Variantă necunoscută: {name}")
+        path = self.variant_path(digest, name)
+        with self._lock:
+            data = self._cache.get(path)
+            if data is not None:
+                self._cache.move_to_end(path)
+                return data
+        try:
+            with open(path, 'rb') as source:
+                data = source.read()
+        except FileNotFoundError:
+            return None
+        if not data:
+            return None
+        with self._lock:
+            # Variantele nu se mai schimbă după rename: bytes-urile din cache rămân valide, iar st.image le primește direct
+            if path not in self._cache:
+                self._cache[path] = data
+                self._cached_bytes += len(data)
+                while self._cached_bytes > self._max_bytes:
+                    _, evicted = self._cache.popitem(last=False)
+                    self._cached_bytes -= len(evicted)
+        return data
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+            self._cache.clear()
+            self._cached_bytes = 0
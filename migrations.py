@@ -0,0 +1,617 @@
+"""Migrări de schemă versionate.
+
+Fiecare migrare are o versiune, o descriere și o listă de pași. Un pas este
+fie o instrucțiune SQL, fie o funcție care primește cursorul. Pașii trebuie
+să fie idempotenți, ca o bază creată înainte de sistemul de migrări să poată
+fi adusă la zi fără erori.
+"""
+import json
+import sqlite3
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+Step = Union[str, Callable[[sqlite3.Cursor], None]]
+
+
+def add_column(table: str, column: str, definition: str) -> Callable[[sqlite3.Cursor], None]:
+    """Pas idempotent de ALTER TABLE ADD COLUMN (SQLite nu are IF NOT EXISTS aici)"""
+    def step(cursor: sqlite3.Cursor):
+        columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return step
+
+
+def fts_index(table: str, columns: List[str]) -> List[str]:
+    """Tabel FTS5 cu conținut extern peste `table` și triggerele care îl țin sincronizat.
+
+    Indexul nu dublează textul: FTS5 citește coloanele din tabelul sursă după rowid.
+    Fără diacritice la tokenizare ("pisica" găsește "pisică"); indexurile de prefix
+    accelerează căutarea "cuv*".
+    """
+    fts = f"{table}_fts"
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{col}" for col in columns)
+    old_values = ", ".join(f"old.{col}" for col in columns)
+    return [
+        f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {cols}, content='{table}', content_rowid='rowid',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts} (rowid, {cols}) VALUES (new.rowid, {new_values});
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old_values});
+        END
+        ''',
+        # Doar coloanele indexate: actualizările de voturi nu ating indexul
+        f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old_values});
+            INSERT INTO {fts} (rowid, {cols}) VALUES (new.rowid, {new_values});
+        END
+        ''',
+        f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')",
+    ]
+
+
+def comment_path(parent_path: str, rowid: int) -> str:
+    """Calea unui comentariu: calea părintelui + rowid-ul său pe lățime fixă.
+
+    Sortarea lexicografică după cale dă parcurgerea în preordine a thread-ului,
+    cu frații în ordinea creării.
+    """
+    return f"{parent_path or ''}{rowid:010x}"
+
+
+def _backfill_comment_paths(cursor: sqlite3.Cursor):
+    rows = cursor.execute(
+        "SELECT rowid, id, parent_id, path, depth FROM comments ORDER BY rowid"
+    ).fetchall()
+    paths = {comment_id: (path, depth) for _, comment_id, _, path, depth in rows if path}
+    replies = {}
+
+    for rowid, comment_id, parent_id, path, _ in rows:
+        if parent_id:
+            replies[parent_id] = replies.get(parent_id, 0) + 1
+        if path:
+            continue
+        # Un părinte lipsă (șters) face din comentariu o rădăcină
+        parent_path, parent_depth = paths.get(parent_id, ('', -1))
+        paths[comment_id] = (comment_path(parent_path, rowid), parent_depth + 1)
+        cursor.execute(
+            "UPDATE comments SET path = ?, depth = ? WHERE rowid = ?",
+            (paths[comment_id][0], paths[comment_id][1], rowid)
+        )
+
+    cursor.executemany(
+        "UPDATE comments SET reply_count = ? WHERE id = ?",
+        [(count, comment_id) for comment_id, count in replies.items()]
+    )
+
+
+# Caractere din ultimul mesaj păstrate în conversație pentru lista inbox
+MESSAGE_PREVIEW_CHARS = 120
+
+
+def backfill_conversations(cursor: sqlite3.Cursor):
+    """Leagă mesajele fără conversație de perechea lor și recalculează contoarele conversațiilor.
+
+    Folosit la migrare și după importuri care scriu direct în messages.
+    """
+    cursor.execute('''
+        INSERT OR IGNORE INTO conversations (id, user_a, user_b)
+        SELECT lower(hex(randomblob(16))), MIN(sender_id, receiver_id), MAX(sender_id, receiver_id)
+        FROM messages
+        WHERE conversation_id IS NULL
+        GROUP BY MIN(sender_id, receiver_id), MAX(sender_id, receiver_id)
+    ''')
+    cursor.execute('''
+        UPDATE messages SET conversation_id = (
+            SELECT id FROM conversations
+            WHERE user_a = MIN(messages.sender_id, messages.receiver_id)
+              AND user_b = MAX(messages.sender_id, messages.receiver_id)
+        )
+        WHERE conversation_id IS NULL
+    ''')
+    cursor.execute(f'''
+        UPDATE conversations SET
+            message_count = (SELECT COUNT(*) FROM messages WHERE conversation_id = conversations.id),
+            unread_a = (SELECT COUNT(*) FROM messages WHERE conversation_id = conversations.id
+                        AND receiver_id = conversations.user_a AND is_read = 0),
+            unread_b = (SELECT COUNT(*) FROM messages WHERE conversation_id = conversations.id
+                        AND receiver_id = conversations.user_b AND is_read = 0 AND user_a != user_b),
+            (last_message_id, last_message, last_sender_id, last_activity) = (
+                SELECT id, substr(content, 1, {MESSAGE_PREVIEW_CHARS}), sender_id, created_at
+                FROM messages WHERE conversation_id = conversations.id
+                ORDER BY created_at DESC, rowid DESC LIMIT 1
+            )
+    ''')
+
+
+# Comunitățile cu mai mulți membri nu mai copiază postările în timeline-uri: feed-ul le
+# citește postările la cerere. Pragul e fixat în triggerele din migrarea 8.
+FANOUT_MAX_MEMBERS = 500
+# Câte postări recente ale unei comunități primește timeline-ul unui membru nou
+TIMELINE_BACKFILL_POSTS = 50
+
+
+def backfill_timelines(cursor: sqlite3.Cursor):
+    """Umple timeline-urile membrilor cu ultimele postări ale comunităților cu fan-out.
+
+    Folosit la migrare și după importuri care scriu direct în community_members.
+    """
+    cursor.execute('''
+        INSERT OR IGNORE INTO timelines (user_id, created_at, post_id, community_id)
+        SELECT m.user_id, p.created_at, p.id, p.community_id
+        FROM (
+            SELECT id, community_id, created_at,
+                   ROW_NUMBER() OVER (PARTITION BY community_id ORDER BY created_at DESC, id DESC) AS position
+            FROM posts
+            WHERE community_id IN (SELECT id FROM communities WHERE pull_feed = 0)
+        ) p
+        JOIN community_members m ON m.community_id = p.community_id
+        WHERE p.position <= ?
+    ''', (TIMELINE_BACKFILL_POSTS,))
+
+
+def encode_event_data(data: Optional[Dict]) -> Optional[str]:
+    # JSON fără spații; un eveniment fără câmpuri suplimentare nu ocupă nimic
+    return json.dumps(data, separators=(',', ':')) if data else None
+
+
+# Sursele evenimentelor reconstruite din tabele: (kind, created_at, entity_id, actor_id, a, b, c, d).
+# Voturile pe postări și comentarii existente la import, fără rând în votes, apar ca up/down inițiale.
+EVENT_SOURCES = {
+    'user_created': "SELECT 'user_created', created_at, id, id, NULL, NULL, NULL, NULL FROM users",
+    'community_created': '''
+        SELECT 'community_created', created_at, id, creator_id, NULL, NULL, NULL, NULL FROM communities
+    ''',
+    'member_joined': '''
+        SELECT 'member_joined', joined_at, community_id, user_id, NULL, NULL, NULL, NULL FROM community_members
+    ''',
+    'post_created': '''
+        SELECT 'post_created', p.created_at, p.id, p.author_id, p.community_id, NULL,
+               p.upvotes - IFNULL(v.up, 0), p.downvotes - IFNULL(v.down, 0)
+        FROM posts p LEFT JOIN (
+            SELECT target_id, SUM(value = 1) AS up, SUM(value = -1) AS down FROM votes
+            WHERE target_type = 'post' GROUP BY target_id
+        ) v ON v.target_id = p.id
+    ''',
+    'comment_created': '''
+        SELECT 'comment_created', c.created_at, c.id, c.author_id, c.post_id, c.parent_id,
+               c.upvotes - IFNULL(v.up, 0), c.downvotes - IFNULL(v.down, 0)
+        FROM comments c LEFT JOIN (
+            SELECT target_id, SUM(value = 1) AS up, SUM(value = -1) AS down FROM votes
+            WHERE target_type = 'comment' GROUP BY target_id
+        ) v ON v.target_id = c.id
+    ''',
+    'message_sent': '''
+        SELECT 'message_sent', created_at, id, sender_id, receiver_id, conversation_id, NULL, NULL FROM messages
+    ''',
+    'vote_cast': '''
+        SELECT 'vote_cast', v.created_at, v.target_id, v.user_id, v.target_type,
+               COALESCE(p.author_id, c.author_id), v.value, NULL
+        FROM votes v
+        LEFT JOIN posts p ON v.target_type = 'post' AND p.id = v.target_id
+        LEFT JOIN comments c ON v.target_type = 'comment' AND c.id = v.target_id
+    ''',
+}
+
+
+def _event_data(kind: str, a, b, c, d) -> Optional[Dict]:
+    # Aceleași câmpuri pe care le scriu managerii din database.py
+    if kind in ('post_created', 'comment_created'):
+        data = {'community': a} if kind == 'post_created' else {'post': a}
+        if b:
+            data['parent'] = b
+        if c or d:
+            data.update(up=c, down=d)
+        return data
+    if kind == 'message_sent':
+        return {'to': a, 'conversation': b}
+    if kind == 'vote_cast':
+        return {'type': a, 'author': b, 'previous': 0, 'value': c}
+    return None
+
+
+def backfill_events(cursor: sqlite3.Cursor, kinds: Iterable[str] = tuple(EVENT_SOURCES)):
+    """Adaugă în jurnal câte un eveniment pentru fiecare rând existent, în ordine cronologică.
+
+    Folosit la migrare și după importuri care scriu direct în tabele, ocolind managerii.
+    """
+    union = " UNION ALL ".join(EVENT_SOURCES[kind] for kind in kinds)
+    # În aceeași secundă, ordinea din EVENT_SOURCES: utilizatorul înaintea postării, postarea înaintea comentariului
+    rank = " ".join(f"WHEN '{kind}' THEN {index}" for index, kind in enumerate(EVENT_SOURCES))
+    # Un cursor separat: citim și scriem pe aceeași conexiune, în tabele diferite
+    source = cursor.connection.execute(f'''
+        WITH source (kind, created_at, entity_id, actor_id, a, b, c, d) AS ({union})
+        SELECT * FROM source ORDER BY created_at, CASE kind {rank} END
+    ''')
+    while True:
+        rows = source.fetchmany(10_000)
+        if not rows:
+            return
+        cursor.executemany(
+            "INSERT INTO events (kind, entity_id, actor_id, data, created_at) VALUES (?, ?, ?, ?, ?)",
+            [(kind, entity_id, actor_id, encode_event_data(_event_data(kind, a, b, c, d)), created_at)
+             for kind, created_at, entity_id, actor_id, a, b, c, d in rows]
+        )
+
+
+MIGRATIONS: List[Tuple[int, str, List[Step]]] = [
+    (1, "schema inițială", [
+        # Tabela utilizatori
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            id TEXT PRIMARY KEY,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            karma INTEGER DEFAULT 0,
+            bio TEXT DEFAULT ''
+        )
+        ''',
+        # Tabela comunități
+        '''
+        CREATE TABLE IF NOT EXISTS communities (
+            id TEXT PRIMARY KEY,
+            name TEXT UNIQUE NOT NULL,
+            description TEXT,
+            creator_id TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            members_count INTEGER DEFAULT 1,
+            FOREIGN KEY (creator_id) REFERENCES users (id)
+        )
+        ''',
+        # Tabela postări
+        '''
+        CREATE TABLE IF NOT EXISTS posts (
+            id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            content TEXT,
+            post_type TEXT DEFAULT 'text',
+            author_id TEXT,
+            community_id TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            upvotes INTEGER DEFAULT 0,
+            downvotes INTEGER DEFAULT 0,
+            FOREIGN KEY (author_id) REFERENCES users (id),
+            FOREIGN KEY (community_id) REFERENCES communities (id)
+        )
+        ''',
+        # Tabela comentarii
+        '''
+        CREATE TABLE IF NOT EXISTS comments (
+            id TEXT PRIMARY KEY,
+            content TEXT NOT NULL,
+            author_id TEXT,
+            post_id TEXT,
+            parent_id TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            upvotes INTEGER DEFAULT 0,
+            downvotes INTEGER DEFAULT 0,
+            FOREIGN KEY (author_id) REFERENCES users (id),
+            FOREIGN KEY (post_id) REFERENCES posts (id),
+            FOREIGN KEY (parent_id) REFERENCES comments (id)
+        )
+        ''',
+        # Tabela mesaje private
+        '''
+        CREATE TABLE IF NOT EXISTS messages (
+            id TEXT PRIMARY KEY,
+            sender_id TEXT,
+            receiver_id TEXT,
+            content TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            is_read BOOLEAN DEFAULT FALSE,
+            FOREIGN KEY (sender_id) REFERENCES users (id),
+            FOREIGN KEY (receiver_id) REFERENCES users (id)
+        )
+        ''',
+        # Tabela membri comunități
+        '''
+        CREATE TABLE IF NOT EXISTS community_members (
+            user_id TEXT,
+            community_id TEXT,
+            joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, community_id),
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (community_id) REFERENCES communities (id)
+        )
+        ''',
+    ]),
+    (2, "indexuri pentru feed, comentarii, mesaje și membri", [
+        # ORDER BY din Post.get_feed_posts; id departajează postările din aceeași secundă
+        "CREATE INDEX IF NOT EXISTS idx_posts_created ON posts (created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_posts_community_created ON posts (community_id, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_comments_post_created ON comments (post_id, created_at)",
+        # Cele două ramuri ale OR-ului din Message.get_user_messages
+        "CREATE INDEX IF NOT EXISTS idx_messages_sender ON messages (sender_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_messages_receiver ON messages (receiver_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_community_members_community ON community_members (community_id, user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_communities_members ON communities (members_count)",
+        # Indexuri acoperitoare: JOIN-urile pe autor/comunitate citesc doar indexul
+        "CREATE INDEX IF NOT EXISTS idx_users_id_username ON users (id, username)",
+        "CREATE INDEX IF NOT EXISTS idx_communities_id_name ON communities (id, name)",
+    ]),
+    (3, "voturi unice per utilizator și țintă", [
+        '''
+        CREATE TABLE IF NOT EXISTS votes (
+            user_id TEXT NOT NULL,
+            target_type TEXT NOT NULL,
+            target_id TEXT NOT NULL,
+            value INTEGER NOT NULL CHECK (value IN (-1, 1)),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, target_type, target_id),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        ) WITHOUT ROWID
+        ''',
+        # Curățarea voturilor la ștergerea unei postări/comentariu
+        "CREATE INDEX IF NOT EXISTS idx_votes_target ON votes (target_type, target_id)",
+    ]),
+    (4, "scoruri de ranking materializate pe postări", [
+        add_column("posts", "score", "INTEGER DEFAULT 0"),
+        add_column("posts", "hot_rank", "REAL DEFAULT 0"),
+        add_column("posts", "controversy", "REAL DEFAULT 0"),
+        # hot_score/controversy_score sunt înregistrate pe conexiune de ranking.register_functions
+        '''
+        UPDATE posts SET score = upvotes - downvotes,
+                         hot_rank = hot_score(upvotes, downvotes, created_at),
+                         controversy = controversy_score(upvotes, downvotes)
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_posts_hot ON posts (hot_rank, id)",
+        "CREATE INDEX IF NOT EXISTS idx_posts_score ON posts (score, id)",
+        "CREATE INDEX IF NOT EXISTS idx_posts_controversy ON posts (controversy, id)",
+        "CREATE INDEX IF NOT EXISTS idx_posts_community_hot ON posts (community_id, hot_rank, id)",
+        "CREATE INDEX IF NOT EXISTS idx_posts_community_score ON posts (community_id, score, id)",
+        "CREATE INDEX IF NOT EXISTS idx_posts_community_controversy ON posts (community_id, controversy, id)",
+    ]),
+    (5, "cale materializată și adâncime pentru comentarii", [
+        add_column("comments", "path", "TEXT"),
+        add_column("comments", "depth", "INTEGER DEFAULT 0"),
+        add_column("comments", "reply_count", "INTEGER DEFAULT 0"),
+        _backfill_comment_paths,
+        # Un subarbore = un range pe (post_id, path)
+        "CREATE INDEX IF NOT EXISTS idx_comments_post_path ON comments (post_id, path)",
+    ]),
+    (6, "căutare full-text FTS5", [
+        *fts_index("posts", ["title", "content"]),
+        *fts_index("comments", ["content"]),
+        *fts_index("communities", ["name", "description"]),
+    ]),
+    (7, "conversații cu ultimul mesaj și mesaje necitite", [
+        # O conversație per pereche de utilizatori, cu user_a <= user_b
+        '''
+        CREATE TABLE IF NOT EXISTS conversations (
+            id TEXT PRIMARY KEY,
+            user_a TEXT NOT NULL,
+            user_b TEXT NOT NULL,
+            last_message_id TEXT,
+            last_message TEXT,
+            last_sender_id TEXT,
+            last_activity TIMESTAMP,
+            unread_a INTEGER NOT NULL DEFAULT 0,
+            unread_b INTEGER NOT NULL DEFAULT 0,
+            message_count INTEGER NOT NULL DEFAULT 0,
+            UNIQUE (user_a, user_b),
+            CHECK (user_a <= user_b),
+            FOREIGN KEY (user_a) REFERENCES users (id),
+            FOREIGN KEY (user_b) REFERENCES users (id)
+        )
+        ''',
+        # Inbox-ul unui utilizator = două range scan-uri, câte unul pe fiecare poziție din pereche
+        "CREATE INDEX IF NOT EXISTS idx_conversations_a ON conversations (user_a, last_activity, id)",
+        "CREATE INDEX IF NOT EXISTS idx_conversations_b ON conversations (user_b, last_activity, id)",
+        add_column("messages", "conversation_id", "TEXT REFERENCES conversations (id)"),
+        # Rowid-ul (la finalul oricărei intrări de index) ordonează mesajele din aceeași secundă
+        "CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages (conversation_id, created_at)",
+        # Doar mesajele necitite: marcarea ca citit nu parcurge tot istoricul
+        "CREATE INDEX IF NOT EXISTS idx_messages_unread ON messages (conversation_id, receiver_id) WHERE is_read = 0",
+        backfill_conversations,
+    ]),
+    (8, "members_count întreținut de triggere și timeline-uri personale", [
+        add_column("communities", "pull_feed", "INTEGER NOT NULL DEFAULT 0"),
+        '''
+        UPDATE communities SET members_count = (
+            SELECT COUNT(*) FROM community_members WHERE community_id = communities.id
+        )
+        ''',
+        f"UPDATE communities SET pull_feed = 1 WHERE members_count > {FANOUT_MAX_MEMBERS}",
+        # pull_feed nu revine la 0 când comunitatea scade sub prag: postările scrise
+        # între timp nu sunt în timeline-uri și ar dispărea din feed
+        f'''
+        CREATE TRIGGER IF NOT EXISTS community_members_ai AFTER INSERT ON community_members BEGIN
+            UPDATE communities SET members_count = members_count + 1,
+                                   pull_feed = pull_feed OR members_count + 1 > {FANOUT_MAX_MEMBERS}
+            WHERE id = new.community_id;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS community_members_ad AFTER DELETE ON community_members BEGIN
+            UPDATE communities SET members_count = members_count - 1 WHERE id = old.community_id;
+        END
+        ''',
+        # Feed-ul personal: o pagină e un range scan pe (user_id, created_at, post_id)
+        '''
+        CREATE TABLE IF NOT EXISTS timelines (
+            user_id TEXT NOT NULL,
+            created_at TIMESTAMP NOT NULL,
+            post_id TEXT NOT NULL,
+            community_id TEXT NOT NULL,
+            PRIMARY KEY (user_id, created_at, post_id)
+        ) WITHOUT ROWID
+        ''',
+        # Ștergerea unei postări scoate rândurile ei din toate timeline-urile
+        "CREATE INDEX IF NOT EXISTS idx_timelines_post ON timelines (post_id)",
+        # Puținele comunități mari, citite la cerere de feed-ul fiecărui membru
+        "CREATE INDEX IF NOT EXISTS idx_communities_pull ON communities (id) WHERE pull_feed = 1",
+        backfill_timelines,
+    ]),
+    (9, "notificări persistente cu contor de necitite", [
+        # id crescător (AUTOINCREMENT nu refolosește valori): cursorul de polling e ultimul id văzut
+        '''
+        CREATE TABLE IF NOT EXISTS notifications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            actor_id TEXT,
+            target_type TEXT,
+            target_id TEXT,
+            text TEXT,
+            count INTEGER NOT NULL DEFAULT 1,
+            read INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_notifications_user ON notifications (user_id, read, created_at)",
+        # Badge-ul din bara laterală citește contorul, nu numără notificările
+        add_column("users", "unread_notifications", "INTEGER NOT NULL DEFAULT 0"),
+        '''
+        CREATE TRIGGER IF NOT EXISTS notifications_ai AFTER INSERT ON notifications WHEN new.read = 0 BEGIN
+            UPDATE users SET unread_notifications = unread_notifications + 1 WHERE id = new.user_id;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS notifications_ad AFTER DELETE ON notifications WHEN old.read = 0 BEGIN
+            UPDATE users SET unread_notifications = unread_notifications - 1 WHERE id = old.user_id;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS notifications_au AFTER UPDATE OF read ON notifications
+        WHEN old.read != new.read BEGIN
+            UPDATE users SET unread_notifications = unread_notifications + (CASE WHEN new.read THEN -1 ELSE 1 END)
+            WHERE id = new.user_id;
+        END
+        ''',
+    ]),
+    (10, "fișiere media adresate după conținut", [
+        # hash = SHA-256 al conținutului; status: pending -> ready | failed (vezi media.py)
+        '''
+        CREATE TABLE IF NOT EXISTS media (
+            hash TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            content_type TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            width INTEGER,
+            height INTEGER,
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_media_pending ON media (hash) WHERE status = 'pending'",
+    ]),
+    (11, "jurnal de evenimente append-only și checkpoint-urile proiecțiilor", [
+        # seq e rowid-ul: scrierile sunt serializate, deci seq crește în ordinea commit-urilor
+        '''
+        CREATE TABLE IF NOT EXISTS events (
+            seq INTEGER PRIMARY KEY,
+            kind TEXT NOT NULL,
+            entity_id TEXT NOT NULL,
+            actor_id TEXT,
+            data TEXT,
+            created_at TIMESTAMP NOT NULL
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS events_no_update BEFORE UPDATE ON events BEGIN
+            SELECT RAISE(ABORT, 'jurnalul de evenimente e append-only');
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS events_no_delete BEFORE DELETE ON events BEGIN
+            SELECT RAISE(ABORT, 'jurnalul de evenimente e append-only');
+        END
+        ''',
+        # Ultimul seq aplicat de fiecare proiecție (vezi events.py)
+        '''
+        CREATE TABLE IF NOT EXISTS projections (
+            name TEXT PRIMARY KEY,
+            seq INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP
+        )
+        ''',
+        backfill_events,
+    ]),
+    (12, "starea limitatorului de rată (ratelimit.py)", [
+        # tat: momentul (epoch, secunde) la care găleata utilizatorului pentru acțiune e din nou plină
+        '''
+        CREATE TABLE IF NOT EXISTS rate_limits (
+            user_id TEXT NOT NULL,
+            action TEXT NOT NULL,
+            tat REAL NOT NULL,
+            PRIMARY KEY (user_id, action)
+        ) WITHOUT ROWID
+        ''',
+    ]),
+    (13, "checkpoint-urile motorului de trending (trending.py)", [
+        # Scorurile sunt relative la landmark (vezi DecayedTopK); seq-ul aplicat e în projections
+        '''
+        CREATE TABLE IF NOT EXISTS trending_sketches (
+            kind TEXT PRIMARY KEY,
+            landmark REAL NOT NULL,
+            cells BLOB NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS trending (
+            kind TEXT NOT NULL,
+            item_id TEXT NOT NULL,
+            score REAL NOT NULL,
+            PRIMARY KEY (kind, item_id)
+        ) WITHOUT ROWID
+        ''',
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    """Returnează ultima versiune aplicată (0 pentru o bază nouă)"""
+    try:
+        row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] or 0
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Aplică migrările lipsă în ordine și returnează câte au rulat.
+
+    Trebuie apelată într-o tranzacție de scriere (Database.transaction()),
+    astfel încât o migrare eșuată să nu lase schema pe jumătate modificată.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    version = current_version(conn)
+    applied = 0
+
+    for target, description, steps in MIGRATIONS:
+        if target <= version:
+            continue
+        cursor = conn.cursor()
+        for step in steps:
+            if callable(step):
+                step(cursor)
+            else:
+                cursor.execute(step)
+        conn.execute(
+            "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+            (target, description)
+        )
+        applied += 1
+
+    return applied
@@ -0,0 +1,140 @@
+"""Hash-uri de parole cu KDF lent (scrypt/PBKDF2 din hashlib).
+
+Fiecare hash își păstrează algoritmul și parametrii:
+
+    scrypt$n=16384,r=8,p=1$<salt>$<hash>
+    pbkdf2_sha256$i=600000$<salt>$<hash>
+
+Hash-urile vechi (SHA-256 simplu, 64 de caractere hex) sunt încă acceptate la
+login și marcate pentru rehash. Calculul KDF rulează într-un pool de procese
+limitat, ca o avalanșă de login-uri să nu blocheze firele Streamlit.
+"""
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+DEFAULT_PARAMS = {
+    'scrypt': {'n': 2 ** 14, 'r': 8, 'p': 1},
+    'pbkdf2_sha256': {'i': 600_000},
+}
+
+_SALT_BYTES = 16
+_KEY_BYTES = 32
+
+
+def _b64(raw: bytes) -> str:
+    return base64.b64encode(raw).decode().rstrip('=')
+
+
+def _unb64(text: str) -> bytes:
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+
+def _derive(password: str, salt: bytes, scheme: str, params: Dict[str, int]) -> bytes:
+    if scheme == 'scrypt':
+        n, r, p = params['n'], params['r'], params['p']
+        # scrypt are nevoie de ~128 * n * r octeți; lăsăm loc peste limita implicită de 32 MiB
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                              maxmem=256 * n * r + 1024 * 1024, dklen=_KEY_BYTES)
+    if scheme == 'pbkdf2_sha256':
+        return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, params['i'], dklen=_KEY_BYTES)
+    raise ValueError(f"Algoritm de hash necunoscut: {scheme}")
+
+
+def parse_hash(encoded: str) -> Tuple[str, Dict[str, int], bytes, bytes]:
+    """Descompune un hash în (algoritm, parametri, salt, cheie)"""
+    scheme, params, salt, key = encoded.split('$')
+    values = dict(item.split('=') for item in params.split(','))
+    return scheme, {name: int(value) for name, value in values.items()}, _unb64(salt), _unb64(key)
+
+
+def is_legacy_hash(encoded: str) -> bool:
+    return '$' not in encoded
+
+
+def hash_password(password: str, scheme: str = 'scrypt', params: Optional[Dict[str, int]] = None) -> str:
+    params = params or DEFAULT_PARAMS[scheme]
+    salt = os.urandom(_SALT_BYTES)
+    key = _derive(password, salt, scheme, params)
+    encoded_params = ','.join(f"{name}={value}" for name, value in sorted(params.items()))
+    return f"{scheme}${encoded_params}${_b64(salt)}${_b64(key)}"
+
+
+def verify_password(password: str, encoded: str) -> bool:
+    if is_legacy_hash(encoded):
+        legacy = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(legacy, encoded)
+    try:
+        scheme, params, salt, key = parse_hash(encoded)
+    except ValueError:
+        return False
+    return hmac.compare_digest(_derive(password, salt, scheme, params), key)
+
+
+class PasswordHasher:
+    """Serviciu de hash-uire cu parametri de cost configurabili.
+
+    workers=0 calculează în firul apelantului (scripturi, import de date);
+    altfel KDF-ul rulează într-un pool de `workers` procese, iar cel mult
+    `max_pending` cereri așteaptă simultan în coadă.
+    """
+
+    def __init__(self, scheme: str = 'scrypt', params: Optional[Dict[str, int]] = None,
+                 workers: Optional[int] = None, max_pending: int = 64):
+        if scheme not in DEFAULT_PARAMS:
+            raise ValueError(f"Algoritm de hash necunoscut: {scheme}")
+        self.scheme = scheme
+        self.params = dict(params or DEFAULT_PARAMS[scheme])
+        self.workers = min(4, os.cpu_count() or 1) if workers is None else workers
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._dummy_hash: Optional[str] = None
+
+    def _run(self, fn, *args):
+        if self.workers == 0:
+            return fn(*args)
+        with self._lock:
+            if self._executor is None:
+                # spawn: procesul Streamlit are multe fire, iar fork-ul lor nu e sigur
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+        with self._pending:
+            return self._executor.submit(fn, *args).result()
+
+    def hash(self, password: str) -> str:
+        return self._run(hash_password, password, self.scheme, self.params)
+
+    def verify(self, password: str, encoded: str) -> bool:
+        if is_legacy_hash(encoded):
+            # Un singur SHA-256: nu merită drumul până la pool
+            return verify_password(password, encoded)
+        return self._run(verify_password, password, encoded)
+
+    def dummy_hash(self) -> str:
+        """Un hash cu parametrii curenți, verificat la login pentru utilizatori inexistenți"""
+        if self._dummy_hash is None:
+            self._dummy_hash = self.hash(os.urandom(16).hex())
+        return self._dummy_hash
+
+    def needs_rehash(self, encoded: str) -> bool:
+        """Adevărat pentru hash-uri vechi sau calculate cu alt algoritm/alți parametri"""
+        if is_legacy_hash(encoded):
+            return True
+        try:
+            scheme, params, _, _ = parse_hash(encoded)
+        except ValueError:
+            return True
+        return scheme != self.scheme or params != self.params
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
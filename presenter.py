@@ -0,0 +1,121 @@
+"""Câmpurile de afișare pentru o pagină întreagă de postări sau comentarii, într-o singură trecere.
+
+Interfața primește rândurile deja formatate (time_ago, score, score_label,
+type_icon, excerpt) în loc să apeleze funcțiile din utils pentru fiecare
+element. Un timestamp e parsat o singură dată per proces, iar textul relativ
+("acum 3 ore") e memorat pe găleți de vârstă (minut, oră, zi): toate
+postările de acum 3 ore din pagină împart același șir. Rândurile sunt
+modificate pe loc.
+"""
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import List, Optional
+
+from records import CommentRecord, PostRecord
+
+POST_TYPE_ICONS = {
+    'text': '📝',
+    'link': '🔗',
+    'image': '🖼️',
+    'video': '🎥'
+}
+DEFAULT_POST_TYPE_ICON = POST_TYPE_ICONS['text']
+EXCERPT_CHARS = 200
+# Datele din baza de date sunt UTC fără fus orar; scăderea e în C, calendar.timegm e în Python (~5x mai lent)
+_EPOCH = datetime(1970, 1, 1)
+_SECOND = timedelta(seconds=1)
+
+
+@lru_cache(maxsize=65536)
+def parse_timestamp(timestamp_str: str) -> Optional[int]:
+    """Secunde UTC de la epoch; None dacă șirul nu e o dată. Datele fără fus orar sunt UTC, ca în baza de date"""
+    try:
+        parsed = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        return int(parsed.timestamp())
+    return (parsed - _EPOCH) // _SECOND
+
+
+def age_bucket(seconds: float) -> int:
+    """Vârsta în minute, rotunjită în jos la ora sau ziua întreagă: textul afișat se schimbă doar la aceste praguri"""
+    minutes = max(0, int(seconds) // 60)
+    if minutes >= 1440:
+        return minutes - minutes % 1440
+    if minutes >= 60:
+        return minutes - minutes % 60
+    return minutes
+
+
+# Cheile sunt găleți din age_bucket: 60 de minute, 24 de ore și câte o cheie pe zi
+@lru_cache(maxsize=4096)
+def age_label(minutes: int) -> str:
+    days, hours = minutes // 1440, minutes // 60
+    if days > 0:
+        return f"acum {days} {'zi' if days == 1 else 'zile'}"
+    if hours > 0:
+        return f"acum {hours} {'oră' if hours == 1 else 'ore'}"
+    if minutes > 0:
+        return f"acum {minutes} {'minut' if minutes == 1 else 'minute'}"
+    # Și datele din viitor (ceasuri desincronizate)
+    return "acum câteva secunde"
+
+
+def time_ago(timestamp_str: str, now: Optional[float] = None) -> str:
+    created = parse_timestamp(timestamp_str)
+    if created is None:
+        return timestamp_str
+    return age_label(age_bucket((time.time() if now is None else now) - created))
+
+
+@lru_cache(maxsize=8192)
+def format_number(num: int) -> str:
+    """Numerele mari prescurtate (1000 -> 1.0k); memorat, formatarea float-ului e partea scumpă"""
+    magnitude = abs(num)
+    if magnitude >= 1000000:
+        return f"{num/1000000:.1f}M"
+    if magnitude >= 1000:
+        return f"{num/1000:.1f}k"
+    return str(num)
+
+
+def truncate(text: str, max_length: int = EXCERPT_CHARS) -> str:
+    if len(text) <= max_length:
+        return text
+    return text[:max_length] + "..."
+
+
+def present_posts(posts: List[PostRecord], now: Optional[float] = None) -> List[PostRecord]:
+    """Completează câmpurile de afișare pentru toate postările din pagină"""
+    now = time.time() if now is None else now
+    icons = POST_TYPE_ICONS
+    for post in posts:
+        created = parse_timestamp(post.created_at)
+        post.time_ago = post.created_at if created is None else age_label(age_bucket(now - created))
+        post.score = score = post.upvotes - post.downvotes
+        post.score_label = format_number(score)
+        post_type = post.post_type
+        post.type_icon = icons.get(post_type, DEFAULT_POST_TYPE_ICON)
+        # Doar postările text au un extras; la link și imagine conținutul e URL-ul, respectiv hash-ul
+        if post_type == 'text':
+            content = post.content
+            post.excerpt = content if len(content) <= EXCERPT_CHARS else content[:EXCERPT_CHARS] + "..."
+        else:
+            post.excerpt = ''
+    return posts
+
+
+def present_comments(comments: List[CommentRecord], now: Optional[float] = None) -> List[CommentRecord]:
+    """Ca present_posts, pentru rândurile plate ale unui thread (copiii din arbore sunt aceleași obiecte)"""
+    now = time.time() if now is None else now
+    for comment in comments:
+        created = parse_timestamp(comment.created_at)
+        comment.time_ago = comment.created_at if created is None else age_label(age_bucket(now - created))
+        comment.score = score = comment.upvotes - comment.downvotes
+        comment.score_label = format_number(score)
+    return comments
+
+
+PRESENTERS = {'post': present_posts, 'comment': present_comments}
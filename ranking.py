@@ -0,0 +1,47 @@
+"""Formulele de ranking pentru feed (hot, top, controversial).
+
+Scorurile sunt calculate doar când se schimbă voturile unei postări și sunt
+stocate în coloane indexate, deci sortarea unei pagini nu le recalculează.
+Funcțiile sunt înregistrate și ca funcții SQL pe fiecare conexiune din pool.
+"""
+import math
+from datetime import datetime, timezone
+
+# Referința de timp folosită de Reddit pentru scorul "hot"
+HOT_EPOCH = 1134028003
+# La fiecare 12.5 ore o postare are nevoie de 10x mai multe voturi ca să rămână la fel de sus
+HOT_DECAY_SECONDS = 45000
+
+
+def _epoch_seconds(created_at) -> float:
+    if not created_at:
+        return 0.0
+    # CURRENT_TIMESTAMP din SQLite este în UTC, fără fus orar explicit
+    timestamp = datetime.fromisoformat(str(created_at).replace('Z', '+00:00'))
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+def hot_score(upvotes: int, downvotes: int, created_at) -> float:
+    """Scor care combină voturile (logaritmic) cu vechimea postării"""
+    score = upvotes - downvotes
+    order = math.log10(max(abs(score), 1))
+    sign = 1 if score > 0 else -1 if score < 0 else 0
+    seconds = _epoch_seconds(created_at) - HOT_EPOCH
+    return round(sign * order + seconds / HOT_DECAY_SECONDS, 7)
+
+
+def controversy_score(upvotes: int, downvotes: int) -> float:
+    """Mare când o postare are multe voturi împărțite aproape egal"""
+    if upvotes <= 0 or downvotes <= 0:
+        return 0.0
+    magnitude = upvotes + downvotes
+    balance = downvotes / upvotes if upvotes > downvotes else upvotes / downvotes
+    return magnitude ** balance
+
+
+def register_functions(conn):
+    """Face formulele disponibile în SQL (migrări, actualizări după vot)"""
+    conn.create_function("hot_score", 3, hot_score, deterministic=True)
+    conn.create_function("controversy_score", 2, controversy_score, deterministic=True)
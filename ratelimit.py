@@ -0,0 +1,244 @@
+"""Limitarea ratei per utilizator și o poartă pentru scriitori, în fața metodelor care scriu.
+
+Un cont scriptat care apelează create_post sau send_message în buclă ține
+lock-ul de scriere SQLite și încetinește toate celelalte sesiuni. Două
+mecanisme, independente:
+
+RateLimiter: câte o găleată de jetoane per (utilizator, acțiune), comună
+tuturor sesiunilor din proces. Găleata e ținută în forma GCRA: un singur
+float per cheie, momentul (tat) la care găleata ar fi din nou plină. O
+cerere e admisă dacă tat-ul nou nu depășește acum + burst intervale; o
+cheie cu găleata plină nu mai ocupă memorie. Opțional, starea se salvează
+periodic în tabelul rate_limits, ca o repornire să nu golească limitele
+(starea unui singur proces: salvarea o înlocuiește pe cea din tabel).
+
+WriterGate: cel mult `slots` tranzacții de scriere simultane în proces
+(Database(writer_gate=...)). Restul așteaptă la rând, adormite, în loc să
+intre în busy handler-ul SQLite, care reîncearcă prin sleep-uri crescânde
+și nu păstrează ordinea sosirii.
+
+Ambele numără refuzurile și așteptările; metrics() le adună pentru pagina
+Diagnostic. Costul unei verificări (benchmarks/bench_ratelimit.py) e o
+căutare și o scriere în dict, plus time.monotonic(): ~0.35 µs cu 1.000 de
+chei, ~0.7 µs cu 100.000 parcurse pe rând, unde fiecare verificare ratează
+cache-ul procesorului. Ținta de sub 1 µs nu e garantată pe orice mașină: pe
+una mai lentă, varianta cu 100.000 de chei a ajuns la 1.5 µs.
+"""
+import sqlite3
+import threading
+import time
+from collections import Counter, deque
+from typing import Deque, Dict, NamedTuple, Optional, Tuple
+
+from database import Database
+
+
+class RateLimit(NamedTuple):
+    per_minute: float
+    # Câte acțiuni pot fi făcute una după alta, cu găleata plină
+    burst: int
+
+
+DEFAULT_LIMITS: Dict[str, RateLimit] = {
+    'create_post': RateLimit(per_minute=5, burst=5),
+    'create_comment': RateLimit(per_minute=30, burst=10),
+    'send_message': RateLimit(per_minute=20, burst=10),
+    'create_community': RateLimit(per_minute=0.1, burst=2),
+    'vote': RateLimit(per_minute=120, burst=60),
+}
+
+# Argumentul care identifică utilizatorul, pentru fiecare metodă limitată a managerilor
+USER_ARGUMENTS = {
+    'create_post': 'author_id',
+    'create_comment': 'author_id',
+    'send_message': 'sender_id',
+    'create_community': 'creator_id',
+}
+
+# Câte chei poate avea o acțiune înainte de prima curățare a găleților pline; după fiecare
+# curățare, pragul devine dublul cheilor rămase, deci costul ei se amortizează pe verificări
+PRUNE_EVERY = 65536
+PERSIST_INTERVAL_MS = 5000
+
+_monotonic = time.monotonic
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, action: str, retry_after: float):
+        self.action = action
+        self.retry_after = retry_after
+        super().__init__(f"Prea multe acțiuni de tipul {action}; încearcă din nou în {max(1, round(retry_after))} s")
+
+
+class RateLimiter:
+    """Găleți de jetoane per (utilizator, acțiune); acțiunile fără limită în `limits` trec mereu.
+
+    Fără lock pe calea verificării: citirea și scrierea în dict sunt atomice sub GIL,
+    dar perechea nu e. Două cereri ale aceluiași utilizator pentru aceeași acțiune,
+    exact în același moment, pot consuma un singur jeton; limita poate fi depășită cu
+    cel mult un jeton per suprapunere. Un lock ar dubla costul fiecărei verificări.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, RateLimit]] = None, db: Optional[Database] = None,
+                 persist_interval_ms: int = PERSIST_INTERVAL_MS):
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        # Per acțiune: intervalul dintre jetoane și toleranța (burst - 1 intervale), în secunde, și
+        # tat-ul fiecărui utilizator; un dict per acțiune evită cheile tuplu, al căror hash nu e memorat
+        self._rules: Dict[str, Tuple[float, float, Dict[str, float]]] = {
+            action: (60.0 / limit.per_minute, 60.0 / limit.per_minute * (limit.burst - 1), {})
+            for action, limit in self.limits.items()
+        }
+        self._prune_at = PRUNE_EVERY
+        self.denied: Counter = Counter()
+        self.db = db
+        self._stopped = threading.Event()
+        self._thread = None
+        if db is not None:
+            self.load()
+            self._interval = persist_interval_ms / 1000
+            self._thread = threading.Thread(target=self._run, name="rate-limits", daemon=True)
+            self._thread.start()
+
+    def acquire(self, user_id: str, action: str) -> float:
+        """0.0 dacă acțiunea e admisă (și consumă un jeton), altfel câte secunde mai sunt până la următorul"""
+        rule = self._rules.get(action)
+        if rule is None:
+            return 0.0
+        interval, tolerance, buckets = rule
+        now = _monotonic()
+        # O singură căutare în dict; 0.0 pentru o cheie absentă, adică o găleată plină
+        tat = buckets.get(user_id, 0.0)
+        if tat < now:
+            # Găleată plină (sau cheie nouă): mereu admisă. Doar aici pot apărea chei noi,
+            # deci doar aici verificăm dacă e timpul pentru o curățare
+            buckets[user_id] = now + interval
+            if len(buckets) > self._prune_at:
+                self.prune()
+            return 0.0
+        wait = tat - tolerance - now
+        if wait > 0:
+            self.denied[action] += 1
+            return wait
+        buckets[user_id] = tat + interval
+        return 0.0
+
+    def check(self, user_id: str, action: str):
+        """Ca acquire, dar ridică RateLimitExceeded la refuz"""
+        wait = self.acquire(user_id, action)
+        if wait:
+            raise RateLimitExceeded(action, wait)
+
+    def prune(self):
+        """Scoate gălețile pline: o găleată plină e identică cu una absentă"""
+        now = _monotonic()
+        for _, _, buckets in self._rules.values():
+            for user_id, tat in list(buckets.items()):
+                if tat <= now:
+                    buckets.pop(user_id, None)
+        self._prune_at = max(PRUNE_EVERY, 2 * max((len(buckets) for _, _, buckets in self._rules.values()),
+                                                  default=0))
+
+    def metrics(self) -> Dict:
+        return {'denied': dict(self.denied),
+                'tracked_keys': sum(len(buckets) for _, _, buckets in self._rules.values())}
+
+    def load(self):
+        # În tabel momentele sunt epoch; în memorie, ceasul monoton (imun la ajustările ceasului sistemului)
+        offset = _monotonic() - time.time()
+        with self.db.connection() as conn:
+            rows = conn.execute("SELECT user_id, action, tat FROM rate_limits WHERE tat > ?", (time.time(),)).fetchall()
+        for user_id, action, tat in rows:
+            if action in self._rules:
+                self._rules[action][2][user_id] = tat + offset
+
+    def save(self):
+        """Înlocuiește starea salvată cu gălețile care nu sunt pline"""
+        self.prune()
+        offset = time.time() - _monotonic()
+        rows = [(user_id, action, tat + offset)
+                for action, (_, _, buckets) in self._rules.items() for user_id, tat in list(buckets.items())]
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM rate_limits")
+            conn.executemany("INSERT INTO rate_limits (user_id, action, tat) VALUES (?, ?, ?)", rows)
+
+    def _run(self):
+        while not self._stopped.wait(self._interval):
+            try:
+                self.save()
+            except sqlite3.Error:
+                # Lock ocupat: starea rămâne în memorie, o salvăm la următorul interval
+                continue
+
+    def close(self):
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self.save()
+
+
+class WriterGate:
+    """Cel mult `slots` tranzacții de scriere simultane; restul așteaptă la rând, cel mult max_wait secunde.
+
+    Un slot eliberat trece direct la cel mai vechi fir din coadă. Cu un semafor,
+    firul care tocmai a ieșit l-ar relua imediat, iar ceilalți ar aștepta la nesfârșit.
+    """
+
+    def __init__(self, slots: int = 1, max_wait: float = 5.0):
+        self.slots = slots
+        self.max_wait = max_wait
+        self._free = slots
+        # Câte un lock deja luat per fir în așteptare; eliberarea lui îi predă slotul
+        self._waiters: Deque[threading.Lock] = deque()
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.queued = 0
+        self.max_waiting = 0
+        self.wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.timeouts = 0
+
+    def __enter__(self):
+        with self._lock:
+            if self._free and not self._waiters:
+                self._free -= 1
+                self.admitted += 1
+                return self
+            handoff = threading.Lock()
+            handoff.acquire()
+            self._waiters.append(handoff)
+            self.max_waiting = max(self.max_waiting, len(self._waiters))
+        start = time.perf_counter()
+        acquired = handoff.acquire(timeout=self.max_wait)
+        waited = (time.perf_counter() - start) * 1000
+        with self._lock:
+            if not acquired:
+                try:
+                    self._waiters.remove(handoff)
+                except ValueError:
+                    # Slotul ne-a fost predat între timeout și lock
+                    acquired = True
+            self.queued += 1
+            self.wait_ms += waited
+            self.max_wait_ms = max(self.max_wait_ms, waited)
+            if acquired:
+                self.admitted += 1
+            else:
+                self.timeouts += 1
+        if not acquired:
+            # Aceeași eroare ca la busy_timeout depășit: apelanții o tratează deja
+            raise sqlite3.OperationalError(f"database is locked (coada scriitorilor, {waited:.0f} ms)")
+        return self
+
+    def __exit__(self, *exc_info):
+        with self._lock:
+            if self._waiters:
+                self._waiters.popleft().release()
+            else:
+                self._free += 1
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {'slots': self.slots, 'admitted': self.admitted, 'queued': self.queued,
+                    'waiting': len(self._waiters), 'max_waiting': self.max_waiting, 'timeouts': self.timeouts,
+                    'mean_wait_ms': self.wait_ms / self.queued if self.queued else 0.0,
+                    'max_wait_ms': self.max_wait_ms}
@@ -0,0 +1,317 @@
+"""Mod sharded: postările, comentariile și voturile împărțite pe comunități în fișiere separate.
+
+Un singur fișier SQLite are un singur lock de scriere, deci o postare într-o
+comunitate așteaptă după un vot din alta. În modul sharded:
+
+    <director>/catalog.db      utilizatori, comunități, membri, mesaje, notificări
+    <director>/shard_00.db ... postările, comentariile și voturile, după community_id
+
+Comunitatea alege shard-ul (crc32 % număr de shard-uri), iar id-ul fiecărei
+postări și al fiecărui comentariu începe cu indexul shard-ului ("03.<uuid>"),
+deci o postare, un comentariu sau un vot se găsesc fără să știm comunitatea.
+Scrierile din comunități aflate pe shard-uri diferite nu se mai așteaptă.
+
+Shard-urile nu conțin utilizatori sau comunități: interogările lor întorc
+id-uri, iar numele se completează cu o singură citire din catalog per pagină.
+Feed-ul global interoghează toate shard-urile în paralel (un fir per shard),
+cu același cursor keyset, și interclasează rezultatele (heapq.merge).
+
+Domeniul e limitat la stocare: postări, comentarii și voturi (scrieri, importuri
+în masă, feed-ul global și al unei comunități, thread-uri). Modul nu e legat de
+aplicație, de cache, de VoteBuffer sau de AsyncDataAccess, utilizatorii,
+comunitățile și mesajele folosesc direct managerii obișnuiți pe `catalog`, iar
+feed-ul personal nu există aici: fan-out-ul pe timeline-uri (vezi
+Post.get_home_page) ar cere timeline-uri per shard, ținute la zi la fiecare
+alăturare din catalog. Îl folosește doar benchmarks/bench_sharding.py.
+"""
+import heapq
+import os
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from database import (BULK_CHUNK_SIZE, BulkResult, Comment, Database, Post, Vote, VOTE_TARGETS, _utc_now,
+                      _stored_vote, _vote_delta, apply_votes, encode_cursor, notify, record_event)
+from records import CommentRecord, PostRecord
+
+# Indexul shard-ului e codificat pe două cifre hex în id-uri
+MAX_SHARDS = 256
+ID_SEPARATOR = '.'
+
+
+def make_id(shard: int) -> str:
+    return f"{shard:02x}{ID_SEPARATOR}{uuid.uuid4()}"
+
+
+def shard_of(record_id: str) -> int:
+    """Shard-ul unei postări sau al unui comentariu, citit din id"""
+    prefix, separator, _ = record_id.partition(ID_SEPARATOR)
+    if not separator or len(prefix) != 2:
+        raise ValueError(f"Id fără shard: {record_id}")
+    return int(prefix, 16)
+
+
+class ShardedDatabase:
+    def __init__(self, directory: str = "reddit_clone_shards", shard_count: int = 4, **options):
+        if not 1 <= shard_count <= MAX_SHARDS:
+            raise ValueError(f"Numărul de shard-uri trebuie să fie între 1 și {MAX_SHARDS}")
+        os.makedirs(directory, exist_ok=True)
+        existing = sorted(name for name in os.listdir(directory)
+                          if name.startswith("shard_") and name.endswith(".db"))
+        if existing and len(existing) != shard_count:
+            # Comunitățile ar ajunge pe alt shard decât postările lor
+            raise ValueError(f"{directory} are {len(existing)} shard-uri, nu {shard_count}; "
+                             "re-sharding-ul nu e suportat")
+        self.directory = directory
+        # Fiecare fișier primește schema completă; în shard-uri tabelele catalogului rămân goale
+        self.catalog = Database(os.path.join(directory, "catalog.db"), **options)
+        self.shards = [Database(os.path.join(directory, f"shard_{index:02d}.db"), **options)
+                       for index in range(shard_count)]
+        # sqlite3 eliberează GIL-ul cât rulează interogarea: citirile din shard-uri diferite se suprapun
+        self._readers = ThreadPoolExecutor(max_workers=shard_count, thread_name_prefix='shard-read')
+
+    def shard_index(self, community_id: str) -> int:
+        return zlib.crc32(community_id.encode()) % len(self.shards)
+
+    def shard_for(self, record_id: str) -> Database:
+        index = shard_of(record_id)
+        if index >= len(self.shards):
+            raise ValueError(f"Shard inexistent pentru id-ul {record_id}")
+        return self.shards[index]
+
+    def group_by_shard(self, record_ids: Iterable[str]) -> Dict[int, List[str]]:
+        groups: Dict[int, List[str]] = {}
+        for record_id in record_ids:
+            groups.setdefault(shard_of(record_id), []).append(record_id)
+        return groups
+
+    def map_shards(self, fn: Callable[[int], list], shards: Iterable[int]) -> List[list]:
+        """fn(shard) pentru fiecare shard, în paralel; rezultatele în ordinea shard-urilor"""
+        shards = list(shards)
+        if len(shards) == 1:
+            return [fn(shards[0])]
+        return list(self._readers.map(fn, shards))
+
+    def names(self, table: str, column: str, ids: Iterable[str]) -> Dict[str, str]:
+        """id -> nume din catalog (utilizatori sau comunități), o singură interogare"""
+        ids = list(set(ids))
+        if not ids:
+            return {}
+        placeholders = ', '.join('?' * len(ids))
+        with self.catalog.connection() as conn:
+            rows = conn.execute(f"SELECT id, {column} FROM {table} WHERE id IN ({placeholders})", ids).fetchall()
+        return dict(rows)
+
+    def close(self):
+        self._readers.shutdown()
+        self.catalog.close()
+        for shard in self.shards:
+            shard.close()
+
+
+class ShardedPost(Post):
+    def __init__(self, db: ShardedDatabase):
+        super().__init__(db)
+        # Operațiile care ating un singur shard refolosesc managerul obișnuit
+        self._local = [Post(shard) for shard in db.shards]
+
+    def create_post(self, title: str, content: str, post_type: str, author_id: str, community_id: str) -> bool:
+        shard = self.db.shard_index(community_id)
+        post_id = make_id(shard)
+        created_at = _utc_now()
+
+        with self.db.shards[shard].transaction() as conn:
+            conn.execute('''
+                INSERT INTO posts (id, title, content, post_type, author_id, community_id, created_at, hot_rank)
+                VALUES (?, ?, ?, ?, ?, ?, ?, hot_score(0, 0, ?))
+            ''', (post_id, title, content, post_type, author_id, community_id, created_at, created_at))
+            # Fiecare shard are propriul jurnal de evenimente, ca și propriul lock
+            record_event(conn, 'post_created', post_id, author_id, {'community': community_id}, created_at)
+        return True
+
+    def bulk_create(self, posts: Iterable[Dict], chunk_size: int = BULK_CHUNK_SIZE) -> BulkResult:
+        by_shard: Dict[int, List[Tuple[int, Dict]]] = {}
+        failures: List[Tuple[int, str]] = []
+        for index, post in enumerate(posts):
+            try:
+                shard = self.db.shard_index(post['community_id'])
+                post_id = post.get('id') or make_id(shard)
+                if shard_of(post_id) != shard:
+                    raise ValueError(f"id-ul {post_id} nu aparține shard-ului {shard}")
+            except (KeyError, ValueError, AttributeError) as error:
+                failures.append((index, f"{type(error).__name__}: {error}"))
+                continue
+            by_shard.setdefault(shard, []).append((index, dict(post, id=post_id)))
+
+        inserted = 0
+        for shard, rows in by_shard.items():
+            result = self._local[shard].bulk_create((post for _, post in rows), chunk_size)
+            inserted += result.inserted
+            # Indexurile raportate de shard sunt poziții în lista lui; le traducem înapoi
+            failures.extend((rows[position][0], reason) for position, reason in result.failures)
+        return BulkResult(inserted, sorted(failures))
+
+    def get_feed_page(self, limit: int = 20, cursor: Optional[str] = None,
+                      sort: str = 'new', window: str = 'all') -> Tuple[List[PostRecord], Optional[str]]:
+        """Pagina globală: aceeași interogare keyset pe fiecare shard, apoi interclasare"""
+        return self._merged_page(range(len(self.db.shards)), "", (), limit, cursor, sort, window)
+
+    def get_community_page(self, community_id: str, limit: int = 20, cursor: Optional[str] = None,
+                           sort: str = 'new', window: str = 'all') -> Tuple[List[PostRecord], Optional[str]]:
+        return self._merged_page([self.db.shard_index(community_id)], "p.community_id = ?", (community_id,),
+                                 limit, cursor, sort, window)
+
+    def get_home_page(self, user_id: str, limit: int = 20,
+                      cursor: Optional[str] = None) -> Tuple[List[PostRecord], Optional[str]]:
+        # Fără timeline-uri în shard-uri, singura variantă ar citi toate apartenențele utilizatorului
+        raise NotImplementedError("Feed-ul personal nu e disponibil în modul sharded (vezi docstring-ul modulului)")
+
+    def delete_post(self, post_id: str, user_id: str) -> bool:
+        return self._local[shard_of(post_id)].delete_post(post_id, user_id)
+
+    def _shard_rows(self, shard: int, where: str, params: tuple, limit: int, cursor: Optional[str],
+                    sort: str, window: str) -> list:
+        # Fără JOIN: autorul și comunitatea rămân id-uri până la _merge
+        sort_column, where_sql, params = self._page_filter(where, params, cursor, sort, window)
+        with self.db.shards[shard].connection() as conn:
+            return conn.execute(f'''
+                SELECT p.id, p.title, p.content, p.post_type, p.created_at, p.upvotes, p.downvotes,
+                       p.author_id, p.community_id, p.author_id, {sort_column}
+                FROM posts p
+                {where_sql}
+                ORDER BY {sort_column} DESC, p.id DESC
+                LIMIT ?
+            ''', params + (limit + 1,)).fetchall()
+
+    def _merged_page(self, shards: Iterable[int], where: str, params: tuple, limit: int,
+                     cursor: Optional[str], sort: str, window: str) -> Tuple[List[PostRecord], Optional[str]]:
+        return self._merge(self.db.map_shards(
+            lambda shard: self._shard_rows(shard, where, params, limit, cursor, sort, window), shards), limit, sort)
+
+    def _merge(self, shard_rows: List[list], limit: int, sort: str) -> Tuple[List[PostRecord], Optional[str]]:
+        # Fiecare listă e deja ordonată descrescător după (cheie, id): interclasarea citește doar primele limit+1
+        merged = heapq.merge(*shard_rows, key=lambda row: (row[10], row[0]), reverse=True)
+        posts = [row for _, row in zip(range(limit + 1), merged)]
+
+        next_cursor = None
+        if len(posts) > limit:
+            posts = posts[:limit]
+            next_cursor = encode_cursor(sort, posts[-1][10], posts[-1][0])
+
+        authors = self.db.names('users', 'username', (post[7] for post in posts))
+        communities = self.db.names('communities', 'name', (post[8] for post in posts))
+        return [PostRecord(*post[:7], authors.get(post[7]), communities.get(post[8]), post[9])
+                for post in posts], next_cursor
+
+
+class _ShardComment(Comment):
+    """Comentariile unui singur shard; 'author' conține id-ul autorului până la completarea din catalog"""
+
+    def _query(self, where: str, params: list, limit: Optional[int]) -> List[CommentRecord]:
+        limit_sql = "LIMIT ?" if limit is not None else ""
+        if limit is not None:
+            params = params + [limit + 1]
+
+        with self.db.connection() as conn:
+            comments = conn.execute(f'''
+                SELECT c.id, c.content, c.created_at, c.upvotes, c.downvotes, c.parent_id,
+                       c.author_id, c.path, c.depth, c.reply_count
+                FROM comments c
+                WHERE {where}
+                ORDER BY c.path
+                {limit_sql}
+            ''', params).fetchall()
+
+        return [CommentRecord(*comment) for comment in comments]
+
+
+class ShardedComment(Comment):
+    def __init__(self, db: ShardedDatabase):
+        super().__init__(db)
+        self._local = [_ShardComment(shard) for shard in db.shards]
+
+    def create_comment(self, content: str, author_id: str, post_id: str, parent_id: str = None) -> bool:
+        # Comentariul stă pe shard-ul postării, deci și răspunsurile și voturile lui
+        shard = shard_of(post_id)
+        with self.db.shard_for(post_id).transaction() as conn:
+            inserted, recipient = self._insert_comment(conn, make_id(shard), content, author_id, post_id, parent_id)
+        if not inserted:
+            return False
+        # Notificarea e scrisă după commit-ul din shard: cele două fișiere nu au o tranzacție comună
+        with self.db.catalog.transaction() as conn:
+            notify(conn, recipient, 'reply', author_id, 'post', post_id, content)
+        return True
+
+    def bulk_create(self, comments: Iterable[Dict], chunk_size: int = BULK_CHUNK_SIZE) -> BulkResult:
+        by_shard: Dict[int, List[Tuple[int, Dict]]] = {}
+        failures: List[Tuple[int, str]] = []
+        for index, comment in enumerate(comments):
+            try:
+                shard = shard_of(comment['post_id'])
+                comment_id = comment.get('id') or make_id(shard)
+                if shard_of(comment_id) != shard:
+                    raise ValueError(f"id-ul {comment_id} nu aparține shard-ului {shard}")
+            except (KeyError, ValueError, AttributeError) as error:
+                failures.append((index, f"{type(error).__name__}: {error}"))
+                continue
+            by_shard.setdefault(shard, []).append((index, dict(comment, id=comment_id)))
+
+        inserted = 0
+        for shard, rows in by_shard.items():
+            result = self._local[shard].bulk_create((comment for _, comment in rows), chunk_size)
+            inserted += result.inserted
+            failures.extend((rows[position][0], reason) for position, reason in result.failures)
+        return BulkResult(inserted, sorted(failures))
+
+    def get_thread_page(self, post_id: str, max_depth: Optional[int] = None, limit: Optional[int] = 200,
+                        cursor: Optional[str] = None) -> Tuple[List[CommentRecord], Optional[str]]:
+        rows, next_cursor = self._local[shard_of(post_id)].get_thread_page(post_id, max_depth, limit, cursor)
+        return self._with_authors(rows), next_cursor
+
+    def get_comment_subtree(self, comment_id: str, max_depth: Optional[int] = None) -> List[CommentRecord]:
+        return self._with_authors(self._local[shard_of(comment_id)].get_comment_subtree(comment_id, max_depth))
+
+    def _with_authors(self, rows: List[CommentRecord]) -> List[CommentRecord]:
+        authors = self.db.names('users', 'username', (row.author for row in rows))
+        for row in rows:
+            row.author = authors.get(row.author)
+        return rows
+
+
+class ShardedVote(Vote):
+    """Voturile stau pe shard-ul țintei; fără VoteBuffer, care scrie într-o singură bază de date"""
+
+    def __init__(self, db: ShardedDatabase):
+        super().__init__(db)
+
+    def vote(self, user_id: str, target_type: str, target_id: str, value: int) -> Tuple[int, int]:
+        if target_type not in VOTE_TARGETS:
+            raise ValueError(f"Tip de țintă necunoscut: {target_type}")
+        if value not in (-1, 0, 1):
+            raise ValueError("Votul trebuie să fie 1, -1 sau 0")
+
+        notifications: List[tuple] = []
+        with self.db.shard_for(target_id).transaction() as conn:
+            previous = _stored_vote(conn, user_id, target_type, target_id)
+            apply_votes(conn, [(user_id, target_type, target_id, value)], notifications)
+        if notifications:
+            with self.db.catalog.transaction() as conn:
+                for args in notifications:
+                    notify(conn, *args, coalesce=True)
+        return _vote_delta(previous, value)
+
+    def get_user_votes(self, user_id: str, target_type: str, target_ids: List[str]) -> Dict[str, int]:
+        groups = self.db.group_by_shard(target_ids)
+
+        def shard_votes(shard: int) -> list:
+            ids = groups[shard]
+            placeholders = ', '.join('?' * len(ids))
+            with self.db.shards[shard].connection() as conn:
+                return conn.execute(
+                    f"SELECT target_id, value FROM votes WHERE user_id = ? AND target_type = ? AND target_id IN ({placeholders})",
+                    (user_id, target_type, *ids)
+                ).fetchall()
+
+        return {target_id: value for rows in self.db.map_shards(shard_votes, groups)
+                for target_id, value in rows if value}
@@ -0,0 +1,141 @@
+"""aio.py: firul scriitor grupează scrierile în tranzacții cu câte un SAVEPOINT per scriere.
+
+Fiecare test ține scriitorul ocupat cu o scriere care așteaptă un Event, ca
+scrierile puse între timp în coadă să ajungă sigur în același lot.
+Rulare: python -m pytest tests/test_aio.py
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aio import AsyncDataAccess
+from database import Database
+
+
+@pytest.fixture
+def facade(tmp_path):
+    db = Database(str(tmp_path / 'app.db'))
+    facade = AsyncDataAccess(db, readers=2)
+    batches = []
+    apply = facade._apply
+
+    def recording_apply(batch):
+        batches.append(len(batch))
+        apply(batch)
+
+    # Doar înregistrează dimensiunea loturilor; scrierea rămâne cea din AsyncDataAccess
+    facade._apply = recording_apply
+    facade.batches = batches
+    yield facade
+    facade.close()
+    db.close()
+
+
+def insert_user(db: Database, name: str, fail: bool = False) -> str:
+    # Rulează pe firul scriitor: connection() refolosește tranzacția lotului
+    with db.connection() as conn:
+        conn.execute("INSERT INTO users (id, username, email, password_hash) VALUES (?, ?, ?, '')",
+                     (name, name, f"{name}@example.com"))
+    if fail:
+        raise ValueError(name)
+    return name
+
+
+def committed_users(path: str) -> set:
+    conn = sqlite3.connect(path)
+    try:
+        return {row[0] for row in conn.execute("SELECT username FROM users")}
+    finally:
+        conn.close()
+
+
+async def in_one_batch(facade: AsyncDataAccess, writes: list) -> list:
+    """Pune corutinele writes în coadă cât scriitorul e blocat, apoi îl eliberează; rezultatele sau excepțiile"""
+    release, entered = threading.Event(), threading.Event()
+
+    def blocker():
+        entered.set()
+        release.wait(5)
+
+    blocked = asyncio.ensure_future(facade.write(blocker))
+    await asyncio.get_running_loop().run_in_executor(None, entered.wait, 5)
+    tasks = [asyncio.ensure_future(write) for write in writes]
+    while facade._writes.qsize() < len(writes):
+        await asyncio.sleep(0.001)
+    release.set()
+    await blocked
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def test_failing_write_rolls_back_only_its_savepoint(facade):
+    db = facade.db
+    results = asyncio.run(in_one_batch(facade, [
+        facade.write(insert_user, db, 'ana'), facade.write(insert_user, db, 'bob', True),
+        facade.write(insert_user, db, 'dan'),
+    ]))
+
+    assert results[0] == 'ana' and results[2] == 'dan'
+    assert isinstance(results[1], ValueError)
+    assert facade.batches[-1] == 3
+    # 'bob' a fost inserat și apoi anulat la SAVEPOINT; vecinii din lot au rămas
+    assert committed_users(db.db_path) == {'ana', 'dan'}
+
+
+def test_batch_results_are_published_after_commit(facade):
+    db = facade.db
+    seen_at_resolution = {}
+
+    def slow_insert(db, name):
+        insert_user(db, name)
+        # Ține lotul deschis: un rezultat publicat înainte de commit ar ajunge acum la apelant
+        time.sleep(0.2)
+        return name
+
+    async def write_and_check(name, fn=insert_user):
+        result = await facade.write(fn, db, name)
+        # Când rezultatul ajunge la apelant, rândul e deja vizibil pentru orice altă conexiune
+        seen_at_resolution[name] = name in committed_users(db.db_path)
+        return result
+
+    writes = [write_and_check(f"u{index}") for index in range(4)] + [write_and_check('u4', slow_insert)]
+    results = asyncio.run(in_one_batch(facade, writes))
+
+    assert results == [f"u{index}" for index in range(5)]
+    assert facade.batches[-1] == 5
+    assert seen_at_resolution == {f"u{index}": True for index in range(5)}
+
+
+def test_readers_never_see_uncommitted_rows(facade):
+    db = facade.db
+    inserted, resume = threading.Event(), threading.Event()
+
+    def insert_and_wait():
+        insert_user(db, 'ana')
+        inserted.set()
+        resume.wait(5)
+        return 'ana'
+
+    def read_names():
+        with facade.reader_db.connection() as conn:
+            return {row[0] for row in conn.execute("SELECT username FROM users")}
+
+    async def scenario():
+        pending = asyncio.ensure_future(facade.write(insert_and_wait))
+        await asyncio.get_running_loop().run_in_executor(None, inserted.wait, 5)
+        # Rândul e scris în tranzacția deschisă a scriitorului, dar nu e încă commit-uit
+        during = await facade.read(read_names)
+        resume.set()
+        await pending
+        after = await facade.read(read_names)
+        return during, after
+
+    during, after = asyncio.run(scenario())
+    assert during == set()
+    assert after == {'ana'}
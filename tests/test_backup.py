@@ -0,0 +1,92 @@
+"""backup.py: snapshot -> scriere -> restore readuce starea din snapshot.
+
+Rulare: python -m pytest tests/test_backup.py
+"""
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backup
+from backup import BackupService, integrity_check
+from database import Database, User
+
+
+@pytest.fixture
+def service(tmp_path):
+    db = Database(str(tmp_path / 'app.db'))
+    yield BackupService(db, str(tmp_path / 'backups'), keep=3, sleep_ms=0)
+    db.close()
+
+
+def usernames(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {row[0] for row in conn.execute("SELECT username FROM users")}
+    finally:
+        conn.close()
+
+
+def test_snapshot_write_restore_round_trip(service):
+    users = User(service.db)
+    users.create_user('ana', 'ana@example.com', 'parola123')
+    snapshot = service.snapshot()
+    users.create_user('dan', 'dan@example.com', 'parola123')
+
+    before = service.restore(snapshot['path'])
+
+    assert usernames(service.db.db_path) == {'ana'}
+    # Snapshot-ul de siguranță e un fișier nou, cu starea de dinaintea restaurării
+    assert before['path'] != snapshot['path']
+    assert integrity_check(snapshot['path']) == 'ok'
+    assert usernames(before['path']) == {'ana', 'dan'}
+
+
+def test_snapshot_never_overwrites_an_existing_one(service, monkeypatch):
+    class FrozenClock(datetime):
+        @classmethod
+        def utcnow(cls):
+            return datetime(2026, 10, 18, 12, 0, 0, 123456)
+
+    monkeypatch.setattr(backup, 'datetime', FrozenClock)
+    first = service.snapshot()
+    User(service.db).create_user('ana', 'ana@example.com', 'parola123')
+    with pytest.raises(FileExistsError):
+        service.snapshot()
+    assert usernames(first['path']) == set()
+
+
+def test_snapshots_in_the_same_second_get_distinct_names(service):
+    paths = [service.snapshot(prune=False)['path'] for _ in range(3)]
+    assert len(set(paths)) == 3
+    assert [snapshot['path'] for snapshot in service.snapshots()] == sorted(paths, reverse=True)
+
+
+def test_manifest_records_writer_waits_during_the_copy(service):
+    service.pages_per_step, service.sleep = 1, 0.002
+    stopped = threading.Event()
+
+    def writer():
+        index = 0
+        while not stopped.is_set():
+            with service.db.transaction() as conn:
+                conn.execute("INSERT INTO users (id, username, email, password_hash) VALUES (?, ?, ?, '')",
+                             (f'u{index}', f'u{index}', f'u{index}@example.com'))
+            index += 1
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        report = service.snapshot()
+    finally:
+        stopped.set()
+        thread.join()
+    stall = report['stall']
+    assert stall['source'] == 'transactions'
+    assert stall['writes'] > 0
+    assert 0 <= stall['p50_ms'] <= stall['p99_ms'] <= stall['max_ms']
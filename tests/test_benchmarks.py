@@ -0,0 +1,55 @@
+"""Fiecare script din benchmarks/ rulează cap-coadă pe date minime.
+
+Nu măsoară nimic: prinde scripturile rămase în urma unei schimbări din
+cod (formatul cursorului, semnătura unei metode), care altfel s-ar
+observa abia la următoarea rulare de mână. Fiecare script pornește într-un
+proces separat, cu argumentele lui cele mai mici, dintr-un director temporar.
+Rulare: python -m pytest tests/test_benchmarks.py
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS = os.path.join(ROOT, 'benchmarks')
+
+# script -> argumente; {tmp} e directorul temporar al testului
+ARGS = {
+    'bench_backup.py': ['--scale', 'tiny', '--pages', '64', '--sleep-ms', '1'],
+    'bench_connection_pool.py': ['--ops', '50'],
+    'bench_feed_pagination.py': ['--posts', '2000', '--pages', '1', '50', '--repeat', '1'],
+    'bench_password_hashing.py': ['--n', '1024', '--workers', '0', '--sessions', '2', '--logins', '4'],
+    'bench_presentation.py': ['--scale', 'tiny', '--pages', '5'],
+    'bench_ratelimit.py': ['--checks', '1000', '--keys', '100', '--threads', '2', '--seconds', '0.2'],
+    'bench_row_memory.py': ['--scale', 'tiny', '--rows', '200'],
+    'bench_sharding.py': ['--shards', '1', '2', '--threads', '2', '--seconds', '0.2'],
+    'bench_trending.py': ['--scale', 'tiny', '--capacity', '20', '--queries', '100'],
+    'datagen.py': ['tiny', '--out', '{tmp}/tiny.db'],
+}
+
+
+def run(script: str, args: list, tmp: str) -> str:
+    result = subprocess.run(
+        [sys.executable, os.path.join(BENCHMARKS, script), *(arg.format(tmp=tmp) for arg in args)],
+        cwd=tmp, capture_output=True, text=True, timeout=300
+    )
+    assert result.returncode == 0, f"{script} a eșuat:\n{result.stdout}\n{result.stderr}"
+    return result.stdout
+
+
+def test_every_script_is_covered():
+    scripts = {name for name in os.listdir(BENCHMARKS) if name.endswith('.py')}
+    assert scripts - set(ARGS) == {'suite.py', 'compare.py'}
+
+
+@pytest.mark.parametrize('script', list(ARGS))
+def test_benchmark_runs(tmp_path, script):
+    run(script, ARGS[script], str(tmp_path))
+
+
+def test_suite_and_compare(tmp_path):
+    tmp = str(tmp_path)
+    run('suite.py', ['--scale', 'tiny', '--iterations', '2', '--data-dir', tmp, '--out', '{tmp}/run.json'], tmp)
+    assert 'Fără regresii' in run('compare.py', ['{tmp}/run.json', '{tmp}/run.json'], tmp)
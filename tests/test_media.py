@@ -0,0 +1,68 @@
+"""media.py: variantele citite rămân în memorie ca bytes, iar postările vechi 'image_<fișier>' își găsesc fișierul.
+
+Variantele sunt scrise direct pe disc, deci testele nu au nevoie de Pillow.
+Rulare: python -m pytest tests/test_media.py
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from media import MediaStore, is_legacy
+
+
+@pytest.fixture
+def store(tmp_path):
+    db = Database(str(tmp_path / 'app.db'))
+    store = MediaStore(db, root=str(tmp_path / 'media'), workers=0, cache_bytes=10,
+                       legacy_root=str(tmp_path / 'legacy'))
+    yield store
+    store.close()
+    db.close()
+
+
+def write_variant(store: MediaStore, digest: str, data: bytes):
+    path = store.variant_path(digest, 'thumb')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as out:
+        out.write(data)
+    return path
+
+
+def test_read_variant_serves_cached_bytes_until_evicted(store):
+    first, second = 'a' * 64, 'b' * 64
+    path = write_variant(store, first, b'123456')
+    write_variant(store, second, b'abcdef')
+
+    data = store.read_variant(first, 'thumb')
+    assert data == b'123456'
+    # Din cache: același obiect, fără copie și fără să mai citească fișierul
+    os.remove(path)
+    assert store.read_variant(first, 'thumb') is data
+
+    # 6 + 6 octeți depășesc limita de 10: prima variantă e evacuată
+    assert store.read_variant(second, 'thumb') == b'abcdef'
+    assert store.read_variant(first, 'thumb') is None
+
+
+def test_missing_or_empty_variant_is_none(store):
+    assert store.read_variant('c' * 64, 'thumb') is None
+    write_variant(store, 'd' * 64, b'')
+    assert store.read_variant('d' * 64, 'thumb') is None
+    with pytest.raises(ValueError):
+        store.read_variant('d' * 64, 'original')
+
+
+def test_legacy_posts_resolve_to_the_old_file(store):
+    os.makedirs(store.legacy_root)
+    with open(os.path.join(store.legacy_root, 'pisica.png'), 'wb') as out:
+        out.write(b'\x89PNG\r\n\x1a\n')
+
+    assert is_legacy('image_pisica.png') and not is_legacy('e' * 64)
+    assert store.legacy_path('image_pisica.png') == os.path.join(store.legacy_root, 'pisica.png')
+    assert store.legacy_path('image_caine.png') is None
+    # Numele vine din postare: nu poate ieși din legacy_root
+    assert store.legacy_path('image_../app.db') is None
@@ -0,0 +1,129 @@
+"""Planurile interogărilor din database.py: niciuna nu scanează complet tabelele mari.
+
+Fiecare metodă a managerilor rulează pe setul de date 'tiny' (datagen, cu
+ANALYZE), cu un QueryTracer cu slow_ms=0, care păstrează EXPLAIN QUERY PLAN
+pentru fiecare instrucțiune. Un "SCAN <tabel>" fără index pe posts,
+comments, messages sau votes înseamnă o interogare care crește liniar cu
+baza. Parcurgerea ordonată a unui index (SCAN ... USING INDEX, ex. feed-ul
+cu LIMIT) e permisă. Rulare: python -m pytest tests/test_query_plans.py
+"""
+import os
+import re
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from database import Comment, Community, Database, Message, Notification, Post, Search, User, Vote
+from datagen import SCALES, build_database
+from diagnostics import QueryTracer
+
+LARGE_TABLES = {'posts', 'comments', 'messages', 'votes'}
+# "SCAN p" (SQLite >= 3.36) sau "SCAN TABLE posts AS p"; fără "USING ... INDEX" e o scanare a tabelului
+_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?(?!.*\bUSING\b.*INDEX)')
+_ALIAS = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE)
+
+
+@pytest.fixture(scope='module')
+def dataset(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('plans') / 'tiny.db')
+    build_database(path, SCALES['tiny'], verbose=False)
+    tracer = QueryTracer(slow_ms=0, log_size=100_000)
+    db = Database(path, tracer=tracer)
+    with db.connection() as conn:
+        user_id, conversation_id = conn.execute('''
+            SELECT receiver_id, conversation_id FROM messages GROUP BY receiver_id ORDER BY COUNT(*) DESC LIMIT 1
+        ''').fetchone()
+        post_id, community_id, author_id = conn.execute('''
+            SELECT p.id, p.community_id, p.author_id FROM posts p
+            ORDER BY (SELECT COUNT(*) FROM comments c WHERE c.post_id = p.id) DESC LIMIT 1
+        ''').fetchone()
+        comment_id = conn.execute("SELECT id FROM comments WHERE post_id = ? LIMIT 1", (post_id,)).fetchone()[0]
+        username = conn.execute("SELECT username FROM users WHERE id = ?", (user_id,)).fetchone()[0]
+    ids = {'user': user_id, 'username': username, 'conversation': conversation_id, 'post': post_id,
+           'community': community_id, 'author': author_id, 'comment': comment_id}
+    yield db, tracer, ids
+    db.close()
+
+
+def _next_page(page_fn):
+    # A doua pagină: condiția pe cursor schimbă planul
+    _, cursor = page_fn(None)
+    return page_fn(cursor)
+
+
+# (manager, metodă) -> apel; ordinea contează doar pentru scrieri (delete_post la final)
+CALLS = {
+    'User.get_user_by_id': lambda db, ids: User(db).get_user_by_id(ids['user']),
+    'User.get_user_by_username': lambda db, ids: User(db).get_user_by_username(ids['username']),
+    'User.verify_credentials': lambda db, ids: User(db).verify_credentials(ids['username'], 'gresita'),
+    'Community.get_all_communities': lambda db, ids: Community(db).get_all_communities(),
+    'Community.get_member_communities': lambda db, ids: Community(db).get_member_communities(ids['user']),
+    'Community.get_communities': lambda db, ids: Community(db).get_communities([ids['community']]),
+    'Community.get_largest_communities': lambda db, ids: Community(db).get_largest_communities(5),
+    'Community.join_community': lambda db, ids: Community(db).join_community(ids['author'], ids['community']),
+    'Community.leave_community': lambda db, ids: Community(db).leave_community(ids['author'], ids['community']),
+    **{f'Post.get_feed_page[{sort}]': (lambda sort: lambda db, ids: _next_page(
+        lambda cursor: Post(db).get_feed_page(20, cursor, sort, 'week' if sort == 'top' else 'all')))(sort)
+       for sort in ('new', 'hot', 'top', 'controversial')},
+    'Post.get_community_page': lambda db, ids: _next_page(
+        lambda cursor: Post(db).get_community_page(ids['community'], 20, cursor, 'hot')),
+    'Post.get_home_page': lambda db, ids: _next_page(lambda cursor: Post(db).get_home_page(ids['user'], cursor=cursor)),
+    'Post.create_post': lambda db, ids: Post(db).create_post('titlu', 'conținut', 'text', ids['user'], ids['community']),
+    'Comment.get_thread_page': lambda db, ids: Comment(db).get_thread_page(ids['post'], max_depth=3, limit=50),
+    'Comment.get_post_comments': lambda db, ids: Comment(db).get_post_comments(ids['post']),
+    'Comment.get_comment_subtree': lambda db, ids: Comment(db).get_comment_subtree(ids['comment'], max_depth=2),
+    'Comment.create_comment': lambda db, ids: Comment(db).create_comment('răspuns', ids['user'], ids['post'],
+                                                                         ids['comment']),
+    'Message.get_inbox': lambda db, ids: Message(db).get_inbox(ids['user']),
+    'Message.get_conversation_page': lambda db, ids: Message(db).get_conversation_page(ids['conversation'],
+                                                                                       ids['user']),
+    'Message.count_unread': lambda db, ids: Message(db).count_unread(ids['user']),
+    'Message.get_user_messages': lambda db, ids: Message(db).get_user_messages(ids['user']),
+    'Message.send_message': lambda db, ids: Message(db).send_message(ids['user'], ids['author'], 'salut'),
+    'Message.mark_conversation_read': lambda db, ids: Message(db).mark_conversation_read(ids['conversation'],
+                                                                                        ids['user']),
+    'Vote.vote[post]': lambda db, ids: Vote(db).vote(ids['user'], 'post', ids['post'], 1),
+    'Vote.vote[comment]': lambda db, ids: Vote(db).vote(ids['user'], 'comment', ids['comment'], -1),
+    'Vote.get_user_votes': lambda db, ids: Vote(db).get_user_votes(ids['user'], 'post', [ids['post']]),
+    'Notification.count_unread': lambda db, ids: Notification(db).count_unread(ids['author']),
+    'Notification.since': lambda db, ids: Notification(db).since(ids['author']),
+    'Notification.get_recent': lambda db, ids: Notification(db).get_recent(ids['author']),
+    'Notification.mark_read': lambda db, ids: Notification(db).mark_read(ids['author']),
+    'Search.search_posts': lambda db, ids: Search(db).search_posts('python'),
+    'Search.search_comments': lambda db, ids: Search(db).search_comments('python'),
+    'Search.search_communities': lambda db, ids: Search(db).search_communities('python'),
+    'Post.delete_post': lambda db, ids: Post(db).delete_post(ids['post'], ids['author']),
+}
+
+
+def full_scans(sql: str, plan: str):
+    """Tabelele mari scanate complet în plan, după numele real (nu alias)"""
+    aliases = {}
+    for table, alias in _ALIAS.findall(sql):
+        aliases[table] = table
+        if alias and alias.upper() not in {'ON', 'WHERE', 'JOIN', 'LEFT', 'INNER', 'ORDER', 'GROUP', 'LIMIT'}:
+            aliases[alias] = table
+    scanned = []
+    for line in plan.splitlines():
+        match = _SCAN.match(line.strip())
+        if match:
+            name = match.group(2) or match.group(1)
+            if aliases.get(name, name) in LARGE_TABLES:
+                scanned.append(line.strip())
+    return scanned
+
+
+@pytest.mark.parametrize('label', list(CALLS))
+def test_no_full_scan_of_large_tables(dataset, label):
+    db, tracer, ids = dataset
+    tracer.slow_log.clear()
+    CALLS[label](db, ids)
+    statements = [entry for entry in tracer.slow_queries() if entry['plan']]
+    assert statements, f"{label} n-a rulat nicio interogare"
+    for entry in statements:
+        scans = full_scans(entry['sql'], entry['plan'])
+        assert not scans, f"{label}: {entry['sql']}\n{entry['plan']}"
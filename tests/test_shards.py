@@ -0,0 +1,63 @@
+"""shards.py: paginile citite din mai multe shard-uri au aceeași ordine ca dintr-o singură bază.
+
+Rulare: python -m pytest tests/test_shards.py
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Community, User
+from shards import ShardedDatabase, ShardedPost, ShardedVote, shard_of
+
+
+@pytest.fixture
+def sharded(tmp_path):
+    db = ShardedDatabase(str(tmp_path), shard_count=4)
+    users = User(db.catalog)
+    users.bulk_create({'username': f"u{index}", 'email': f"u{index}@example.com", 'password_hash': "-"}
+                      for index in range(3))
+    user_id = users.get_user_by_username('u0')['id']
+    communities = Community(db.catalog)
+    for index in range(8):
+        communities.create_community(f"c{index}", "", user_id)
+    community_ids = [community['id'] for community in communities.get_all_communities()]
+    posts = ShardedPost(db)
+    posts.bulk_create({'title': f"p{index}", 'author_id': user_id, 'community_id': community_ids[index % 8],
+                       'created_at': f"2026-01-01 00:{index // 60:02d}:{index % 60:02d}"} for index in range(90))
+    yield db, user_id, community_ids
+    db.close()
+
+
+def test_feed_pages_merge_all_shards_in_order(sharded):
+    db, _, _ = sharded
+    posts = ShardedPost(db)
+    seen, cursor = [], None
+    while True:
+        page, cursor = posts.get_feed_page(limit=7, cursor=cursor)
+        seen.extend(page)
+        if cursor is None:
+            break
+    keys = [(post['created_at'], post['id']) for post in seen]
+    assert len(seen) == 90
+    assert len({shard_of(post['id']) for post in seen}) > 1
+    assert keys == sorted(keys, reverse=True)
+    assert {post['author'] for post in seen} == {'u0'}
+
+
+def test_votes_are_read_from_every_shard(sharded):
+    db, user_id, _ = sharded
+    page, _ = ShardedPost(db).get_feed_page(limit=20)
+    votes = ShardedVote(db)
+    for post in page[:10]:
+        votes.vote(user_id, 'post', post['id'], 1)
+    assert votes.get_user_votes(user_id, 'post', [post['id'] for post in page]) == {
+        post['id']: 1 for post in page[:10]}
+
+
+def test_home_feed_is_out_of_scope(sharded):
+    db, user_id, _ = sharded
+    with pytest.raises(NotImplementedError):
+        ShardedPost(db).get_home_page(user_id)
@@ -0,0 +1,148 @@
+"""Vote și VoteBuffer: variația întoarsă de vote() e cea scrisă în contoare, și sub concurență.
+
+Rulare: python -m pytest tests/test_votes.py
+"""
+import os
+import sqlite3
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Community, Database, Post, User, Vote, VoteBuffer
+
+VOTERS = 8
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / 'app.db'))
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def post_id(db):
+    users = User(db)
+    for index in range(VOTERS):
+        users.insert_user(f"u{index}", f"u{index}", f"u{index}@example.com", '-')
+    Community(db).create_community('c', '', 'u0')
+    with db.connection() as conn:
+        community_id = conn.execute("SELECT id FROM communities").fetchone()[0]
+    Post(db).create_post('titlu', 'conținut', 'text', 'u0', community_id)
+    with db.connection() as conn:
+        return conn.execute("SELECT id FROM posts").fetchone()[0]
+
+
+@pytest.fixture
+def buffer(db):
+    # Intervalul lung oprește flush-ul din fundal: testele îl apelează explicit
+    buffer = VoteBuffer(db, interval_ms=60_000)
+    yield buffer
+    buffer.close()
+
+
+def counters(db: Database, post_id: str) -> tuple:
+    with db.connection() as conn:
+        return tuple(conn.execute("SELECT upvotes, downvotes FROM posts WHERE id = ?", (post_id,)).fetchone())
+
+
+def vote_concurrently(votes: Vote, post_id: str, values: list) -> tuple:
+    """Fiecare fir votează pe rând valorile date; suma variațiilor întoarse"""
+    start = threading.Barrier(VOTERS)
+    totals = []
+
+    def voter(index):
+        up = down = 0
+        start.wait()
+        for value in values:
+            delta = votes.vote('u0' if index % 2 else f"u{index}", 'post', post_id, value)
+            up, down = up + delta[0], down + delta[1]
+        totals.append((up, down))
+
+    threads = [threading.Thread(target=voter, args=(index,)) for index in range(VOTERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(up for up, _ in totals), sum(down for _, down in totals)
+
+
+def test_concurrent_votes_return_the_deltas_that_were_written(db, post_id):
+    # Jumătate din fire votează ca același utilizator: fiecare click trebuie să pornească de la votul precedent
+    returned = vote_concurrently(Vote(db), post_id, [1, -1, 0, 1, 1, -1] * 5)
+    assert returned == counters(db, post_id)
+
+
+def test_concurrent_buffered_votes_return_the_deltas_that_are_flushed(db, post_id, buffer):
+    votes = Vote(db, buffer)
+    flushing = threading.Event()
+
+    def flush_repeatedly():
+        while not flushing.is_set():
+            buffer.flush()
+
+    flusher = threading.Thread(target=flush_repeatedly)
+    flusher.start()
+    try:
+        returned = vote_concurrently(votes, post_id, [1, -1, 0, 1, 1, -1] * 5)
+    finally:
+        flushing.set()
+        flusher.join()
+    buffer.flush()
+    assert returned == counters(db, post_id)
+
+
+def test_buffer_coalesces_votes_and_last_vote_wins(db, post_id, buffer):
+    votes = Vote(db, buffer)
+    assert votes.vote('u1', 'post', post_id, 1) == (1, 0)
+    assert votes.vote('u1', 'post', post_id, -1) == (-1, 1)
+    assert votes.vote('u2', 'post', post_id, 1) == (1, 0)
+    assert votes.vote('u3', 'post', post_id, 1) == (1, 0)
+    assert votes.vote('u3', 'post', post_id, 0) == (-1, 0)
+
+    # Nescrise încă în bază, dar vizibile pentru utilizator
+    assert counters(db, post_id) == (0, 0)
+    assert votes.get_user_votes('u1', 'post', [post_id]) == {post_id: -1}
+    assert votes.get_user_votes('u3', 'post', [post_id]) == {}
+
+    # u3 și-a retras votul înainte de flush: nu mai e nimic de scris pentru el
+    assert buffer.flush() == 2
+    assert counters(db, post_id) == (1, 1)
+    assert votes.get_user_votes('u1', 'post', [post_id]) == {post_id: -1}
+    assert buffer.flush() == 0
+
+
+def test_buffered_vote_starts_from_the_stored_vote(db, post_id, buffer):
+    Vote(db).vote('u1', 'post', post_id, 1)
+    assert Vote(db, buffer).vote('u1', 'post', post_id, -1) == (-1, 1)
+    buffer.flush()
+    assert counters(db, post_id) == (0, 1)
+
+
+def test_close_flushes_pending_votes(db, post_id):
+    buffer = VoteBuffer(db, interval_ms=60_000)
+    Vote(db, buffer).vote('u1', 'post', post_id, 1)
+    buffer.close()
+    assert counters(db, post_id) == (1, 0)
+
+
+def test_failed_flush_puts_the_batch_back(db, post_id, buffer, monkeypatch):
+    votes = Vote(db, buffer)
+    votes.vote('u1', 'post', post_id, 1)
+    votes.vote('u2', 'post', post_id, 1)
+
+    def locked(*args, **kwargs):
+        raise sqlite3.OperationalError('database is locked')
+
+    with monkeypatch.context() as patch:
+        patch.setattr('database.apply_votes', locked)
+        with pytest.raises(sqlite3.OperationalError):
+            buffer.flush()
+        # Un vot venit după eșec are prioritate față de cel pus înapoi din lot
+        assert votes.vote('u2', 'post', post_id, -1) == (-1, 1)
+
+    assert buffer.flush() == 2
+    assert counters(db, post_id) == (1, 1)
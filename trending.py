@@ -0,0 +1,334 @@
+"""Comunitățile și postările în trending, din activitatea recentă, actualizate pe măsură ce apar evenimente.
+
+Fiecare eveniment din jurnal (postare nouă, comentariu, vot, alăturare) adaugă
+o greutate la scorul postării și al comunității ei. Scorul scade exponențial
+cu timpul (timp de înjumătățire HALF_LIFE_SECONDS). Descreșterea e "forward":
+o contribuție w la momentul t se adună ca w * exp(λ (t - landmark)), deci
+scorurile memorate nu se actualizează niciodată doar pentru că trece timpul,
+iar ordinea lor e ordinea scorurilor curente. Scorul curent se obține
+înmulțind cu exp(-λ (acum - landmark)). Când exponentul crește prea mult,
+totul se rescalează la un landmark nou.
+
+Memoria e mărginită: doar cele mai active `capacity` chei au scor exact, într-un
+dict cu un min-heap pentru evacuare; restul cozii lungi trăiește într-un
+count-min sketch. O cheie care nu e în top intră cu estimarea din sketch, deci
+cu tot istoricul ei recent, nu doar cu ultimul eveniment. Interogarea citește
+doar topul: O(K).
+
+TrendingEngine citește jurnalul de la ultimul seq aplicat, la fiecare
+poll_interval_ms (activitatea apare în câteva secunde), și scrie periodic
+starea în tabelele trending și trending_sketches; la pornire reia de acolo.
+"""
+import hashlib
+import heapq
+import math
+import sqlite3
+import threading
+import time
+from array import array
+from calendar import timegm
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from database import Database
+from events import EVENT_COLUMNS, Event, checkpoint, decode_events, save_checkpoint
+
+HALF_LIFE_SECONDS = 6 * 3600
+# Evenimentele mai vechi de atâtea timpuri de înjumătățire contribuie sub 0.1%: ignorate la pornirea la rece
+HORIZON_HALF_LIVES = 10
+TOP_CAPACITY = 200
+SKETCH_WIDTH = 4096
+SKETCH_DEPTH = 4
+# exp(200) ~ 7e86: departe de limita unui double, dar rar atins (la 288 de timpi de înjumătățire)
+RESCALE_EXPONENT = 200.0
+POLL_INTERVAL_MS = 1000
+CHECKPOINT_INTERVAL_S = 60
+EVENT_BATCH = 5000
+# Comunitatea fiecărei postări văzute recent (și postarea fiecărui comentariu votat)
+PARENT_CACHE_SIZE = 100_000
+CHECKPOINT_NAME = 'trending'
+
+# (greutatea pentru postare, greutatea pentru comunitate) per tip de eveniment
+ACTIVITY_WEIGHTS: Dict[str, Tuple[float, float]] = {
+    'post_created': (1.0, 3.0),
+    'comment_created': (2.0, 1.0),
+    'vote_cast': (1.0, 0.5),
+    'member_joined': (0.0, 2.0),
+}
+KINDS = ('community', 'post')
+
+
+def _epoch(created_at: str) -> float:
+    # Formatul CURRENT_TIMESTAMP, în UTC
+    return timegm(datetime.fromisoformat(created_at).timetuple())
+
+
+class DecayedTopK:
+    """Cele mai mari `capacity` scoruri cu descreștere exponențială, plus un count-min sketch pentru restul"""
+
+    def __init__(self, half_life: float = HALF_LIFE_SECONDS, capacity: int = TOP_CAPACITY,
+                 width: int = SKETCH_WIDTH, depth: int = SKETCH_DEPTH, landmark: Optional[float] = None):
+        if width & (width - 1) or width > 1 << 16 or depth > 4:
+            raise ValueError("width trebuie să fie o putere a lui 2 de cel mult 65536, depth cel mult 4")
+        self.rate = math.log(2) / half_life
+        self.capacity = capacity
+        self.width = width
+        self.depth = depth
+        self.landmark = landmark
+        self.cells = [array('d', bytes(8 * width)) for _ in range(depth)]
+        self.top: Dict[str, float] = {}
+        # (scor, cheie), cu intrări învechite curățate leneș: scorurile din top doar cresc
+        self._heap: List[Tuple[float, str]] = []
+
+    def _indexes(self, key: str) -> List[int]:
+        # Hash stabil între procese (hash() pe str nu e), ca sketch-ul salvat să rămână valid
+        digest = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little')
+        mask = self.width - 1
+        return [(digest >> (16 * row)) & mask for row in range(self.depth)]
+
+    def add(self, key: str, weight: float, at: float):
+        if self.landmark is None:
+            self.landmark = at
+        exponent = self.rate * (at - self.landmark)
+        if exponent > RESCALE_EXPONENT:
+            self.rescale(at)
+            exponent = 0.0
+        value = weight * math.exp(exponent)
+        estimate = math.inf
+        for row, index in zip(self.cells, self._indexes(key)):
+            row[index] += value
+            if row[index] < estimate:
+                estimate = row[index]
+
+        top = self.top
+        if key in top:
+            top[key] += value
+        elif len(top) < self.capacity:
+            top[key] = estimate
+            heapq.heappush(self._heap, (estimate, key))
+        else:
+            floor, floor_key = self._floor()
+            if estimate > floor:
+                del top[floor_key]
+                heapq.heapreplace(self._heap, (estimate, key))
+                top[key] = estimate
+
+    def _floor(self) -> Tuple[float, str]:
+        heap, top = self._heap, self.top
+        while True:
+            score, key = heap[0]
+            current = top.get(key)
+            if current is None:
+                heapq.heappop(heap)
+            elif current != score:
+                heapq.heapreplace(heap, (current, key))
+            else:
+                return score, key
+
+    def discard(self, key: str):
+        # Rămâne în sketch, dar o cheie ștearsă nu mai primește activitate
+        self.top.pop(key, None)
+
+    def rescale(self, landmark: float):
+        factor = math.exp(-self.rate * (landmark - self.landmark))
+        for row in self.cells:
+            for index in range(self.width):
+                row[index] *= factor
+        self.top = {key: score * factor for key, score in self.top.items()}
+        self._heap = [(score, key) for key, score in self.top.items()]
+        heapq.heapify(self._heap)
+        self.landmark = landmark
+
+    def most_active(self, limit: int, now: float) -> List[Tuple[str, float]]:
+        """Primele `limit` chei cu scorul lor la momentul `now`"""
+        if self.landmark is None:
+            return []
+        factor = math.exp(-self.rate * (now - self.landmark))
+        return [(key, score * factor) for key, score in heapq.nlargest(limit, self.top.items(), key=itemgetter(1))]
+
+    def dump(self) -> Tuple[float, bytes, List[Tuple[str, float]]]:
+        return self.landmark, b''.join(row.tobytes() for row in self.cells), list(self.top.items())
+
+    def restore(self, landmark: float, cells: bytes, top: Iterable[Tuple[str, float]]):
+        size = 8 * self.width
+        if len(cells) != size * self.depth:
+            # Sketch salvat cu alte dimensiuni: pornim doar cu topul
+            cells = bytes(size * self.depth)
+        self.landmark = landmark
+        self.cells = [array('d', cells[row * size:(row + 1) * size]) for row in range(self.depth)]
+        self.top = dict(heapq.nlargest(self.capacity, top, key=itemgetter(1)))
+        self._heap = [(score, key) for key, score in self.top.items()]
+        heapq.heapify(self._heap)
+
+
+class TrendingEngine:
+    """Trending pentru comunități și postări, alimentat din jurnalul de evenimente; start=False fără fir de fundal"""
+
+    def __init__(self, db: Database, half_life: float = HALF_LIFE_SECONDS, capacity: int = TOP_CAPACITY,
+                 poll_interval_ms: int = POLL_INTERVAL_MS, checkpoint_interval_s: float = CHECKPOINT_INTERVAL_S,
+                 clock: Callable[[], float] = time.time, start: bool = True):
+        self.db = db
+        self.half_life = half_life
+        self.clock = clock
+        self.boards = {kind: DecayedTopK(half_life, capacity) for kind in KINDS}
+        self.seq = 0
+        self._parents: "OrderedDict[Tuple[str, str], Optional[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self.load()
+        if start:
+            self._poll = poll_interval_ms / 1000
+            self._checkpoint_every = checkpoint_interval_s
+            self._thread = threading.Thread(target=self._run, name="trending", daemon=True)
+            self._thread.start()
+
+    def trending(self, kind: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """(id, scor curent) pentru cele mai active comunități sau postări; O(K)"""
+        with self._lock:
+            return self.boards[kind].most_active(limit, self.clock())
+
+    def _remember(self, key: Tuple[str, str], parent: Optional[str]):
+        self._parents[key] = parent
+        self._parents.move_to_end(key)
+        if len(self._parents) > PARENT_CACHE_SIZE:
+            self._parents.popitem(last=False)
+
+    def _resolve(self, conn, events: List[Event]):
+        """Încarcă dintr-o singură interogare per tabel părinții necunoscuți: comentariu -> postare -> comunitate"""
+        comments = {event.entity_id for event in events
+                    if event.kind == 'vote_cast' and event.data.get('type') == 'comment'
+                    and ('comment', event.entity_id) not in self._parents}
+        for comment_id, post_id in _select_in(conn, "SELECT id, post_id FROM comments WHERE id IN ({})", comments):
+            self._remember(('comment', comment_id), post_id)
+        posts = set()
+        for event in events:
+            if event.kind == 'comment_created':
+                posts.add(event.data.get('post'))
+            elif event.kind == 'vote_cast':
+                post_id = (event.entity_id if event.data.get('type') == 'post'
+                           else self._parents.get(('comment', event.entity_id)))
+                posts.add(post_id)
+        posts = {post_id for post_id in posts if post_id and ('post', post_id) not in self._parents}
+        for post_id, community_id in _select_in(conn, "SELECT id, community_id FROM posts WHERE id IN ({})", posts):
+            self._remember(('post', post_id), community_id)
+
+    def apply(self, events: List[Event]):
+        """Adaugă contribuțiile unui lot de evenimente; părinții trebuie să fi fost rezolvați (_resolve)"""
+        communities, posts = self.boards['community'], self.boards['post']
+        parents = self._parents
+        now = self.clock()
+        last_created, at = None, 0.0
+        for event in events:
+            kind, data = event.kind, event.data
+            if kind == 'post_deleted':
+                posts.discard(event.entity_id)
+                continue
+            weights = ACTIVITY_WEIGHTS.get(kind)
+            if weights is None:
+                continue
+            post_id = community_id = None
+            if kind == 'post_created':
+                post_id, community_id = event.entity_id, data.get('community')
+                self._remember(('post', post_id), community_id)
+            elif kind == 'comment_created':
+                post_id = data.get('post')
+            elif kind == 'vote_cast':
+                # Retragerea unui vot nu e activitate
+                if not data.get('value'):
+                    continue
+                post_id = (event.entity_id if data.get('type') == 'post'
+                           else parents.get(('comment', event.entity_id)))
+            else:
+                community_id = event.entity_id
+            if post_id and community_id is None:
+                community_id = parents.get(('post', post_id))
+            # Evenimentele consecutive au adesea aceeași secundă
+            if event.created_at != last_created:
+                # Un eveniment din viitor (ceasul altui proces) contează ca fiind de acum
+                last_created, at = event.created_at, min(_epoch(event.created_at), now)
+            post_weight, community_weight = weights
+            if post_id and post_weight:
+                posts.add(post_id, post_weight, at)
+            if community_id and community_weight:
+                communities.add(community_id, community_weight, at)
+
+    def catch_up(self) -> int:
+        """Aplică evenimentele noi din jurnal; întoarce câte au fost citite"""
+        read = 0
+        # La pornirea la rece, activitatea de dinaintea orizontului nu mai contează
+        horizon = datetime.utcfromtimestamp(self.clock() - HORIZON_HALF_LIVES * self.half_life)
+        horizon = horizon.strftime('%Y-%m-%d %H:%M:%S')
+        while True:
+            with self.db.connection() as conn:
+                rows = conn.execute(f"SELECT {EVENT_COLUMNS} FROM events WHERE seq > ? ORDER BY seq LIMIT ?",
+                                    (self.seq, EVENT_BATCH)).fetchall()
+                if not rows:
+                    return read
+                # Rândurile vechi se sar fără să le decodăm, dar seq avansează peste ele
+                events = decode_events([row for row in rows if row[5] >= horizon])
+                self._resolve(conn, events)
+            with self._lock:
+                self.apply(events)
+                self.seq = rows[-1][0]
+            read += len(rows)
+
+    def checkpoint(self):
+        with self._lock:
+            seq = self.seq
+            states = {kind: board.dump() for kind, board in self.boards.items()}
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM trending")
+            for kind, (landmark, cells, top) in states.items():
+                if landmark is None:
+                    continue
+                conn.execute('''
+                    INSERT INTO trending_sketches (kind, landmark, cells) VALUES (?, ?, ?)
+                    ON CONFLICT (kind) DO UPDATE SET landmark = excluded.landmark, cells = excluded.cells
+                ''', (kind, landmark, cells))
+                conn.executemany("INSERT INTO trending (kind, item_id, score) VALUES (?, ?, ?)",
+                                 [(kind, item_id, score) for item_id, score in top])
+            save_checkpoint(conn, CHECKPOINT_NAME, seq)
+
+    def load(self):
+        with self.db.connection() as conn:
+            seq = checkpoint(conn, CHECKPOINT_NAME)
+            sketches = conn.execute("SELECT kind, landmark, cells FROM trending_sketches").fetchall()
+            tops: Dict[str, List[Tuple[str, float]]] = defaultdict(list)
+            for kind, item_id, score in conn.execute("SELECT kind, item_id, score FROM trending"):
+                tops[kind].append((item_id, score))
+        with self._lock:
+            for kind, landmark, cells in sketches:
+                if kind in self.boards:
+                    self.boards[kind].restore(landmark, cells, tops[kind])
+            self.seq = seq
+
+    def _run(self):
+        last_checkpoint = time.monotonic()
+        while not self._stopped.wait(self._poll):
+            try:
+                self.catch_up()
+                if time.monotonic() - last_checkpoint >= self._checkpoint_every:
+                    self.checkpoint()
+                    last_checkpoint = time.monotonic()
+            except sqlite3.Error:
+                # Bază ocupată: reluăm de la același seq la următorul interval
+                continue
+
+    def close(self):
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self.checkpoint()
+
+
+def _select_in(conn, sql: str, ids) -> List[tuple]:
+    ids = list(ids)
+    rows = []
+    # Sub limita de parametri SQLite din versiunile vechi (999)
+    for start in range(0, len(ids), 900):
+        chunk = ids[start:start + 900]
+        rows.extend(conn.execute(sql.format(",".join("?" * len(chunk))), chunk).fetchall())
+    return rows